@@ -0,0 +1,17 @@
+# accounts.py
+# User accounts. These are the only functions that touch the users table;
+# in client mode api_client.install() replaces them with the server's
+# login and register routes, which also open the user's API session.
+import db
+
+
+def check_password(username, password):
+    # None if there is no such user, otherwise whether password matches
+    row = db.query_one("SELECT password = ? FROM users WHERE username = ?", (password, username))
+    return None if row is None else bool(row[0])
+
+
+def register_user(username, password, instrument="", exam_year=""):
+    # Raises sqlite3.IntegrityError when the username is taken
+    db.execute("INSERT INTO users (username, password, instrument, exam_year) VALUES (?, ?, ?, ?)",
+               (username, password, instrument, exam_year))
@@ -1,56 +1,88 @@
 import tkinter as tk
-import sqlite3
-from datetime import datetime, timedelta
-from collections import defaultdict
+import db
+from collections import namedtuple
+from tasks import TaskRunner
+
+# ---------- ACHIEVEMENT RULES ----------
+# metric names a field of the achievement state; per_instrument rules are
+# checked against each instrument's total instead.
+AchievementRule = namedtuple("AchievementRule", "metric threshold message per_instrument",
+                             defaults=(False,))
+
+ACHIEVEMENT_RULES = [
+    AchievementRule("total_minutes", 60, "🕒 Practiced Over 1000 Minutes! ({value})"),
+    AchievementRule("max_streak", 5, "🔥 {value}-Day Practice Streak!"),
+    AchievementRule("minutes", 100, "🎵 {instrument} Mastery — {value} minutes!", per_instrument=True),
+    AchievementRule("goals_completed", 5, "✅ Completed {value} Goals!"),
+]
+
+NO_ACHIEVEMENTS = "⏳ Keep practicing to unlock achievements!"
+
+# Gaps-and-islands over practice days: each island is one unbroken streak.
+STREAK_QUERY = """
+    WITH days AS (
+        SELECT DISTINCT day FROM daily_rollup
+        WHERE username = ? AND julianday(day) IS NOT NULL
+    ),
+    islands AS (
+        SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island FROM days
+    )
+    SELECT MAX(day), COUNT(*) FROM islands GROUP BY island ORDER BY MAX(day)
+"""
+
+
+# ---------- ACHIEVEMENT STATE ----------
+def _rebuild_streak(cursor, username):
+    streaks = cursor.execute(STREAK_QUERY, (username,)).fetchall()
+    last_day, current_streak = streaks[-1] if streaks else (None, 0)
+    max_streak = max((length for _, length in streaks), default=0)
+    cursor.execute("""
+        UPDATE achievement_state SET current_streak = ?, max_streak = ?, last_day = ?, dirty = 0
+        WHERE username = ?
+    """, (current_streak, max_streak, last_day, username))
+
+
+# Runs on the API server's writer: a dirty streak is rebuilt and stored
+@db.remote(writer=True)
+def load_achievement_state(username):
+    with db.transaction() as cursor:
+        row = cursor.execute("SELECT dirty FROM achievement_state WHERE username = ?", (username,)).fetchone()
+        if row and row[0]:
+            _rebuild_streak(cursor, username)
+
+        row = cursor.execute("""
+            SELECT total_minutes, current_streak, max_streak, goals_completed
+            FROM achievement_state WHERE username = ?
+        """, (username,)).fetchone() or (0, 0, 0, 0)
+        instruments = cursor.execute("""
+            SELECT instrument, minutes FROM achievement_instrument_totals
+            WHERE username = ? AND minutes > 0
+        """, (username,)).fetchall()
+
+    total_minutes, current_streak, max_streak, goals_completed = row
+    return {
+        "total_minutes": total_minutes,
+        "current_streak": current_streak,
+        "max_streak": max_streak,
+        "goals_completed": goals_completed,
+        "instrument_minutes": dict(instruments),
+    }
 
-def calculate_achievements(username):
-    conn = sqlite3.connect("music_tracker.db")
-    c = conn.cursor()
-    c.execute("SELECT date, duration, instrument FROM practice_sessions WHERE username = ?", (username,))
-    data = c.fetchall()
-
-    c.execute("SELECT COUNT(*) FROM goals WHERE username = ? AND completed = 1", (username,))
-    goals_completed = c.fetchone()[0]
-    conn.close()
-
-    total_minutes = 0
-    instrument_minutes = defaultdict(int)
-    date_set = set()
-
-    for date_str, duration, instrument in data:
-        total_minutes += duration
-        instrument_minutes[instrument] += duration
-        date_set.add(date_str)
-
-    # Calculate streak
-    dates = sorted([datetime.strptime(d, "%Y-%m-%d").date() for d in date_set])
-    streak = 1
-    max_streak = 1
-    for i in range(1, len(dates)):
-        if (dates[i] - dates[i - 1]).days == 1:
-            streak += 1
-            max_streak = max(max_streak, streak)
-        else:
-            streak = 1
-
-    # Achievement badges
-    achievements = []
-
-    if total_minutes >= 60:
-        achievements.append(f"🕒 Practiced Over 1000 Minutes! ({total_minutes})")
-
-    if max_streak >= 5:
-        achievements.append(f"🔥 {max_streak}-Day Practice Streak!")
 
-    for inst, mins in instrument_minutes.items():
-        if mins >= 100:
-            achievements.append(f"🎵 {inst} Mastery — {mins} minutes!")
+def calculate_achievements(username):
+    state = load_achievement_state(username)
 
-    if goals_completed >= 5:
-        achievements.append(f"✅ Completed {goals_completed} Goals!")
+    achievements = []
+    for rule in ACHIEVEMENT_RULES:
+        if rule.per_instrument:
+            for inst, mins in state["instrument_minutes"].items():
+                if mins >= rule.threshold:
+                    achievements.append(rule.message.format(instrument=inst, value=mins))
+        elif state[rule.metric] >= rule.threshold:
+            achievements.append(rule.message.format(value=state[rule.metric]))
 
     if not achievements:
-        achievements.append("⏳ Keep practicing to unlock achievements!")
+        achievements.append(NO_ACHIEVEMENTS)
 
     return achievements
 
@@ -64,10 +96,42 @@ def create_achievements_frame(parent, username):
     tk.Label(frame, text="🏆 Achievements", font=("Helvetica", 20, "bold"),
              bg="#FFFFFF", fg="#2B2B2B").pack(pady=10)
 
-    achievements = calculate_achievements(username)
+    badges_frame = tk.Frame(frame, bg="#F2F6FC")
+    badges_frame.pack(fill="x")
+
+    tasks = TaskRunner(frame)
+    interrupted = {"badges": False}
+
+    tk.Label(badges_frame, text="Loading achievements…", font=("Helvetica", 12),
+             bg="#F2F6FC", fg="#888888").pack(pady=10)
+
+    def show_badges(achievements):
+        for widget in badges_frame.winfo_children():
+            widget.destroy()
+
+        for achievement in achievements:
+            badge = tk.Label(badges_frame, text=achievement, font=("Helvetica", 14),
+                             bg="#F8F8FF", fg="#2B2B2B", padx=10, pady=8,
+                             anchor="w", relief="solid", bd=1)
+            badge.pack(fill="x", pady=5)
+
+    def draw_badges():
+        tasks.submit(lambda: calculate_achievements(username), show_badges, key="badges")
+
+    def on_hide():
+        if tasks.cancel():
+            interrupted["badges"] = True
+
+    def on_show():
+        # A load cancelled by navigating away is restarted on return
+        if interrupted["badges"]:
+            interrupted["badges"] = False
+            draw_badges()
+
+    draw_badges()
+
+    frame.refresh = draw_badges
+    frame.on_hide = on_hide
+    frame.on_show = on_show
 
-    for achievement in achievements:
-        badge = tk.Label(frame, text=achievement, font=("Helvetica", 14),
-                         bg="#F8F8FF", fg="#2B2B2B", padx=10, pady=8,
-                         anchor="w", relief="solid", bd=1)
-        badge.pack(fill="x", pady=5)
+    return frame
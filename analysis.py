@@ -1,26 +1,51 @@
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
+import db
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import defaultdict
-
-def fetch_practice_data(username, start_date=None, end_date=None):
-    conn = sqlite3.connect("music_tracker.db")
-    c = conn.cursor()
-
-    if start_date and end_date:
-        c.execute("""
-            SELECT date, duration, instrument FROM practice_sessions 
-            WHERE username = ? AND date BETWEEN ? AND ?
-        """, (username, start_date, end_date))
-    else:
-        c.execute("SELECT date, duration, instrument FROM practice_sessions WHERE username = ?", (username,))
-        
-    rows = c.fetchall()
-    conn.close()
-    return rows
+import matplotlib
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter, date2num
+from matplotlib.figure import Figure
+import numpy as np
+import threading
+import chart_cache
+import timeseries
+from tasks import TaskRunner, render_png
+
+BAR_CHART_SIZE = (8, 4)
+PIE_CHART_SIZE = (5, 4)
+TREND_CHART_SIZE = (13, 3)
+CHART_DPI = 100
+
+DAYS_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Minutes per (weekday, instrument) over a date range, grouped by SQLite.
+# %w counts from Sunday = 0; rows with malformed dates have no weekday.
+WEEKDAY_QUERY = """
+    SELECT (CAST(strftime('%w', day) AS INTEGER) + 6) % 7 AS weekday, instrument, SUM(minutes)
+    FROM daily_rollup
+    WHERE username = :username
+      AND day >= COALESCE(:start, '') AND day <= COALESCE(:end, '9999-12-31')
+      AND strftime('%w', day) IS NOT NULL
+    GROUP BY weekday, instrument
+"""
+
+@db.remote()
+def fetch_weekday_rows(username, start_date=None, end_date=None):
+    # (weekday, instrument, minutes) rows; the matrix is built locally
+    return db.query(WEEKDAY_QUERY, {"username": username, "start": start_date or None, "end": end_date or None})
+
+def fetch_weekday_matrix(username, start_date=None, end_date=None):
+    # Returns (instruments, minutes) where minutes[day, i] is the total for
+    # DAYS_ORDER[day] and instruments[i]; instruments are sorted by name.
+    rows = fetch_weekday_rows(username, start_date, end_date)
+    if not rows:
+        return [], np.zeros((len(DAYS_ORDER), 0), dtype=np.int64)
+
+    weekdays, names, minutes = zip(*rows)
+    instruments, columns = np.unique(np.array(names, dtype=object), return_inverse=True)
+    matrix = np.zeros((len(DAYS_ORDER), len(instruments)), dtype=np.int64)
+    matrix[np.array(weekdays), columns] = minutes
+    return list(instruments), matrix
 
 def create_analysis_frame(parent, username):
     for widget in parent.winfo_children():
@@ -44,76 +69,205 @@ def create_analysis_frame(parent, username):
     end_entry = tk.Entry(filter_frame, font=("Helvetica", 10), width=12)
     end_entry.grid(row=0, column=3)
 
-    def render_graphs(start=None, end=None):
-        nonlocal frame  # use existing frame
-        for widget in frame.winfo_children():
-            if isinstance(widget, tk.Frame) and widget not in [filter_frame]:
-                widget.destroy()
-
-        # ---------- Data ----------
-        data = fetch_practice_data(username, start, end)
-        instruments = set()
-        day_instrument_duration = defaultdict(lambda: defaultdict(int))
-        instrument_data = defaultdict(int)
-
-        for date_str, duration, instrument in data:
-            try:
-                day = datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
-                instruments.add(instrument)
-                day_instrument_duration[day][instrument] += duration
-                instrument_data[instrument] += duration
-            except Exception as e:
-                print("Date format error:", e)
-
-        instruments = sorted(list(instruments))
-        days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-        # ---------- Chart Frame ----------
-        chart_frame = tk.Frame(frame, bg="#FFFFFF")
-        chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
-        chart_frame.columnconfigure(0, weight=1)
-        chart_frame.columnconfigure(1, weight=1)
-        chart_frame.rowconfigure(0, weight=1)
-
-        # ---------- Bar Chart ----------
-        bar_fig, bar_ax = plt.subplots(figsize=(8, 4), dpi=100)
-        x = range(len(days_order))
-        bar_width = 0.8 / len(instruments) if instruments else 0.8
-        colors = plt.cm.tab10.colors
+    shown_range = [None, None]
+
+    # ---------- Chart Frame ----------
+    # The figures are created once; filtering updates their artists in place
+    # and re-rasterizes only the charts whose data changed. Querying and Agg
+    # drawing run on a worker thread and the PNGs are shown in plain labels.
+    chart_frame = tk.Frame(frame, bg="#FFFFFF")
+    chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
+    chart_frame.columnconfigure(0, weight=1)
+    chart_frame.columnconfigure(1, weight=1)
+    chart_frame.rowconfigure(0, weight=1)
 
-        for i, instrument in enumerate(instruments):
-            y_vals = [day_instrument_duration[day].get(instrument, 0) for day in days_order]
-            offset = [xi + i * bar_width for xi in x]
-            bar_ax.bar(offset, y_vals, width=bar_width, label=instrument, color=colors[i % len(colors)])
+    bar_label = tk.Label(chart_frame, text="Loading chart…", font=("Helvetica", 12), fg="#888888", bg="#FFFFFF")
+    bar_label.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+    pie_label = tk.Label(chart_frame, text="Loading chart…", font=("Helvetica", 12), fg="#888888", bg="#FFFFFF")
+    pie_label.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+    trend_label = tk.Label(chart_frame, text="Loading chart…", font=("Helvetica", 12), fg="#888888", bg="#FFFFFF")
+    trend_label.grid(row=1, column=0, columnspan=2, padx=10, pady=10, sticky="nsew")
 
-        bar_ax.set_xticks([xi + bar_width * (len(instruments) / 2 - 0.5) for xi in x])
-        bar_ax.set_xticklabels(days_order, rotation=45, ha="right")
+    bar_fig = Figure(figsize=BAR_CHART_SIZE, dpi=CHART_DPI)
+    bar_ax = bar_fig.add_subplot(111)
+    pie_fig = Figure(figsize=PIE_CHART_SIZE, dpi=CHART_DPI)
+    pie_ax = pie_fig.add_subplot(111)
+    trend_fig = Figure(figsize=TREND_CHART_SIZE, dpi=CHART_DPI)
+    trend_ax = trend_fig.add_subplot(111)
+    trend_line, = trend_ax.plot([], [], color="#A084E8", linewidth=1.5)
+    trend_locator = AutoDateLocator()
+    trend_ax.xaxis.set_major_locator(trend_locator)
+    trend_ax.xaxis.set_major_formatter(ConciseDateFormatter(trend_locator))
+    trend_ax.set_ylabel("Minutes")
+    trend_ax.grid(True, color="#CCCCCC", linestyle="--", linewidth=0.5, axis="y")
+
+    colors = matplotlib.colormaps["tab10"].colors
+    # Figure state, owned by whichever worker holds figure_lock
+    figure_lock = threading.Lock()
+    shown = {"instruments": None, "minutes": None, "totals": None, "bars": [], "bar_png": None, "pie_png": None,
+             "trend": None, "trend_fill": None, "trend_png": None}
+    tasks = TaskRunner(frame)
+    displayed = {"bar": None, "pie": None, "trend": None}
+
+    def layout_bars(instruments):
+        # Recreates the bar artists; only needed when the instrument set changes
+        bar_ax.clear()
+        x = np.arange(len(DAYS_ORDER))
+        bar_width = 0.8 / len(instruments) if instruments else 0.8
+        shown["bars"] = [
+            bar_ax.bar(x + i * bar_width, np.zeros(len(DAYS_ORDER)), width=bar_width, label=instrument,
+                       color=colors[i % len(colors)])
+            for i, instrument in enumerate(instruments)
+        ]
+        bar_ax.set_xticks(x + bar_width * (len(instruments) / 2 - 0.5))
+        bar_ax.set_xticklabels(DAYS_ORDER, rotation=45, ha="right")
         bar_ax.set_ylabel("Minutes")
         bar_ax.set_title("Daily Practice Duration per Instrument")
-        bar_ax.legend(title="Instrument")
+        if instruments:
+            bar_ax.legend(title="Instrument")
+
+    def update_bars(minutes):
+        for i, bars in enumerate(shown["bars"]):
+            for rect, height in zip(bars, minutes[:, i]):
+                rect.set_height(height)
+        bar_ax.relim()
+        bar_ax.autoscale_view()
         bar_fig.tight_layout()
+        shown["bar_png"] = render_png(bar_fig, "analysis bar chart")
 
-        bar_canvas = FigureCanvasTkAgg(bar_fig, master=chart_frame)
-        bar_canvas.draw()
-        bar_widget = bar_canvas.get_tk_widget()
-        bar_widget.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
-
-        # ---------- Pie Chart ----------
-        if instrument_data:
-            pie_fig, pie_ax = plt.subplots(figsize=(5, 4), dpi=100)
-            labels = list(instrument_data.keys())
-            sizes = list(instrument_data.values())
-            pie_ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
+    def update_pie(instruments, totals):
+        # Wedge geometry and label placement all depend on every total, so
+        # the pie is redrawn on its existing axes rather than patched.
+        pie_ax.clear()
+        if totals.sum() > 0:
+            pie_ax.pie(totals, labels=instruments, autopct="%1.1f%%", startangle=90)
             pie_ax.set_title("Total Practice Time per Instrument")
             pie_fig.tight_layout()
+            shown["pie_png"] = render_png(pie_fig, "analysis pie chart")
+        else:
+            shown["pie_png"] = None
+
+    def trend_range(start, end):
+        # Open ends of the filter fall back to the first / last practice day
+        bounds = timeseries.date_bounds(username)
+        if bounds is None:
+            return None
+        first = datetime.strptime(start, "%Y-%m-%d").date() if start else bounds[0]
+        last = datetime.strptime(end, "%Y-%m-%d").date() if end else max(bounds[1], datetime.today().date())
+        return (first, last) if first <= last else None
 
-            pie_canvas = FigureCanvasTkAgg(pie_fig, master=chart_frame)
-            pie_canvas.draw()
-            pie_widget = pie_canvas.get_tk_widget()
-            pie_widget.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+    def update_trend(series):
+        # One point per period, at most one per pixel of the axes width
+        if shown["trend_fill"] is not None:
+            shown["trend_fill"].remove()
+            shown["trend_fill"] = None
+        if series is None:
+            shown["trend_png"] = None
+            return
+
+        resolution, x, minutes = series
+        x = date2num(x)
+        trend_line.set_data(x, minutes)
+        shown["trend_fill"] = trend_ax.fill_between(x, minutes, color="#A084E8", alpha=0.25)
+        trend_ax.set_title(f"Practice Trend (minutes per {resolution})")
+        if len(x) > 1:
+            trend_ax.set_xlim(x[0], x[-1])
         else:
-            tk.Label(chart_frame, text="No instrument data available.",
-                     font=("Helvetica", 12), fg="#888888", bg="#FFFFFF").grid(row=0, column=1, padx=10, pady=10)
+            trend_ax.set_xlim(x[0] - 1, x[0] + 1)
+        trend_ax.set_ylim(0, max(int(minutes.max()), 1) * 1.1)
+        trend_fig.tight_layout()
+        shown["trend_png"] = render_png(trend_fig, "analysis trend chart")
+
+    def fetch_trend(start, end):
+        date_range = trend_range(start, end)
+        if date_range is None:
+            return None
+        return timeseries.fetch_series(username, *date_range, max_points=int(trend_ax.bbox.width))
+
+    def same_series(a, b):
+        if a is None or b is None:
+            return a is b
+        return a[0] == b[0] and np.array_equal(a[1], b[1]) and np.array_equal(a[2], b[2])
+
+    def draw_charts(start, end):
+        # Worker thread: returns the PNGs from the disk cache when both are
+        # there, otherwise re-renders only what changed since the last draw
+        stamp = chart_cache.data_stamp(username)
+        bar_key = chart_cache.chart_key(username, "weekday_bar", start, end, (BAR_CHART_SIZE, CHART_DPI), stamp)
+        pie_key = chart_cache.chart_key(username, "instrument_pie", start, end, (PIE_CHART_SIZE, CHART_DPI), stamp)
+        # An open-ended trend runs up to today, so today is part of its key
+        trend_end = end or datetime.today().strftime("%Y-%m-%d")
+        trend_key = chart_cache.chart_key(username, "trend", start, trend_end, (TREND_CHART_SIZE, CHART_DPI), stamp)
+        bar_hit, bar_png = chart_cache.get(bar_key)
+        pie_hit, pie_png = chart_cache.get(pie_key)
+        trend_hit, trend_png = chart_cache.get(trend_key)
+        if bar_hit and pie_hit and trend_hit:
+            return bar_png, pie_png, trend_png
+
+        with figure_lock:
+            # ---------- Data ----------
+            instruments, minutes = fetch_weekday_matrix(username, start, end)
+            totals = minutes.sum(axis=0)
+            same_instruments = instruments == shown["instruments"]
+
+            # ---------- Bar Chart ----------
+            if not same_instruments:
+                layout_bars(instruments)
+            if not same_instruments or not np.array_equal(minutes, shown["minutes"]):
+                update_bars(minutes)
+
+            # ---------- Pie Chart ----------
+            if not same_instruments or not np.array_equal(totals, shown["totals"]):
+                update_pie(instruments, totals)
+
+            # ---------- Trend Chart ----------
+            series = fetch_trend(start, end)
+            if not same_series(series, shown["trend"]):
+                update_trend(series)
+
+            shown.update(instruments=instruments, minutes=minutes, totals=totals, trend=series)
+            bar_png, pie_png, trend_png = shown["bar_png"], shown["pie_png"], shown["trend_png"]
+
+        chart_cache.store(bar_key, bar_png)
+        chart_cache.store(pie_key, pie_png)
+        chart_cache.store(trend_key, trend_png)
+        return bar_png, pie_png, trend_png
+
+    def show_png(label, name, png, empty_text=""):
+        if png is None:
+            displayed[name] = None
+            label.config(image="", text=empty_text)
+            label.image = None
+            return
+        if displayed[name] is png:
+            return
+        displayed[name] = png
+        image = tk.PhotoImage(master=label, data=png)
+        label.config(image=image, text="")
+        label.image = image  # keep a reference for Tk
+
+    def show_charts(result):
+        bar_png, pie_png, trend_png = result
+        show_png(bar_label, "bar", bar_png)
+        show_png(pie_label, "pie", pie_png, "No instrument data available.")
+        show_png(trend_label, "trend", trend_png, "No practice data in this range.")
+
+    def render_graphs(start=None, end=None):
+        start, end = start or None, end or None
+        shown_range[:] = [start, end]
+        tasks.submit(lambda: draw_charts(start, end), show_charts, key="charts")
+
+    interrupted = {"charts": False}
+
+    def on_hide():
+        if tasks.cancel():
+            interrupted["charts"] = True
+
+    def on_show():
+        # Charts cancelled by navigating away are requested again on return
+        if interrupted["charts"]:
+            interrupted["charts"] = False
+            render_graphs(*shown_range)
 
     # ---------- Filter Button ----------
     def on_filter():
@@ -138,6 +292,12 @@ def create_analysis_frame(parent, username):
     end_entry.insert(0, str(today))
     render_graphs(str(last_week), str(today))
 
+    frame.refresh = lambda: render_graphs(*shown_range)
+    frame.on_show = on_show
+    frame.on_hide = on_hide
+
+    return frame
+
 
 
 
@@ -0,0 +1,159 @@
+# api_client.py
+# Client mode: with MUSIC_TRACKER_API_URL set (e.g. http://127.0.0.1:8765)
+# the app never opens SQLite itself. install() sends the data functions
+# marked @db.remote() to an api_server.py instance, which runs them for the
+# logged-in user only. Each thread keeps one HTTP/1.1 keep-alive connection.
+# MUSIC_TRACKER_API_TOKEN is sent as a bearer token when the server wants one.
+import http.client
+import json
+import sqlite3
+import threading
+from urllib.parse import quote, urlsplit
+
+import accounts
+import db
+
+ENV_URL = "MUSIC_TRACKER_API_URL"
+ENV_TOKEN = "MUSIC_TRACKER_API_TOKEN"
+# Carries the session a login returned
+SESSION_HEADER = "X-Session-Token"
+TIMEOUT_SECONDS = 30
+
+# Errors the server reports by class name are raised as that class, so
+# callers that catch e.g. sqlite3.IntegrityError or the ValueError of a
+# failed validation behave the same.
+ERRORS = {name: getattr(sqlite3, name) for name in (
+    "IntegrityError", "OperationalError", "ProgrammingError", "DataError",
+    "InterfaceError", "NotSupportedError", "DatabaseError", "Error")}
+ERRORS["ValueError"] = ValueError
+
+
+class ApiClientError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class ApiClient:
+    def __init__(self, url, token=None):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"API URL must look like http://host:port, not {url!r}")
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.token = token
+        self.sessions = {}  # username -> session token
+        self.local = threading.local()
+
+    # ---------- transport ----------
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=TIMEOUT_SECONDS)
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body, default=_json_default).encode("utf-8") if body is not None else None
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        # The server closes idle keep-alive connections; a request that
+        # finds its connection gone is retried once on a fresh one.
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._drop_connection()
+                if attempt == 2:
+                    raise
+            except (OSError, http.client.HTTPException):
+                self._drop_connection()
+                raise
+        if response.getheader("Connection", "").lower() == "close":
+            self._drop_connection()
+
+        result = json.loads(payload) if payload else {}
+        if response.status >= 400:
+            error = ERRORS.get(result.get("type"))
+            if error is not None:
+                raise error(result.get("error"))
+            raise ApiClientError(response.status, result.get("error", response.reason))
+        return result
+
+    # ---------- accounts ----------
+    def _user_path(self, username, rest):
+        return f"/api/users/{quote(username, safe='')}/{rest}"
+
+    def _login(self, username, route, body):
+        result = self.request("POST", self._user_path(username, route), body)
+        if result.get("session"):
+            self.sessions[username] = result["session"]
+        return result["match"]
+
+    def check_password(self, username, password):
+        # accounts.check_password; a match also logs this client in
+        return self._login(username, "login", {"password": password})
+
+    def register_user(self, username, password, instrument="", exam_year=""):
+        self._login(username, "register", {"password": password, "instrument": instrument,
+                                           "exam_year": exam_year})
+
+    # ---------- data ----------
+    def call(self, name, username, args=(), kwargs=None):
+        # Runs the @db.remote() function name on the server as username
+        headers = {SESSION_HEADER: self.sessions.get(username, "")}
+        return self.request("POST", self._user_path(username, f"calls/{name}"),
+                            {"args": list(args), "kwargs": kwargs or {}}, headers)["result"]
+
+    def data_version(self, path=None):
+        return tuple(self.request("GET", "/db/version")["version"])
+
+    def get_connection(self, path=None):
+        # Only called to make sure the database is ready; here that means
+        # the server answers
+        self.data_version()
+        return self
+
+
+def _local_only(name):
+    def unavailable(*args, **kwargs):
+        raise RuntimeError(f"db.{name} runs SQL locally, which client mode doesn't allow; "
+                           f"use a @db.remote() data function")
+    return unavailable
+
+
+def install(url, token=None):
+    # Sends every @db.remote() data function, and logins, to the API server
+    # at url; the raw SQL helpers stop working so nothing reaches a local file
+    client = ApiClient(url, token)
+    db.remote_handler = client.call
+    accounts.check_password = client.check_password
+    accounts.register_user = client.register_user
+    db.data_version = client.data_version
+    db.get_connection = client.get_connection
+    for name in ("query", "query_one", "query_value", "iterate", "execute", "execute_quiet",
+                 "executemany", "transaction"):
+        setattr(db, name, _local_only(name))
+    # Keeps chart cache entries from different servers apart
+    db.DB_PATH = url
+    return client
@@ -0,0 +1,518 @@
+# api_server.py
+# Local HTTP/JSON server that owns the tracker database, so many clients
+# (the Tk app in client mode, scripts, other tools) share one file without
+# fighting over SQLite locks.
+#
+#   python api_server.py [--host 127.0.0.1] [--port 8765] [--db music_tracker.db] [--token SECRET]
+#
+# With a token (--token or MUSIC_TRACKER_API_TOKEN) every request must send
+# "Authorization: Bearer <token>"; without one the server only binds to
+# loopback addresses. Everything under /api/users/<name>/ also needs that
+# user's session, sent as X-Session-Token: POST .../login or .../register
+# returns one. Clients never send SQL; they can only run the operations
+# below for the user they are logged in as.
+# Writes are serialized on a single writer thread, one at a time; reads
+# run on a small pool of read-only WAL connections and are answered from a
+# cache that every write invalidates. Connections are HTTP/1.1 keep-alive.
+#
+# /api/users/<name>/...              session, goal, note and achievement operations
+# /api/users/<name>/calls/<function> the data functions marked @db.remote(),
+#                                    used by api_client in client mode
+# /db/version                        data version for client-side caches
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import date, datetime
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Importing the data modules also registers their @db.remote() functions
+import accounts
+import achievements
+import analysis
+import api_client
+import calendar_view
+import chart_cache
+import dashboard
+import db
+import goals
+import import_export
+import practice_history
+import practice_notes
+import practice_timer
+import timeseries
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+READ_THREADS = 4
+READ_CACHE_SIZE = 512
+KEEP_ALIVE_SECONDS = 60
+MAX_BODY_BYTES = 16 * 1024 * 1024
+WRITE_LOCK_TIMEOUT = 10
+MAX_PAGE_SIZE = 1000
+# Oldest sessions are dropped beyond this many logins
+MAX_SESSIONS = 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    # Matches the text sqlite3's default adapters would have stored
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be an integer") from None
+
+
+# ---------- DOMAIN OPERATIONS ----------
+# Each runs on a reader or the writer thread, where db's helpers use that
+# thread's connection.
+def list_sessions(username, query, body):
+    sort = query.get("sort", "Date")
+    if sort not in practice_history.SORT_COLUMNS:
+        raise ApiError(400, f"sort must be one of {', '.join(practice_history.SORT_COLUMNS)}")
+    after = json.loads(query["after"]) if query.get("after") else None
+    limit = min(_int(query.get("limit", practice_history.PAGE_SIZE), "limit"), MAX_PAGE_SIZE)
+
+    rows = practice_history.fetch_history_page(
+        username, sort, query.get("order", "desc") != "asc", after,
+        query.get("instrument"), query.get("start"), query.get("end"), limit)
+    return {
+        "sessions": [dict(zip(("id", "date", "instrument", "duration", "notes"), row[:5])) for row in rows],
+        "next": [rows[-1][5], rows[-1][0]] if len(rows) == limit else None,
+    }
+
+
+def add_session(username, query, body):
+    try:
+        return {"id": import_export.insert_session(username, body)}
+    except TypeError as e:
+        raise ApiError(400, str(e)) from None
+
+
+def delete_session(username, query, body, session_id):
+    deleted = practice_history.delete_sessions(username, [_int(session_id, "id")])
+    if not deleted:
+        raise ApiError(404, "no such session")
+    return {"deleted": len(deleted)}
+
+
+def get_dashboard(username, query, body):
+    return asdict(dashboard.DashboardSnapshot.load(username))
+
+
+def get_month(username, query, body, year, month):
+    return {"days": calendar_view.fetch_month_totals(username, int(year), int(month))}
+
+
+def list_goals(username, query, body):
+    return {"goals": [goal._asdict() for goal in goals.fetch_goals(username)]}
+
+
+def add_goal(username, query, body):
+    # goals.add_goal's ValueErrors are answered with 400
+    title = body.get("title") or body.get("goal_title") or ""
+    goal_id = goals.add_goal(username, str(title), str(body.get("description") or ""),
+                             body.get("target_minutes"), str(body.get("due_date") or ""),
+                             str(body.get("start_date") or "") or None)
+    return {"id": goal_id}
+
+
+def complete_goal(username, query, body, goal_id):
+    if not db.query_one("SELECT 1 FROM goals WHERE id = ? AND username = ?", (_int(goal_id, "id"), username)):
+        raise ApiError(404, "no such goal")
+    goals.complete_goal(username, int(goal_id))
+    return {"completed": True}
+
+
+def list_notes(username, query, body):
+    text = query.get("q", "").strip()
+    category = query.get("category")
+    limit = min(_int(query.get("limit", practice_notes.SEARCH_LIMIT), "limit"), MAX_PAGE_SIZE)
+    if text:
+        rows = practice_notes.search_notes(username, text, category, limit)
+    else:
+        rows = practice_notes.fetch_notes(username, category, limit)
+    return {"notes": [dict(zip(("note", "category", "date"), row)) for row in rows]}
+
+
+def add_note(username, query, body):
+    # practice_notes.add_note's ValueErrors are answered with 400
+    note = str(body.get("note") or "")
+    return {"id": practice_notes.add_note(username, note, body.get("category", practice_notes.CATEGORIES[0]))}
+
+
+def get_achievements(username, query, body):
+    return {"achievements": achievements.calculate_achievements(username)}
+
+
+def check_password(username, query, body):
+    return {"match": accounts.check_password(username, str(body.get("password") or ""))}
+
+
+def register(username, query, body):
+    # sqlite3.IntegrityError (answered with 409) when the name is taken
+    password = str(body.get("password") or "")
+    if not password:
+        raise ApiError(400, "missing password")
+    accounts.register_user(username, password, str(body.get("instrument") or ""),
+                           str(body.get("exam_year") or ""))
+    return {"match": True}
+
+
+def remote_call(call):
+    # Handler running one @db.remote() function for the path's user
+    def handler(username, query, body):
+        args, kwargs = body.get("args", []), body.get("kwargs", {})
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            raise ApiError(400, "args must be a list and kwargs an object")
+        return {"result": call.function(username, *args, **kwargs)}
+    return handler
+
+
+# Route: how a request is run.
+#   writes  - runs on the writer under the write lock and invalidates the cache
+#   writer  - runs on the writer under the write lock without changing data
+#             (e.g. rebuilding the achievement streak); cached like a read
+#   quiet   - a write left out of the data version clients see (timer
+#             checkpoints); it still invalidates the cache
+#   user    - the first URL group is a username, and the request must carry
+#             that user's session
+#   login   - checks the user's credentials instead; a {"match": true}
+#             answer opens a session, returned as "session"
+class Route:
+    def __init__(self, method, pattern, handler, writes=False, writer=False, quiet=False,
+                 user=True, login=False):
+        self.method = method
+        self.pattern = re.compile(pattern + "$")
+        self.handler = handler
+        self.writes = writes or quiet
+        self.writer = writer or self.writes
+        self.quiet = quiet
+        self.user = user
+        self.login = login
+
+
+USER = r"/api/users/([^/]+)"
+
+ROUTES = [
+    Route("GET", USER + r"/sessions", list_sessions),
+    Route("POST", USER + r"/sessions", add_session, writes=True),
+    Route("DELETE", USER + r"/sessions/(\d+)", delete_session, writes=True),
+    Route("GET", USER + r"/dashboard", get_dashboard),
+    Route("GET", USER + r"/calendar/(\d{4})-(\d{1,2})", get_month),
+    Route("GET", USER + r"/goals", list_goals),
+    Route("POST", USER + r"/goals", add_goal, writes=True),
+    Route("POST", USER + r"/goals/(\d+)/complete", complete_goal, writes=True),
+    Route("GET", USER + r"/notes", list_notes),
+    Route("POST", USER + r"/notes", add_note, writes=True),
+    Route("GET", USER + r"/achievements", get_achievements, writer=True),
+    Route("POST", USER + r"/login", check_password, login=True),
+    Route("POST", USER + r"/register", register, writes=True, login=True),
+] + [
+    Route("POST", USER + "/calls/" + re.escape(call.name), remote_call(call),
+          writes=call.writes, writer=call.writer, quiet=call.quiet)
+    for call in db.REMOTE_CALLS.values()
+]
+
+
+# ---------- SERVER ----------
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ApiServer:
+    def __init__(self, path=None, token=None):
+        self.path = path or db.DB_PATH
+        self.token = token
+        # Identifies this server run, so client caches keyed on the data
+        # version are dropped when the server restarts
+        self.instance = secrets.token_hex(4)
+        self.generation = 0
+        # Quiet writes (timer checkpoints) still invalidate the cache but are
+        # left out of the version clients see
+        self.quiet_writes = 0
+        self.cache = OrderedDict()  # key -> (generation, payload)
+        self.cache_lock = threading.Lock()
+        self.sessions = OrderedDict()  # session token -> username
+        self.write_lock = None
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self.readers = ThreadPoolExecutor(max_workers=READ_THREADS, thread_name_prefix="api-reader",
+                                          initializer=self._pin_reader)
+        self.server = None
+
+    def _pin_reader(self):
+        db.pin_connection(db.open_reader(self.path))
+
+    # ---------- lifecycle ----------
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"refusing to serve on {host} without a token "
+                             f"(--token or {api_client.ENV_TOKEN})")
+        db.DB_PATH = self.path
+        self.write_lock = asyncio.Lock()
+        await self.run_on_writer(self._open_writer)
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    def _open_writer(self):
+        # Migrates, and lets readers see committed data while a write runs
+        conn = db.get_connection()
+        conn.execute("PRAGMA journal_mode = WAL")
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.writer.shutdown(wait=True)
+        self.readers.shutdown(wait=True)
+
+    async def run_on_writer(self, work, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.writer, work, *args)
+
+    async def run_on_reader(self, work, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, work, *args)
+
+    # ---------- cache ----------
+    def cached(self, key):
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is None or entry[0] != self.generation:
+                return None
+            self.cache.move_to_end(key)
+            return entry[1]
+
+    def store(self, key, generation, payload):
+        # generation is read before the work ran, so a result that raced a
+        # write is stored under the older generation and never served
+        with self.cache_lock:
+            self.cache[key] = (generation, payload)
+            self.cache.move_to_end(key)
+            while len(self.cache) > READ_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def invalidate(self):
+        with self.cache_lock:
+            self.generation += 1
+            self.cache.clear()
+
+    # ---------- writes ----------
+    async def acquire_write_lock(self):
+        try:
+            await asyncio.wait_for(self.write_lock.acquire(), WRITE_LOCK_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ApiError(503, "database is locked") from None
+
+    async def write(self, work, *args, quiet=False):
+        await self.acquire_write_lock()
+        try:
+            return await self.run_on_writer(work, *args)
+        finally:
+            self.invalidate()
+            if quiet:
+                self.quiet_writes += 1
+            self.write_lock.release()
+
+    # ---------- sessions ----------
+    def open_session(self, username):
+        token = secrets.token_urlsafe(24)
+        self.sessions[token] = username
+        while len(self.sessions) > MAX_SESSIONS:
+            self.sessions.popitem(last=False)
+        return token
+
+    def check_session(self, headers, username):
+        token = headers.get(api_client.SESSION_HEADER.lower(), "")
+        if self.sessions.get(token) != username:
+            raise ApiError(401, f"not logged in as {username}")
+
+    # ---------- requests ----------
+    async def dispatch(self, method, target, body, headers=None):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = dict(parse_qsl(url.query))
+
+        if path == "/db/version" and method == "GET":
+            return {"version": [self.instance, self.generation - self.quiet_writes]}
+
+        matches = [(route, route.pattern.match(path)) for route in ROUTES]
+        matches = [(route, found) for route, found in matches if found is not None]
+        if not matches:
+            raise ApiError(404, f"no route for {path}")
+        for route, found in matches:
+            if route.method != method:
+                continue
+            args = [unquote(arg) for arg in found.groups()]
+            if not route.user:
+                args = []
+            work = lambda: route.handler(*args[:1], query, body, *args[1:])
+
+            if route.login:
+                # Never cached: each match opens a new session
+                payload = await (self.write(work) if route.writes else self.run_on_reader(work))
+                if payload.get("match"):
+                    payload["session"] = self.open_session(args[0])
+                return payload
+            if route.user:
+                self.check_session(headers or {}, args[0])
+
+            if route.writes:
+                return await self.write(work, quiet=route.quiet)
+
+            key = (method, target, json.dumps(body, sort_keys=True))
+            generation = self.generation
+            payload = self.cached(key)
+            if payload is None:
+                if route.writer:
+                    # Queued behind pending writes, like one
+                    await self.acquire_write_lock()
+                    try:
+                        payload = await self.run_on_writer(work)
+                    finally:
+                        self.write_lock.release()
+                else:
+                    payload = await self.run_on_reader(work)
+                self.store(key, generation, payload)
+            return payload
+
+        raise ApiError(405, f"{method} not allowed on {path}")
+
+    def authorized(self, headers):
+        if not self.token:
+            return True
+        return secrets.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}")
+
+    async def respond(self, method, target, raw_body, headers=None):
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise ApiError(400, "request body must be a JSON object")
+            return 200, await self.dispatch(method, target, body, headers)
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"invalid JSON: {e}"}
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except sqlite3.IntegrityError as e:
+            return 409, {"error": str(e), "type": type(e).__name__}
+        except sqlite3.Error as e:
+            return 400, {"error": str(e), "type": type(e).__name__}
+        except ValueError as e:
+            return 400, {"error": str(e), "type": "ValueError"}
+        except Exception as e:
+            log.exception("%s %s failed", method, target)
+            return 500, {"error": str(e)}
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                # The body can't be skipped reliably after these, so the
+                # connection is closed
+                if length < 0:
+                    status, payload, keep_alive = 400, {"error": "invalid Content-Length"}, False
+                elif length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = 413, {"error": "request body too large"}, False
+                elif not self.authorized(headers):
+                    status, payload, keep_alive = 401, {"error": "missing or wrong API token"}, False
+                else:
+                    raw_body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.respond(method, target, raw_body, headers)
+
+                data = json.dumps(payload, separators=(",", ":"), default=_json_default).encode("utf-8")
+                writer.write((f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                              f"Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                              f"\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, token=None):
+    server = ApiServer(path, token)
+    bound_host, bound_port = await server.start(host, port)
+    print(f"Serving {server.path} on http://{bound_host}:{bound_port}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the tracker database as a local JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", help=f"database file (default: {db.DB_PATH})")
+    parser.add_argument("--token", default=os.environ.get(api_client.ENV_TOKEN),
+                        help=f"require this bearer token (default: ${api_client.ENV_TOKEN})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.token))
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# app.py
+import time
+STARTED = time.perf_counter()
+
+import logging
+import os
+import tkinter as tk
+import api_client
+import instrumentation
+import views as view_registry
+
+log = logging.getLogger(__name__)
+
+
+# Owns the single Tk root for the whole session and swaps the login and
+# dashboard screens in-process instead of spawning a new interpreter.
+class MusicTrackerApp:
+    def __init__(self):
+        self.root = tk.Tk()
+        self.screen = None
+        self.username = None
+        self.started_logged = False
+
+    def _clear_screen(self):
+        if self.screen is not None:
+            self.screen.destroy()
+            self.screen = None
+
+    def show_login(self):
+        from music_login import MusicLoginApp
+
+        self._clear_screen()
+        self.username = None
+        self.root.attributes('-fullscreen', False)
+        self.screen = MusicLoginApp(self.root, on_login=self.show_dashboard).frame
+
+    def show_dashboard(self, username):
+        from main import create_main_window
+
+        switch_started = time.perf_counter()
+        self._clear_screen()
+        self.username = username
+        self.screen = create_main_window(self.root, username, on_logout=self.show_login)
+        self.root.after_idle(self._log_switch, switch_started)
+
+    def _log_switch(self, switch_started):
+        if not self.started_logged:
+            self.started_logged = True
+            view_registry.log_startup(STARTED)
+        log.info("switch to dashboard: %.1f ms", (time.perf_counter() - switch_started) * 1000)
+
+    def run(self):
+        self.root.mainloop()
+
+
+def run():
+    if os.environ.get("MUSIC_TRACKER_TIMINGS"):
+        logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    if instrumentation.requested():
+        instrumentation.install()
+    if os.environ.get(api_client.ENV_URL):
+        api_client.install(os.environ[api_client.ENV_URL], os.environ.get(api_client.ENV_TOKEN))
+
+    app = MusicTrackerApp()
+    app.show_login()
+    app.run()
+
+
+if __name__ == "__main__":
+    run()
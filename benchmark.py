@@ -0,0 +1,278 @@
+# benchmark.py
+# Headless benchmarks for the data layer behind each view. Synthetic
+# databases are generated from a seed, so the same options always produce
+# the same data, and every case is timed at each size.
+#
+#   python benchmark.py                          # print results
+#   python benchmark.py --output results.json    # also save them
+#   python benchmark.py --baseline results.json  # exit 1 on a regression
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import db
+import import_export
+
+DEFAULT_SIZES = (1000, 10000, 50000)  # sessions per user
+DEFAULT_USERS = 3
+DEFAULT_INSTRUMENTS = 5
+DEFAULT_NOTE_WORDS = 12
+DEFAULT_REPEAT = 20
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.5
+
+SEED = 2025
+END_DATE = date(2025, 7, 6)
+SPAN_DAYS = 3 * 365
+BENCH_USER = "user0"
+
+INSTRUMENT_NAMES = ["Piano", "Guitar", "Violin", "Drums", "Flute", "Cello",
+                    "Saxophone", "Trumpet", "Bass", "Voice", "Clarinet", "Harp"]
+FOCUS_AREAS = ["Scales", "Technique", "Repertoire", "Sight-reading", "Ear training"]
+NOTE_WORDS = ("scales arpeggios tempo metronome legato staccato chords rhythm "
+              "dynamics phrasing sight reading etude sonata bowing fingering "
+              "intonation groove improvisation posture breathing").split()
+
+
+# ---------- SYNTHETIC DATA ----------
+def _note(rng, words):
+    return " ".join(rng.choice(NOTE_WORDS) for _ in range(words)).capitalize()
+
+
+def generate_sessions(rng, sessions, instruments, note_words):
+    # Yields import_export.FIELDS tuples spread over SPAN_DAYS up to END_DATE
+    for _ in range(sessions):
+        day = END_DATE - timedelta(days=rng.randrange(SPAN_DAYS))
+        start = rng.randrange(6 * 60, 22 * 60)
+        duration = rng.randint(5, 120)
+        start_time = f"{day.isoformat()}T{start // 60:02d}:{start % 60:02d}:00"
+        end_time = f"{day.isoformat()}T{(start + duration) // 60 % 24:02d}:{(start + duration) % 60:02d}:00"
+        yield (day.isoformat(), rng.choice(instruments), duration, _note(rng, note_words),
+               start_time, end_time, rng.choice(FOCUS_AREAS))
+
+
+def generate_database(path, users=DEFAULT_USERS, sessions=DEFAULT_SIZES[0],
+                      instruments=DEFAULT_INSTRUMENTS, note_words=DEFAULT_NOTE_WORDS, seed=SEED):
+    # Builds a fresh, fully migrated database at path and leaves db pointed at it
+    if os.path.exists(path):
+        os.remove(path)
+    db.close_all()
+    db.DB_PATH = path
+
+    rng = random.Random(seed)
+    names = INSTRUMENT_NAMES[:instruments]
+    for n in range(users):
+        username = f"user{n}"
+        db.execute("INSERT INTO users (username, password, instrument) VALUES (?, ?, ?)",
+                   (username, "benchmark", names[0]))
+
+        rows = generate_sessions(rng, sessions, names, note_words)
+        while True:
+            batch = list(itertools.islice(rows, import_export.BATCH_SIZE))
+            if not batch:
+                break
+            import_export.insert_batch(username, batch)
+
+        due_dates = [END_DATE + timedelta(days=rng.randint(-180, 180)) for _ in range(20)]
+        db.executemany("""
+            INSERT INTO goals (username, goal_title, description, target_minutes, start_date, due_date, completed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(username, f"Goal {g}", _note(rng, note_words), rng.randint(60, 3000),
+               (due - timedelta(days=rng.randint(7, 120))).isoformat(), due.isoformat(), rng.random() < 0.3)
+              for g, due in enumerate(due_dates)])
+        db.executemany("""
+            INSERT INTO practice_notes (username, note, category, date) VALUES (?, ?, ?, ?)
+        """, [(username, _note(rng, note_words * 2), rng.choice(FOCUS_AREAS),
+               (END_DATE - timedelta(days=rng.randrange(SPAN_DAYS))).isoformat())
+              for _ in range(max(10, sessions // 20))])
+    db.execute("ANALYZE")
+
+
+# ---------- CASES ----------
+def benchmark_cases(username=BENCH_USER):
+    # name -> (setup, run). setup() runs untimed before every run() so cases
+    # that depend on state (such as a dirty achievement streak) start equal.
+    # The view modules are imported here so generating data needs no Tk.
+    import achievements
+    import analysis
+    import calendar_view
+    import dashboard
+    import goals
+    import practice_history
+    import practice_notes
+    import timeseries
+
+    today = END_DATE
+    month_start = today.replace(day=1)
+    year_ago = today - timedelta(days=365)
+    deep_page = {}
+
+    def find_deep_page():
+        # Keyset position roughly half-way through the history
+        if "after" not in deep_page:
+            count = db.query_value("SELECT COUNT(*) FROM practice_sessions WHERE username = ?", (username,))
+            row = db.query_one("""
+                SELECT date, id FROM practice_sessions WHERE username = ?
+                ORDER BY date DESC, id DESC LIMIT 1 OFFSET ?
+            """, (username, count // 2))
+            deep_page["after"] = tuple(row) if row else None
+
+    def mark_streak_dirty():
+        db.execute("UPDATE achievement_state SET dirty = 1 WHERE username = ?", (username,))
+
+    def nothing():
+        pass
+
+    return {
+        "dashboard.snapshot": (nothing, lambda: dashboard.DashboardSnapshot.load(username, today)),
+        "analysis.weekday_matrix": (nothing, lambda: analysis.fetch_weekday_matrix(username)),
+        "analysis.weekday_matrix_year": (nothing, lambda: analysis.fetch_weekday_matrix(
+            username, year_ago.isoformat(), today.isoformat())),
+        "analysis.trend_series": (nothing, lambda: timeseries.fetch_series(
+            username, *timeseries.date_bounds(username), max_points=400)),
+        "calendar.month_totals": (nothing, lambda: calendar_view.fetch_month_totals(
+            username, today.year, today.month)),
+        "calendar.day_sessions": (nothing, lambda: calendar_view.fetch_day_sessions(
+            username, month_start.isoformat())),
+        "achievements.calculate": (nothing, lambda: achievements.calculate_achievements(username)),
+        "achievements.calculate_dirty": (mark_streak_dirty, lambda: achievements.calculate_achievements(username)),
+        "history.first_page": (nothing, lambda: practice_history.fetch_history_page(username)),
+        "history.middle_page": (find_deep_page, lambda: practice_history.fetch_history_page(
+            username, after=deep_page["after"])),
+        "history.sort_by_notes": (nothing, lambda: practice_history.fetch_history_page(
+            username, sort_column="Practice", descending=False)),
+        "notes.search": (nothing, lambda: practice_notes.search_notes(username, "legato tempo")),
+        "goals.list": (nothing, lambda: goals.fetch_goals(username)),
+        "goals.recalculate": (nothing, goals.recalculate_progress),
+    }
+
+
+def time_case(setup, run, repeat):
+    # Median and best of `repeat` timed runs after one untimed warm-up, in ms
+    setup()
+    run()
+    timings = []
+    for _ in range(repeat):
+        setup()
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 4),
+            "min_ms": round(min(timings), 4),
+            "runs": repeat}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, users=DEFAULT_USERS, instruments=DEFAULT_INSTRUMENTS,
+                   note_words=DEFAULT_NOTE_WORDS, repeat=DEFAULT_REPEAT, seed=SEED,
+                   only=None, work_dir=None, log=print):
+    # Returns {"meta": ..., "results": {size: {case: timings}}}
+    results = {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        for size in sizes:
+            path = os.path.join(temp_dir, f"bench_{size}.db")
+            started = time.perf_counter()
+            generate_database(path, users, size, instruments, note_words, seed)
+            log(f"{size} sessions/user: generated in {time.perf_counter() - started:.1f}s")
+
+            cases = benchmark_cases()
+            results[str(size)] = {}
+            for name, (setup, run) in cases.items():
+                if only and not any(name.startswith(prefix) for prefix in only):
+                    continue
+                timing = time_case(setup, run, repeat)
+                results[str(size)][name] = timing
+                log(f"  {name:<32} {timing['median_ms']:>10.3f} ms  (min {timing['min_ms']:.3f})")
+            db.close_all()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "users": users,
+            "instruments": instruments,
+            "note_words": note_words,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# ---------- BASELINE ----------
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # Returns [(size, case, baseline ms, current ms)] for every median that
+    # grew by more than threshold (a fraction) and by more than the noise floor
+    regressions = []
+    for size, cases in current["results"].items():
+        for name, timing in cases.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            old, new = before["median_ms"], timing["median_ms"]
+            if new > old * (1 + threshold) and new - old > NOISE_FLOOR_MS:
+                regressions.append((size, name, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data layer on synthetic databases.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated sessions per user (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--instruments", type=int, default=DEFAULT_INSTRUMENTS,
+                        choices=range(1, len(INSTRUMENT_NAMES) + 1), metavar=f"1-{len(INSTRUMENT_NAMES)}")
+    parser.add_argument("--note-words", type=int, default=DEFAULT_NOTE_WORDS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--only", action="append", help="run only cases starting with this prefix")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error("--sizes must be a comma-separated list of integers")
+
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            parser.exit(2, f"error: cannot read baseline: {e}\n")
+
+    current = run_benchmarks(sizes, args.users, args.instruments, args.note_words,
+                             args.repeat, args.seed, args.only)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        for size, name, old, new in regressions:
+            print(f"REGRESSION {size} sessions/user {name}: {old:.3f} ms -> {new:.3f} ms "
+                  f"(+{(new / old - 1) * 100:.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,78 @@
 import tkinter as tk
 from tkinter import messagebox
-import sqlite3
+import db
 import calendar
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from functools import partial
-
-def fetch_practice_data(username):
-    conn = sqlite3.connect("music_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT date, instrument, duration, notes FROM practice_sessions WHERE username=?", (username,))
-    rows = cursor.fetchall()
-    conn.close()
-
-    data = {}
-    for date, instrument, duration, notes in rows:
-        if date not in data:
-            data[date] = []
-        data[date].append({
-            "instrument": instrument,
-            "duration": duration,
-            "notes": notes
-        })
-    return data
+
+MONTH_CACHE_SIZE = 6
+
+# (username, year, month) -> (data version, {date: total minutes})
+_month_cache = OrderedDict()
+_month_cache_lock = threading.Lock()
+
+def month_grid_range(year, month):
+    # First and last date shown on the grid, including the spill-over days
+    weeks = calendar.Calendar().monthdatescalendar(year, month)
+    return weeks[0][0], weeks[-1][-1]
+
+@db.remote()
+def fetch_month_totals(username, year, month):
+    # {date: total minutes} for the visible grid only, read from the daily rollup
+    start, end = month_grid_range(year, month)
+    rows = db.query("""
+        SELECT day, SUM(minutes) FROM daily_rollup
+        WHERE username=? AND day BETWEEN ? AND ?
+        GROUP BY day
+    """, (username, start.isoformat(), end.isoformat()))
+    return dict(rows)
+
+def get_month_totals(username, year, month):
+    key = (username, year, month)
+    version = db.data_version()
+    with _month_cache_lock:
+        cached = _month_cache.get(key)
+        if cached and cached[0] == version:
+            _month_cache.move_to_end(key)
+            return cached[1]
+
+    totals = fetch_month_totals(username, year, month)
+    with _month_cache_lock:
+        _month_cache[key] = (version, totals)
+        _month_cache.move_to_end(key)
+        while len(_month_cache) > MONTH_CACHE_SIZE:
+            _month_cache.popitem(last=False)
+    return totals
+
+def adjacent_months(year, month):
+    prev_month = (year - 1, 12) if month == 1 else (year, month - 1)
+    next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return prev_month, next_month
+
+def prefetch_adjacent_months(username, year, month):
+    def work():
+        for y, m in adjacent_months(year, month):
+            get_month_totals(username, y, m)
+
+    threading.Thread(target=work, daemon=True).start()
+
+@db.remote()
+def fetch_day_sessions(username, date_str):
+    rows = db.query("SELECT instrument, duration, notes FROM practice_sessions WHERE username=? AND date=? ORDER BY id",
+                    (username, date_str))
+    return [{"instrument": instrument, "duration": duration, "notes": notes}
+            for instrument, duration, notes in rows]
+
+# ---------- Grid Geometry ----------
+CELL_WIDTH = 120
+CELL_HEIGHT = 80
+CELL_GAP = 6
+TITLE_HEIGHT = 70
+HEADER_HEIGHT = 38
+GRID_TOP = TITLE_HEIGHT + HEADER_HEIGHT + CELL_GAP
+GRID_ROWS = 6
+CANVAS_WIDTH = 7 * (CELL_WIDTH + CELL_GAP)
 
 def create_calendar_frame(parent, username):
     for widget in parent.winfo_children():
@@ -35,28 +86,24 @@ def create_calendar_frame(parent, username):
     year_var = tk.IntVar(value=current_date.year)
 
     def draw_calendar():
-        for widget in calendar_frame.winfo_children():
-            widget.destroy()
-
-        practice_data = fetch_practice_data(username)
         year = year_var.get()
         month = month_var.get()
-        cal = calendar.Calendar()
+        practice_data = get_month_totals(username, year, month)
+        shown_totals[0] = practice_data
+        dates = list(calendar.Calendar().itermonthdates(year, month))
+        today = datetime.today().date()
 
-        # Month Title
-        tk.Label(calendar_frame, text=f"{calendar.month_name[month]} {year}",
-                 font=("Helvetica", 20, "bold"), bg="#FAFAFC", fg="#2B2B2B").grid(row=0, column=0, columnspan=7, pady=20)
+        canvas.itemconfigure(title_item, text=f"{calendar.month_name[month]} {year}")
 
-        # Day Headers
-        days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-        for i, day in enumerate(days):
-            tk.Label(calendar_frame, text=day, font=("Helvetica", 11, "bold"),
-                     bg="#3E8EDE", fg="#FFFFFF", width=14, pady=10).grid(row=1, column=i)
+        for index, (rect, date_text, today_text, total_text) in enumerate(cells):
+            if index >= len(dates):
+                cell_dates[index] = None
+                for item in (rect, date_text, today_text, total_text):
+                    canvas.itemconfigure(item, state="hidden")
+                continue
 
-        row = 2
-        for date in cal.itermonthdates(year, month):
+            date = dates[index]
             date_str = date.strftime("%Y-%m-%d")
-            is_today = date == datetime.today().date()
             is_current_month = date.month == month
 
             bg_color = "#FFFFFF"
@@ -65,38 +112,36 @@ def create_calendar_frame(parent, username):
             elif not is_current_month:
                 bg_color = "#EEEEEE"
 
-            box = tk.Frame(calendar_frame, bg=bg_color, relief="raised", bd=1, width=120, height=80)
-            box.grid_propagate(False)
-            box.grid(row=row, column=date.weekday(), padx=3, pady=3)
-
-            # Date Number
-            date_label = tk.Label(box, text=str(date.day),
-                                  font=("Helvetica", 10, "bold"),
-                                  bg=bg_color, fg="#2B2B2B")
-            date_label.pack(anchor="nw", padx=5, pady=2)
-
-            if is_today and is_current_month:
-                today_mark = tk.Label(box, text="Today", font=("Helvetica", 8), bg=bg_color, fg="#3E8EDE")
-                today_mark.pack(anchor="ne", padx=5)
-
+            canvas.itemconfigure(rect, fill=bg_color, state="normal")
+            canvas.itemconfigure(date_text, text=str(date.day), state="normal")
+            canvas.itemconfigure(today_text,
+                                 state="normal" if date == today and is_current_month else "hidden")
             # Show total practice
-            if date_str in practice_data:
-                total = sum(s["duration"] for s in practice_data[date_str])
-                detail_label = tk.Label(box, text=f"{total} min", font=("Helvetica", 9),
-                                        bg=bg_color, fg="#2B2B2B")
-                detail_label.pack(anchor="center")
-
-                box.bind("<Button-1>", partial(show_details_popup, date_str, practice_data[date_str]))
-
-            if date.weekday() == 6:
-                row += 1
-
-        # Legend
-        legend_frame = tk.Frame(calendar_frame, bg="#FAFAFC")
-        legend_frame.grid(row=row+1, column=0, columnspan=7, pady=10)
-        create_legend(legend_frame)
-
-    def show_details_popup(date_str, sessions, event=None):
+            canvas.itemconfigure(total_text, state="normal",
+                                 text=f"{practice_data[date_str]} min" if date_str in practice_data else "")
+            cell_dates[index] = date_str
+
+        prefetch_adjacent_months(username, year, month)
+
+    def cell_at(x, y):
+        col, col_offset = divmod(x - CELL_GAP / 2, CELL_WIDTH + CELL_GAP)
+        row, row_offset = divmod(y - GRID_TOP, CELL_HEIGHT + CELL_GAP)
+        if not (0 <= col < 7 and 0 <= row < GRID_ROWS):
+            return None
+        if col_offset > CELL_WIDTH or row_offset > CELL_HEIGHT:  # click landed in a gap
+            return None
+        return int(row) * 7 + int(col)
+
+    def on_canvas_click(event):
+        index = cell_at(event.x, event.y)
+        if index is None:
+            return
+        date_str = cell_dates[index]
+        if date_str and date_str in shown_totals[0]:
+            show_details_popup(date_str)
+
+    def show_details_popup(date_str, event=None):
+        sessions = fetch_day_sessions(username, date_str)
         info = f"🎯 Practice Details for {date_str}\n"
         for s in sessions:
             info += f"\n🎵 Instrument: {s['instrument']}\n⏱ Duration: {s['duration']} min\n📝 Notes: {s['notes']}\n"
@@ -142,11 +187,52 @@ def create_calendar_frame(parent, username):
     tk.Button(nav_frame, text="Next →", command=next_month,
               bg="#5F5FFF", fg="white", font=("Helvetica", 10, "bold"), width=12).pack(side="left", padx=15)
 
-    calendar_frame = tk.Frame(frame, bg="#FAFAFC")
-    calendar_frame.pack()
+    # ---------- Month Grid (one canvas, items reused across months) ----------
+    canvas = tk.Canvas(frame, width=CANVAS_WIDTH, height=GRID_TOP + GRID_ROWS * (CELL_HEIGHT + CELL_GAP),
+                       bg="#FAFAFC", highlightthickness=0)
+    canvas.pack()
+
+    title_item = canvas.create_text(CANVAS_WIDTH / 2, TITLE_HEIGHT / 2, text="",
+                                    font=("Helvetica", 20, "bold"), fill="#2B2B2B")
+
+    # Day Headers
+    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    for i, day in enumerate(days):
+        x0 = CELL_GAP / 2 + i * (CELL_WIDTH + CELL_GAP)
+        canvas.create_rectangle(x0, TITLE_HEIGHT, x0 + CELL_WIDTH, TITLE_HEIGHT + HEADER_HEIGHT,
+                                fill="#3E8EDE", outline="")
+        canvas.create_text(x0 + CELL_WIDTH / 2, TITLE_HEIGHT + HEADER_HEIGHT / 2, text=day,
+                           font=("Helvetica", 11, "bold"), fill="#FFFFFF")
+
+    # (rect, date number, "Today" mark, total minutes) per cell
+    cells = []
+    for row in range(GRID_ROWS):
+        for col in range(7):
+            x0 = CELL_GAP / 2 + col * (CELL_WIDTH + CELL_GAP)
+            y0 = GRID_TOP + row * (CELL_HEIGHT + CELL_GAP)
+            cells.append((
+                canvas.create_rectangle(x0, y0, x0 + CELL_WIDTH, y0 + CELL_HEIGHT,
+                                        fill="#FFFFFF", outline="#BBBBBB"),
+                canvas.create_text(x0 + 7, y0 + 4, anchor="nw", text="",
+                                   font=("Helvetica", 10, "bold"), fill="#2B2B2B"),
+                canvas.create_text(x0 + CELL_WIDTH - 7, y0 + 22, anchor="ne", text="Today",
+                                   font=("Helvetica", 8), fill="#3E8EDE", state="hidden"),
+                canvas.create_text(x0 + CELL_WIDTH / 2, y0 + CELL_HEIGHT / 2 + 6, text="",
+                                   font=("Helvetica", 9), fill="#2B2B2B"),
+            ))
+    cell_dates = [None] * len(cells)
+    shown_totals = [{}]
+    canvas.bind("<Button-1>", on_canvas_click)
+
+    # Legend
+    legend_frame = tk.Frame(frame, bg="#FAFAFC")
+    legend_frame.pack(pady=10)
+    create_legend(legend_frame)
 
     draw_calendar()
 
+    frame.refresh = draw_calendar
+
     return frame
 
 
@@ -0,0 +1,109 @@
+# chart_cache.py
+# On-disk cache of rendered chart PNGs. Entries are keyed by database,
+# user, chart, date range, size and the user's data_versions stamp, so a
+# changed stamp simply stops matching old files; those age out through LRU
+# eviction by total size (file mtime is bumped on every hit).
+import base64
+import hashlib
+import logging
+import os
+import threading
+
+import db
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = "chart_cache"
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+# Bump when chart styling changes so old renders are not reused
+RENDER_VERSION = 1
+
+# An empty file records "nothing to draw" (e.g. a pie with no data)
+NO_CHART = None
+
+_lock = threading.Lock()
+
+
+@db.remote()
+def data_stamp(username):
+    # Read before querying the chart data: a write landing in between then
+    # caches newer data under the older stamp, never the reverse.
+    return db.query_value("SELECT version FROM data_versions WHERE username = ?", (username,), default=0)
+
+
+def chart_key(username, chart, start, end, size, stamp):
+    raw = repr((RENDER_VERSION, os.path.abspath(db.DB_PATH), username, chart, start, end, size, stamp))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key + ".png")
+
+
+def get(key):
+    # Returns (hit, png) with png base64-encoded for tk.PhotoImage(data=...)
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except OSError:
+        return False, None
+    return True, (base64.b64encode(data) if data else NO_CHART)
+
+
+def put(key, png):
+    # png is base64 text as returned by tasks.render_png, or NO_CHART
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    temp = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp, "wb") as f:
+        if png is not NO_CHART:
+            f.write(base64.b64decode(png))
+    os.replace(temp, path)
+    evict()
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    with _lock:
+        try:
+            entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(".png")]
+        except OSError:
+            return
+        stats = []
+        for entry in entries:
+            try:
+                stats.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            except OSError:
+                pass
+
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def store(key, png):
+    # A cache that can't be written is only a missed optimisation
+    try:
+        put(key, png)
+    except OSError as e:
+        log.warning("chart cache write failed: %s", e)
+
+
+def cached_chart(username, chart, start, end, size, render, stamp=None):
+    # Returns the cached PNG for this chart, or calls render() and caches
+    # what it returns.
+    if stamp is None:
+        stamp = data_stamp(username)
+    key = chart_key(username, chart, start, end, size, stamp)
+    hit, png = get(key)
+    if not hit:
+        png = render()
+        store(key, png)
+    return png
@@ -1,42 +1,86 @@
 import tkinter as tk
 from tkinter import messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import sqlite3
+from matplotlib.figure import Figure
+import db
+import chart_cache
+import import_export
+from tasks import TaskRunner, render_png
 from datetime import datetime, timedelta
+from dataclasses import dataclass, field
 
 # ---------- DATABASE FUNCTION ----------
-def get_dashboard_data(username):
-    conn = sqlite3.connect("music_tracker.db")
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT SUM(duration) FROM practice_sessions WHERE username=?", (username,))
-    total_minutes = cursor.fetchone()[0] or 0
-
-    today = datetime.today()
-    week_start = today - timedelta(days=today.weekday())
-    cursor.execute("SELECT COUNT(*) FROM practice_sessions WHERE username=? AND date>=?",
-                   (username, week_start.strftime('%Y-%m-%d')))
-    weekly_sessions = cursor.fetchone()[0]
-
-    cursor.execute("SELECT DISTINCT instrument FROM practice_sessions WHERE username=?", (username,))
-    instruments = [row[0] for row in cursor.fetchall()]
-
-    cursor.execute("SELECT goal_title, due_date FROM goals WHERE username=? AND completed=0 ORDER BY due_date ASC LIMIT 3", (username,))
-    upcoming_goals = cursor.fetchall()
-
-    cursor.execute("SELECT COUNT(*) FROM goals WHERE username=? AND completed=1", (username,))
-    total_achievements = cursor.fetchone()[0]
-
-    conn.close()
-
-    return {
-        "total_minutes": total_minutes,
-        "weekly_sessions": weekly_sessions,
-        "instruments": instruments,
-        "upcoming_goals": upcoming_goals,
-        "total_achievements": total_achievements
-    }
+# Every figure on the dashboard comes from this one statement; each arm of
+# the UNION is tagged with the field it fills.
+SNAPSHOT_QUERY = """
+    WITH user_days AS (
+        SELECT day, instrument, minutes, sessions FROM daily_rollup WHERE username = :username
+    )
+    SELECT 'total', NULL, COALESCE(SUM(minutes), 0), NULL, NULL FROM user_days
+    UNION ALL
+    SELECT 'weekly', NULL, COALESCE(SUM(sessions), 0), NULL, NULL FROM user_days WHERE day >= :week_start
+    UNION ALL
+    SELECT 'instrument', instrument, NULL, NULL, NULL FROM (SELECT DISTINCT instrument FROM user_days)
+    UNION ALL
+    SELECT 'goal', goal_title, due_date, progress_minutes, target_minutes FROM (
+        SELECT goal_title, due_date, progress_minutes, target_minutes FROM goals
+        WHERE username = :username AND completed = 0
+        ORDER BY due_date ASC LIMIT 3
+    )
+    UNION ALL
+    SELECT 'achievements', NULL, COUNT(*), NULL, NULL FROM goals WHERE username = :username AND completed = 1
+    UNION ALL
+    SELECT 'day', day, SUM(minutes), NULL, NULL FROM user_days
+    WHERE day BETWEEN :series_start AND :series_end GROUP BY day
+"""
+
+
+@db.remote()
+def fetch_snapshot_rows(username, week_start, series_start, series_end):
+    return db.query(SNAPSHOT_QUERY, {
+        "username": username,
+        "week_start": week_start,
+        "series_start": series_start,
+        "series_end": series_end,
+    })
+
+
+@dataclass
+class DashboardSnapshot:
+    total_minutes: int = 0
+    weekly_sessions: int = 0
+    instruments: list = field(default_factory=list)
+    upcoming_goals: list = field(default_factory=list)  # [(title, due, progress, target minutes)]
+    total_achievements: int = 0
+    week_series: list = field(default_factory=list)  # [(date, minutes)] for the last 7 days
+
+    @classmethod
+    def load(cls, username, today=None):
+        today = today or datetime.today()
+        week_start = today - timedelta(days=today.weekday())
+        series_dates = [(today - timedelta(days=(6 - i))).strftime('%Y-%m-%d') for i in range(7)]
+
+        rows = fetch_snapshot_rows(username, week_start.strftime('%Y-%m-%d'), series_dates[0], series_dates[-1])
+
+        snapshot = cls()
+        daily_totals = {}
+        for kind, key, value, progress, target in rows:
+            if kind == "total":
+                snapshot.total_minutes = value
+            elif kind == "weekly":
+                snapshot.weekly_sessions = value
+            elif kind == "instrument":
+                snapshot.instruments.append(key)
+            elif kind == "goal":
+                snapshot.upcoming_goals.append((key, value, progress, target))
+            elif kind == "achievements":
+                snapshot.total_achievements = value
+            elif kind == "day":
+                daily_totals[key] = value
+        snapshot.week_series = [(day, daily_totals.get(day, 0)) for day in series_dates]
+        return snapshot
+
+WEEK_CHART_SIZE = (6.5, 3.5)
+CHART_DPI = 100
 
 # ---------- DASHBOARD UI ----------
 def create_dashboard(parent, username="User"):
@@ -52,95 +96,131 @@ def create_dashboard(parent, username="User"):
     for widget in parent.winfo_children():
         widget.destroy()
 
-    data = get_dashboard_data(username)
-    hours = data["total_minutes"] // 60
-    minutes = data["total_minutes"] % 60
+    page = tk.Frame(parent, bg=bg_color)
+    page.pack(fill="both", expand=True)
+    tasks = TaskRunner(page)
 
-    tk.Label(parent, text=f"🎵 Welcome back, {username}!",
+    tk.Label(page, text=f"🎵 Welcome back, {username}!",
              font=("Helvetica", 20, "bold"), bg=bg_color, fg=text_main).pack(pady=20)
 
     # ---------- SUMMARY CARDS ----------
-    summary_frame = tk.Frame(parent, bg=bg_color)
+    # Built with placeholders; the snapshot and chart load in the background
+    summary_frame = tk.Frame(page, bg=bg_color)
     summary_frame.pack(pady=10)
 
-    card_data = [
-        ("Total Practice Time", f"{hours} hrs {minutes} mins"),
-        ("This Week's Sessions", str(data["weekly_sessions"])),
-        ("Instruments Practiced", ", ".join(data["instruments"]) or "None"),
-        ("Total Achievements", str(data["total_achievements"])),
-    ]
+    card_titles = ["Total Practice Time", "This Week's Sessions", "Instruments Practiced", "Total Achievements"]
+    card_values = []
 
-    for title, value in card_data:
+    for title in card_titles:
         card = tk.Frame(summary_frame, bg=card_bg, padx=20, pady=15, bd=1, relief="solid")
         card.pack(side="left", padx=15, pady=5)
 
         tk.Label(card, text=title, font=("Helvetica", 12, "bold"), bg=card_bg, fg=accent_color).pack(anchor="w")
-        tk.Label(card, text=value, font=("Helvetica", 14, "bold"), bg=card_bg, fg=text_main).pack(anchor="w", pady=(5, 0))
+        value_label = tk.Label(card, text="…", font=("Helvetica", 14, "bold"), bg=card_bg, fg=text_main)
+        value_label.pack(anchor="w", pady=(5, 0))
+        card_values.append(value_label)
 
     # ---------- GRAPH ----------
-    graph_frame = tk.Frame(parent, bg=bg_color)
+    graph_frame = tk.Frame(page, bg=bg_color)
     graph_frame.pack(pady=20, fill="x")
 
-    fig = plt.Figure(figsize=(6.5, 3.5), dpi=100)
-    ax = fig.add_subplot(111)
+    chart_label = tk.Label(graph_frame, text="Loading chart…", font=("Helvetica", 11),
+                           bg=bg_color, fg=text_secondary, width=80, height=17)
+    chart_label.pack()
 
-    conn = sqlite3.connect("music_tracker.db")
-    cursor = conn.cursor()
+    def build_week_chart(data):
+        # Runs on a worker thread; the figure is rasterized there as well
+        fig = Figure(figsize=WEEK_CHART_SIZE, dpi=CHART_DPI)
+        ax = fig.add_subplot(111)
 
-    days = []
-    durations = []
-    today = datetime.today()
+        days = [datetime.strptime(day, '%Y-%m-%d').strftime("%a") for day, _ in data.week_series]
+        durations = [total for _, total in data.week_series]
 
-    for i in range(7):
-        day_date = (today - timedelta(days=(6 - i)))
-        day_label = day_date.strftime("%a")
-        days.append(day_label)
+        bars = ax.bar(days, durations, color=accent_color)
+        for i, bar in enumerate(bars):
+            height = bar.get_height()
+            if height > 0:
+                ax.text(bar.get_x() + bar.get_width() / 2, height + 1, f"{int(height)}",
+                        ha='center', va='bottom', color=text_main, fontsize=9)
 
-        cursor.execute("SELECT SUM(duration) FROM practice_sessions WHERE username=? AND date=?",
-                       (username, day_date.strftime('%Y-%m-%d')))
-        duration = cursor.fetchone()[0] or 0
-        durations.append(duration)
+        ax.set_title('Practice Time This Week (in Minutes)', color=text_main, fontsize=12)
+        ax.set_facecolor(card_bg)
+        fig.patch.set_facecolor(bg_color)
+        ax.tick_params(axis='x', colors=text_main)
+        ax.tick_params(axis='y', colors=text_main)
+        ax.set_ylabel("Minutes Practiced", color=text_main)
+        ax.grid(True, color="#CCCCCC", linestyle="--", linewidth=0.5, axis='y')
 
-    conn.close()
+        for spine in ax.spines.values():
+            spine.set_color(text_secondary)
 
-    bars = ax.bar(days, durations, color=accent_color)
-    for i, bar in enumerate(bars):
-        height = bar.get_height()
-        if height > 0:
-            ax.text(bar.get_x() + bar.get_width() / 2, height + 1, f"{int(height)}",
-                    ha='center', va='bottom', color=text_main, fontsize=9)
-
-    ax.set_title('Practice Time This Week (in Minutes)', color=text_main, fontsize=12)
-    ax.set_facecolor(card_bg)
-    fig.patch.set_facecolor(bg_color)
-    ax.tick_params(axis='x', colors=text_main)
-    ax.tick_params(axis='y', colors=text_main)
-    ax.set_ylabel("Minutes Practiced", color=text_main)
-    ax.grid(True, color="#CCCCCC", linestyle="--", linewidth=0.5, axis='y')
-
-    for spine in ax.spines.values():
-        spine.set_color(text_secondary)
-
-    chart = FigureCanvasTkAgg(fig, master=graph_frame)
-    chart.get_tk_widget().pack()
+        return render_png(fig, "dashboard week chart")
 
     # ---------- UPCOMING GOALS ----------
-    goals_frame = tk.LabelFrame(parent, text="🎯 Upcoming Goals", bg=card_bg, fg="#05113D",
+    goals_frame = tk.LabelFrame(page, text="🎯 Upcoming Goals", bg=card_bg, fg="#05113D",
                                 font=("Helvetica", 12, "bold"), padx=15, pady=10, bd=1, relief="solid")
     goals_frame.pack(pady=10, fill="x", padx=40)
 
-    if data["upcoming_goals"]:
-        for title, due in data["upcoming_goals"]:
-            tk.Label(goals_frame,
-                     text=f"• {title} (Due: {due})",
-                     bg=card_bg,
-                     fg="#0D0808",
-                     font=("Helvetica", 12)
-                     ).pack(anchor="w", pady=2)
-    else:
-        tk.Label(goals_frame, text="No upcoming goals.",
-                 bg=card_bg, fg=text_secondary,
-                 font=("Helvetica", 10)).pack(anchor="w")
+    tk.Label(goals_frame, text="Loading…", bg=card_bg, fg=text_secondary,
+             font=("Helvetica", 10)).pack(anchor="w")
+
+    # ---------- BACKGROUND LOAD ----------
+    interrupted = {"snapshot": False}
+
+    def load_snapshot():
+        stamp = chart_cache.data_stamp(username)
+        data = DashboardSnapshot.load(username)
+        chart_png = chart_cache.cached_chart(
+            username, "week", data.week_series[0][0], data.week_series[-1][0], (WEEK_CHART_SIZE, CHART_DPI),
+            lambda: build_week_chart(data), stamp)
+        return data, chart_png
+
+    def show_snapshot(result):
+        data, chart_png = result
+        hours = data.total_minutes // 60
+        minutes = data.total_minutes % 60
+        values = [
+            f"{hours} hrs {minutes} mins",
+            str(data.weekly_sessions),
+            ", ".join(data.instruments) or "None",
+            str(data.total_achievements),
+        ]
+        for label, value in zip(card_values, values):
+            label.config(text=value)
+
+        chart_image = tk.PhotoImage(master=chart_label, data=chart_png)
+        chart_label.config(image=chart_image, text="", width=0, height=0)
+        chart_label.image = chart_image  # keep a reference for Tk
+
+        for widget in goals_frame.winfo_children():
+            widget.destroy()
+        if data.upcoming_goals:
+            for title, due, progress, target in data.upcoming_goals:
+                tk.Label(goals_frame,
+                         text=f"• {title} (Due: {due} — {progress}/{target} min)",
+                         bg=card_bg,
+                         fg="#0D0808",
+                         font=("Helvetica", 12)
+                         ).pack(anchor="w", pady=2)
+        else:
+            tk.Label(goals_frame, text="No upcoming goals.",
+                     bg=card_bg, fg=text_secondary,
+                     font=("Helvetica", 10)).pack(anchor="w")
+
+    def load():
+        tasks.submit(load_snapshot, show_snapshot, key="snapshot")
+
+    def on_hide():
+        if tasks.cancel():
+            interrupted["snapshot"] = True
+
+    def on_show():
+        # A load cancelled by navigating away is restarted on return
+        if interrupted["snapshot"]:
+            interrupted["snapshot"] = False
+            load()
+
+    load()
 
     # ---------- PRACTICE SESSION FORM ----------
     def start_session():
@@ -173,40 +253,34 @@ def create_dashboard(parent, username="User"):
                 messagebox.showerror("Invalid Input", "Please enter a valid instrument and duration.")
                 return
 
-            conn = sqlite3.connect("music_tracker.db")
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS practice_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT,
-                    date TEXT,
-                    instrument TEXT,
-                    duration INTEGER,
-                    notes TEXT
-                )
-            """)
-
-            cursor.execute(
-                "INSERT INTO practice_sessions (username, date, instrument, duration, notes) VALUES (?, ?, ?, ?, ?)",
-                (username, datetime.today().strftime('%Y-%m-%d'), instrument, int(duration), notes)
-            )
-            conn.commit()
-            conn.close()
+            try:
+                import_export.insert_session(username, {
+                    "date": datetime.today().strftime('%Y-%m-%d'),
+                    "instrument": instrument, "duration": int(duration), "notes": notes,
+                })
+            except ValueError as e:
+                messagebox.showerror("Invalid Input", str(e))
+                return
 
             messagebox.showinfo("Saved", "Practice session saved successfully!")
             session_win.destroy()
-            create_dashboard(parent, username)
+            load()
 
         tk.Button(session_win, text="Save Session", command=save_session,
                   bg=accent_color, fg="white", font=("Helvetica", 12, "bold"),
                   padx=10, pady=5, bd=0, cursor="hand2").pack(pady=20)
 
     # ---------- START PRACTICE BUTTON ----------
-    tk.Button(parent, text="🎵 Start New Practice Session", font=("Helvetica", 12, "bold"),
+    tk.Button(page, text="🎵 Start New Practice Session", font=("Helvetica", 12, "bold"),
               bg=accent_alt, fg="white", padx=20, pady=10, bd=0, cursor="hand2",
               command=start_session).pack(pady=30)
 
+    page.refresh = load
+    page.on_hide = on_hide
+    page.on_show = on_show
+
+    return page
+
 
 
 
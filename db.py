@@ -0,0 +1,200 @@
+# db.py
+import atexit
+import functools
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import migrations
+
+DB_PATH = "music_tracker.db"
+
+# Size of each connection's prepared-statement cache
+STATEMENT_CACHE_SIZE = 256
+
+# sqlite3.Connection subclass used for new connections (see instrumentation.py)
+CONNECTION_FACTORY = sqlite3.Connection
+
+# ---------- CONNECTION POOL ----------
+# One long-lived connection per database file, shared by every view.
+_connections = {}
+_locks = {}
+_quiet_changes = {}  # connection -> rows changed through execute_quiet()
+_pool_lock = threading.Lock()
+
+# A thread may pin its own connection for the default database; the API
+# server's reader threads run the data functions that way.
+_pinned = threading.local()
+
+
+def _open(path):
+    conn = sqlite3.connect(path, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=CONNECTION_FACTORY)
+    migrations.migrate(conn)
+    return conn
+
+
+def open_reader(path=None):
+    # Separate read-only connection to an already migrated database
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=CONNECTION_FACTORY)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def pin_connection(conn):
+    # Helpers called on this thread without a path use conn from now on
+    _pinned.conn = conn
+    _pinned.lock = threading.RLock()
+
+
+def get_connection(path=None):
+    if path is None and getattr(_pinned, "conn", None) is not None:
+        return _pinned.conn
+    path = path or DB_PATH
+    conn = _connections.get(path)
+    if conn is None:
+        with _pool_lock:
+            conn = _connections.get(path)
+            if conn is None:
+                conn = _open(path)
+                _locks[path] = threading.RLock()
+                _connections[path] = conn
+    return conn
+
+
+def get_lock(path=None):
+    if path is None and getattr(_pinned, "conn", None) is not None:
+        return _pinned.lock
+    path = path or DB_PATH
+    get_connection(path)
+    return _locks[path]
+
+
+def close_all():
+    with _pool_lock:
+        for path, conn in list(_connections.items()):
+            with _locks[path]:
+                conn.close()
+        _connections.clear()
+        _locks.clear()
+        _quiet_changes.clear()
+
+
+atexit.register(close_all)
+
+
+# ---------- QUERY HELPERS ----------
+# These run SQL on a local connection; in client mode api_client.install()
+# disables them, and data is reached through remote() functions instead.
+def query(sql, params=(), path=None):
+    conn = get_connection(path)
+    with get_lock(path):
+        return conn.execute(sql, params).fetchall()
+
+
+def query_one(sql, params=(), path=None):
+    conn = get_connection(path)
+    with get_lock(path):
+        return conn.execute(sql, params).fetchone()
+
+
+def query_value(sql, params=(), path=None, default=None):
+    row = query_one(sql, params, path)
+    if row is None or row[0] is None:
+        return default
+    return row[0]
+
+
+def iterate(sql, params=(), path=None, chunk_size=1000):
+    # Streams rows in chunks instead of materializing the whole result; the
+    # lock is only held while each chunk is fetched.
+    conn = get_connection(path)
+    with get_lock(path):
+        cursor = conn.execute(sql, params)
+    try:
+        while True:
+            with get_lock(path):
+                rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def data_version(path=None):
+    # Changes whenever this process or another connection commits a write;
+    # used to validate in-memory caches and by ViewManager to decide which
+    # views to refresh. Writes made through execute_quiet() don't count.
+    conn = get_connection(path)
+    with get_lock(path):
+        external = conn.execute("PRAGMA data_version").fetchone()[0]
+        return external, conn.total_changes - _quiet_changes.get(conn, 0)
+
+
+def execute(sql, params=(), path=None):
+    with transaction(path) as cursor:
+        cursor.execute(sql, params)
+        return cursor.lastrowid
+
+
+def execute_quiet(sql, params=(), path=None):
+    # execute() for bookkeeping rows no view displays, such as the running
+    # timer's checkpoints: data_version() stays the same, so cached views
+    # and month totals aren't reloaded every checkpoint
+    conn = get_connection(path)
+    with get_lock(path):
+        before = conn.total_changes
+        try:
+            return execute(sql, params, path)
+        finally:
+            _quiet_changes[conn] = _quiet_changes.get(conn, 0) + conn.total_changes - before
+
+
+def executemany(sql, seq_of_params, path=None):
+    with transaction(path) as cursor:
+        cursor.executemany(sql, seq_of_params)
+        return cursor.rowcount
+
+
+@contextmanager
+def transaction(path=None):
+    conn = get_connection(path)
+    with get_lock(path):
+        cursor = conn.cursor()
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+# ---------- REMOTE CALLS ----------
+# Data functions marked @remote() take the username first and return plain
+# rows, dicts or numbers. api_server.py serves each one to that user as
+# POST /api/users/<username>/calls/<module.function>; in client mode
+# api_client.install() sets remote_handler, and calls go there instead of
+# running locally. The flags mean what they do on api_server.Route.
+RemoteCall = namedtuple("RemoteCall", "name function writes writer quiet")
+
+REMOTE_CALLS = {}  # name -> RemoteCall
+remote_handler = None  # (name, username, args, kwargs) -> result
+
+
+def remote(writes=False, writer=False, quiet=False):
+    def register(function):
+        name = f"{function.__module__}.{function.__name__}"
+        REMOTE_CALLS[name] = RemoteCall(name, function, writes, writer, quiet)
+
+        @functools.wraps(function)
+        def call(username, *args, **kwargs):
+            if remote_handler is None:
+                return function(username, *args, **kwargs)
+            return remote_handler(name, username, args, kwargs)
+        return call
+    return register
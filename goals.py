@@ -0,0 +1,232 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import db
+import migrations
+from collections import namedtuple
+from datetime import date, datetime
+from tasks import TaskRunner
+
+# A goal's progress_minutes and completed flag are maintained by triggers
+# (see migrations._tracker_goal_progress): saving a session updates just the
+# goals whose window contains its day, and a goal is completed as soon as
+# its progress reaches the target.
+Goal = namedtuple("Goal", "id title description target_minutes start_date due_date progress_minutes completed")
+
+GOAL_QUERY = """
+    SELECT id, goal_title, description, target_minutes, start_date, due_date, progress_minutes, completed
+    FROM goals WHERE username = ?
+    ORDER BY completed, due_date IS NULL, due_date, id
+"""
+
+
+# ---------- DATABASE FUNCTIONS ----------
+@db.remote()
+def fetch_goal_rows(username):
+    return db.query(GOAL_QUERY, (username,))
+
+
+def fetch_goals(username):
+    return [Goal(*row) for row in fetch_goal_rows(username)]
+
+
+def parse_date(text, field):
+    try:
+        return datetime.strptime(text.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{field} must be a date in YYYY-MM-DD format.") from None
+
+
+@db.remote(writes=True)
+def add_goal(username, title, description, target_minutes, due_date, start_date=None):
+    # Raises ValueError with a message for the user; returns the new id
+    title = title.strip()
+    if not title:
+        raise ValueError("Please enter a goal title.")
+    try:
+        target_minutes = int(target_minutes)
+    except (TypeError, ValueError):
+        raise ValueError("Target minutes must be a whole number.") from None
+    if target_minutes <= 0:
+        raise ValueError("Target minutes must be greater than zero.")
+
+    due_date = parse_date(due_date, "Due date")
+    start_date = parse_date(start_date, "Start date") if start_date else date.today().isoformat()
+    if start_date > due_date:
+        raise ValueError("The start date must not be after the due date.")
+
+    return db.execute("""
+        INSERT INTO goals (username, goal_title, description, target_minutes, start_date, due_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (username, title, description.strip(), target_minutes, start_date, due_date))
+
+
+@db.remote(writes=True)
+def complete_goal(username, goal_id):
+    return db.execute("UPDATE goals SET completed = 1 WHERE id = ? AND username = ?", (goal_id, username))
+
+
+@db.remote(writes=True)
+def delete_goal(username, goal_id):
+    db.execute("DELETE FROM goals WHERE id = ? AND username = ?", (goal_id, username))
+
+
+def recalculate_progress():
+    # Rebuilds every goal's stored progress from the rollup in one set-based
+    # statement; the triggers keep it current, so this is only a repair tool
+    # and runs against a local database only
+    with db.transaction() as cursor:
+        cursor.execute(f"""
+            UPDATE goals SET progress_minutes = progress.minutes
+            FROM ({migrations.GOAL_PROGRESS_QUERY}) AS progress
+            WHERE goals.id = progress.id AND goals.progress_minutes != progress.minutes
+        """)
+        changed = cursor.rowcount
+        cursor.execute("""
+            UPDATE goals SET completed = 1
+            WHERE completed = 0 AND target_minutes > 0 AND progress_minutes >= target_minutes
+        """)
+        return changed
+
+
+def goal_status(goal, today=None):
+    today = today or date.today().isoformat()
+    if goal.completed:
+        return "✅ Completed"
+    if goal.due_date and goal.due_date < today:
+        return "⌛ Overdue"
+    if goal.due_date:
+        days = (date.fromisoformat(goal.due_date) - date.fromisoformat(today)).days
+        return "📅 Due today" if days == 0 else f"📅 {days} day{'s' if days != 1 else ''} left"
+    return ""
+
+
+# ---------- GOALS UI ----------
+def create_goals_frame(parent, username):
+    for widget in parent.winfo_children():
+        widget.destroy()
+
+    frame = tk.Frame(parent, bg="#F2F6FC")
+    frame.pack(fill="both", expand=True, padx=30, pady=30)
+
+    tk.Label(frame, text="🎯 Goals", font=("Helvetica", 20, "bold"),
+             bg="#FFFFFF", fg="#2B2B2B").pack(pady=10)
+
+    # ---------- New goal form ----------
+    form_frame = tk.LabelFrame(frame, text="New Goal", bg="#FFFFFF", fg="#2B2B2B",
+                               font=("Helvetica", 12, "bold"), padx=15, pady=10)
+    form_frame.pack(fill="x", pady=10)
+
+    fields = {}
+    for row, (name, label, default) in enumerate([
+            ("title", "Title:", ""),
+            ("description", "Description:", ""),
+            ("target", "Target (minutes):", ""),
+            ("start", "Start (YYYY-MM-DD):", date.today().isoformat()),
+            ("due", "Due (YYYY-MM-DD):", ""),
+    ]):
+        tk.Label(form_frame, text=label, bg="#FFFFFF", font=("Helvetica", 11)).grid(row=row, column=0, sticky="w", pady=3)
+        entry = tk.Entry(form_frame, width=40, font=("Helvetica", 11))
+        entry.insert(0, default)
+        entry.grid(row=row, column=1, sticky="w", padx=10, pady=3)
+        fields[name] = entry
+
+    # ---------- Goal list ----------
+    list_frame = tk.Frame(frame, bg="#F2F6FC")
+    list_frame.pack(fill="both", expand=True)
+
+    tk.Label(list_frame, text="Loading goals…", font=("Helvetica", 12),
+             bg="#F2F6FC", fg="#888888").pack(pady=10)
+
+    tasks = TaskRunner(frame)
+    interrupted = {"goals": False}
+
+    style = ttk.Style()
+    style.configure("Goal.Horizontal.TProgressbar", background="#A084E8", troughcolor="#EDE7F6")
+
+    def run_action(action, *args):
+        try:
+            action(username, *args)
+        except db.sqlite3.Error as e:
+            messagebox.showerror("Database Error", str(e))
+            return
+        load_goals()
+
+    def confirm_delete(goal):
+        if messagebox.askyesno("Delete Goal", f"Delete the goal “{goal.title}”?"):
+            run_action(delete_goal, goal.id)
+
+    def show_goals(goals):
+        for widget in list_frame.winfo_children():
+            widget.destroy()
+        if not goals:
+            tk.Label(list_frame, text="No goals yet. Set one above!", font=("Helvetica", 12),
+                     bg="#F2F6FC", fg="#888888").pack(pady=10)
+            return
+
+        today = date.today().isoformat()
+        for goal in goals:
+            card = tk.Frame(list_frame, bg="#F8F8FF", relief="solid", bd=1, padx=10, pady=8)
+            card.pack(fill="x", pady=5)
+
+            header = tk.Frame(card, bg="#F8F8FF")
+            header.pack(fill="x")
+            tk.Label(header, text=goal.title, font=("Helvetica", 13, "bold"),
+                     bg="#F8F8FF", fg="#2B2B2B").pack(side="left")
+            tk.Label(header, text=goal_status(goal, today), font=("Helvetica", 11),
+                     bg="#F8F8FF", fg="#555555").pack(side="left", padx=10)
+            tk.Button(header, text="🗑️", relief="flat", bg="#F8F8FF", cursor="hand2",
+                      command=lambda g=goal: confirm_delete(g)).pack(side="right")
+            if not goal.completed:
+                tk.Button(header, text="✔ Mark Complete", relief="flat", bg="#F8C8DC", cursor="hand2",
+                          font=("Helvetica", 10, "bold"),
+                          command=lambda g=goal: run_action(complete_goal, g.id)).pack(side="right", padx=5)
+
+            if goal.description:
+                tk.Label(card, text=goal.description, font=("Helvetica", 10),
+                         bg="#F8F8FF", fg="#555555", anchor="w").pack(fill="x")
+
+            target = goal.target_minutes or 0
+            progress = goal.progress_minutes or 0
+            bar = ttk.Progressbar(card, style="Goal.Horizontal.TProgressbar", orient="horizontal",
+                                  mode="determinate", maximum=max(target, 1), value=min(progress, target))
+            bar.pack(fill="x", pady=(6, 2))
+            percent = min(100, round(progress * 100 / target)) if target else 0
+            window = f"{goal.start_date or '…'} → {goal.due_date or '…'}"
+            tk.Label(card, text=f"{progress} / {target} minutes ({percent}%)   ·   {window}",
+                     font=("Helvetica", 10), bg="#F8F8FF", fg="#2B2B2B", anchor="w").pack(fill="x")
+
+    def load_goals():
+        tasks.submit(lambda: fetch_goals(username), show_goals, key="goals")
+
+    def save_goal():
+        try:
+            add_goal(username, fields["title"].get(), fields["description"].get(),
+                     fields["target"].get(), fields["due"].get(), fields["start"].get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Goal", str(e))
+            return
+        for name in ("title", "description", "target", "due"):
+            fields[name].delete(0, "end")
+        load_goals()
+
+    tk.Button(form_frame, text="➕ Add Goal", font=("Helvetica", 11, "bold"), bg="#A084E8", fg="#FFFFFF",
+              activebackground="#7A5CE3", relief="flat", padx=10, pady=5,
+              command=save_goal).grid(row=5, column=1, sticky="e", pady=10)
+
+    def on_hide():
+        if tasks.cancel():
+            interrupted["goals"] = True
+
+    def on_show():
+        # A load cancelled by navigating away is restarted on return
+        if interrupted["goals"]:
+            interrupted["goals"] = False
+            load_goals()
+
+    load_goals()
+
+    frame.refresh = load_goals
+    frame.on_hide = on_hide
+    frame.on_show = on_show
+
+    return frame
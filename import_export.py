@@ -0,0 +1,334 @@
+# import_export.py
+# Bulk import and export of practice sessions as CSV or JSON lines. Both
+# directions stream: files are read through generators and written in
+# batched executemany transactions, and stored sessions are read back in
+# keyset pages (see iter_sessions), locally or through the API server.
+#
+#   python import_export.py import <username> <file>
+#   python import_export.py export <username> <file>
+import argparse
+import csv
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, time
+
+import db
+from migrations import PERIOD_STARTS, UNKNOWN_DATE
+
+FIELDS = ("date", "instrument", "duration", "notes", "start_time", "end_time", "focus")
+BATCH_SIZE = 5000
+# Stored sessions read per query when deduplicating or exporting
+PAGE_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+# Longest session accepted, in minutes; rows beyond it are reported invalid
+# (huge values would also overflow the rollup sums and abort the import)
+MAX_DURATION = 24 * 60
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)  # [(line, message)], first MAX_REPORTED_ERRORS only
+
+    def add_error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def summary(self):
+        return (f"{self.imported} imported, {self.duplicates} duplicates skipped, "
+                f"{self.invalid} invalid rows skipped")
+
+
+def detect_format(path, file_format=None):
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ImportFormatError(f"Unsupported file type {extension!r}; use .csv or .jsonl")
+    return FORMATS[extension]
+
+
+# ---------- READING ----------
+def read_csv(f):
+    # Yields (line number, record dict)
+    reader = csv.DictReader(f)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_jsonl(f):
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+            continue
+        yield line_number, record
+
+
+# ---------- VALIDATION ----------
+def _text(record, name):
+    value = record.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _timestamp(record, name):
+    # Validated, but stored as written so re-imports dedupe exactly. Undated
+    # legacy timer sessions carry only a time of day (HH:MM:SS).
+    value = _text(record, name)
+    if not value:
+        return None, None
+    try:
+        return datetime.fromisoformat(value), value
+    except ValueError:
+        time.fromisoformat(value)
+        return None, value
+
+
+def normalize(record):
+    # Returns the row for practice_sessions (without username) or raises
+    # ValueError with a message for the import report.
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+
+    start_time, start_text = _timestamp(record, "start_time")
+    end_time, end_text = _timestamp(record, "end_time")
+
+    date = _text(record, "date")
+    if date:
+        # strptime also accepts unpadded dates such as 2025-6-9
+        date = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+    elif start_time:
+        date = start_time.strftime("%Y-%m-%d")
+    elif start_text:
+        date = UNKNOWN_DATE
+    else:
+        raise ValueError("missing date")
+
+    instrument = _text(record, "instrument")
+    if not instrument:
+        raise ValueError("missing instrument")
+
+    duration = _text(record, "duration")
+    if duration is not None:
+        # Whole minutes only; 30.0 is accepted, 1.9, inf and nan are not
+        duration = float(duration)
+        if not duration.is_integer():
+            raise ValueError("duration must be a whole number of minutes")
+        duration = int(duration)
+    elif start_time and end_time:
+        duration = int((end_time - start_time).total_seconds() // 60)
+    else:
+        raise ValueError("missing duration")
+    if duration < 0:
+        raise ValueError("negative duration")
+    if duration > MAX_DURATION:
+        raise ValueError(f"duration over {MAX_DURATION} minutes")
+
+    return (date, instrument, duration, _text(record, "notes") or "",
+            start_text, end_text, _text(record, "focus"))
+
+
+def _dedupe_key(row):
+    date, instrument, duration, notes, start_time, _, _ = row
+    return date, instrument, duration, notes, start_time
+
+
+# ---------- STORED SESSIONS ----------
+@db.remote()
+def fetch_session_page(username, after=None, limit=PAGE_SIZE):
+    # Keyset page in (date, id) order; after is the (date, id) of the last
+    # row already read. Rows are (id, *FIELDS).
+    limit = min(limit, PAGE_SIZE)
+    if after is None:
+        return db.query(f"""
+            SELECT id, {", ".join(FIELDS)} FROM practice_sessions
+            WHERE username = ? ORDER BY date, id LIMIT ?
+        """, (username, limit))
+    return db.query(f"""
+        SELECT id, {", ".join(FIELDS)} FROM practice_sessions
+        WHERE username = ? AND (date, id) > (?, ?) ORDER BY date, id LIMIT ?
+    """, (username, *after, limit))
+
+
+def iter_sessions(username):
+    # Yields (id, *FIELDS) for every stored session, one page at a time
+    after = None
+    while True:
+        rows = fetch_session_page(username, after)
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        after = (rows[-1][1], rows[-1][0])
+
+
+def valid_rows(records, username, report):
+    # Drops invalid rows and rows already stored (or repeated in the file)
+    seen = set()
+    for _, *row in iter_sessions(username):
+        row[3] = row[3] or ""
+        seen.add(_dedupe_key(row))
+
+    for line_number, record in records:
+        if isinstance(record, Exception):
+            report.add_error(line_number, str(record))
+            continue
+        try:
+            row = normalize(record)
+        except (ValueError, TypeError) as e:
+            report.add_error(line_number, str(e))
+            continue
+
+        key = _dedupe_key(row)
+        if key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        yield row
+
+
+# ---------- IMPORT ----------
+INSERT_SESSION = f"""
+    INSERT INTO practice_sessions (username, {", ".join(FIELDS)})
+    VALUES (?, {", ".join("?" * len(FIELDS))})
+"""
+
+
+@db.remote(writes=True)
+def insert_session(username, record):
+    # Validates one record (see normalize) and stores it; returns the new id
+    return db.execute(INSERT_SESSION, (username, *normalize(record)))
+
+
+@db.remote(writes=True)
+def insert_batch(username, batch):
+    # One transaction per batch of rows from valid_rows. The per-row
+    # rollup, period, data stamp and achievement triggers are suspended
+    # (see migrations._tracker_bulk_load) and the batch's totals are applied
+    # with grouped statements instead. Rows are normalized again, since in
+    # client mode they arrive over the API.
+    rows = [(username, *normalize(dict(zip(FIELDS, row)))) for row in batch]
+    with db.transaction() as cursor:
+        first_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM practice_sessions").fetchone()[0]
+        cursor.execute("INSERT INTO bulk_load (id) VALUES (1)")
+        cursor.executemany(INSERT_SESSION, rows)
+
+        cursor.execute("""
+            INSERT INTO daily_rollup (username, day, instrument, minutes, sessions)
+            SELECT username, date, instrument, SUM(duration), COUNT(*)
+            FROM practice_sessions WHERE id > ?
+            GROUP BY username, date, instrument
+            ON CONFLICT (username, day, instrument) DO UPDATE
+            SET minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions
+        """, (first_id,))
+        for resolution, period_start in PERIOD_STARTS.items():
+            cursor.execute(f"""
+                INSERT INTO period_rollup (username, resolution, period, minutes, sessions)
+                SELECT username, '{resolution}', {period_start.format(day="date")}, SUM(duration), COUNT(*)
+                FROM practice_sessions WHERE id > ? AND julianday(date) IS NOT NULL
+                GROUP BY username, 3
+                ON CONFLICT (username, resolution, period) DO UPDATE
+                SET minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions
+            """, (first_id,))
+        cursor.execute("""
+            INSERT INTO data_versions (username, version) VALUES (?, 1)
+            ON CONFLICT (username) DO UPDATE SET version = version + 1
+        """, (username,))
+        cursor.execute("""
+            INSERT INTO achievement_instrument_totals (username, instrument, minutes)
+            SELECT username, instrument, SUM(duration)
+            FROM practice_sessions WHERE id > ?
+            GROUP BY username, instrument
+            ON CONFLICT (username, instrument) DO UPDATE SET minutes = minutes + excluded.minutes
+        """, (first_id,))
+        # Streaks are rebuilt from scratch on the next read
+        cursor.execute("INSERT OR IGNORE INTO achievement_state (username) VALUES (?)", (username,))
+        cursor.execute("""
+            UPDATE achievement_state
+            SET total_minutes = total_minutes + (SELECT SUM(duration) FROM practice_sessions WHERE id > ?),
+                dirty = 1
+            WHERE username = ?
+        """, (first_id, username))
+        cursor.execute("DELETE FROM bulk_load")
+
+
+def import_sessions(username, path, file_format=None, batch_size=BATCH_SIZE):
+    file_format = detect_format(path, file_format)
+    report = ImportReport()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        records = read_csv(f) if file_format == "csv" else read_jsonl(f)
+        rows = valid_rows(records, username, report)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            insert_batch(username, batch)
+            report.imported += len(batch)
+    return report
+
+
+# ---------- EXPORT ----------
+def export_sessions(username, path, file_format=None):
+    # Returns the number of sessions written
+    file_format = detect_format(path, file_format)
+    rows = (row[1:] for row in iter_sessions(username))
+
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export practice sessions.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("username")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--db", help=f"database file (default: {db.DB_PATH})")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_PATH = args.db
+
+    try:
+        if args.action == "import":
+            report = import_sessions(args.username, args.path, args.format)
+            print(report.summary())
+            for line, message in report.errors:
+                print(f"  line {line}: {message}")
+        else:
+            count = export_sessions(args.username, args.path, args.format)
+            print(f"{count} sessions exported to {args.path}")
+    except (OSError, ImportFormatError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
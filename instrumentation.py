@@ -0,0 +1,283 @@
+# instrumentation.py
+# Opt-in performance instrumentation, switched on by setting
+# MUSIC_TRACKER_PROFILE=1. When enabled it records:
+#   - how long each view factory takes, and how much of that was SQL
+#   - count and duration of every SQL statement, plus the number of
+#     statements SQLite ran including trigger bodies (trace callback)
+#   - Matplotlib draw time per chart
+# Queries slower than MUSIC_TRACKER_SLOW_QUERY_MS are written with their
+# EXPLAIN QUERY PLAN to a rotating log file, and a summary is logged at
+# exit. Nothing here is active unless install() is called.
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+ENV_FLAG = "MUSIC_TRACKER_PROFILE"
+SLOW_QUERY_ENV = "MUSIC_TRACKER_SLOW_QUERY_MS"
+DEFAULT_SLOW_QUERY_MS = 50.0
+
+LOG_FILE = "performance.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+SLOW_QUERY_HISTORY = 50
+SQL_KEY_LENGTH = 160
+
+log = logging.getLogger("music_tracker.performance")
+
+_installed = False
+_slow_query_ms = DEFAULT_SLOW_QUERY_MS
+
+# (category, name) -> [count, total seconds, max seconds]
+_stats = {}
+_stats_lock = threading.Lock()
+_slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)  # (when, ms, sql, plan)
+_thread_sql = threading.local()  # SQL seconds spent on the current thread
+
+
+def requested():
+    return os.environ.get(ENV_FLAG, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def enabled():
+    return _installed
+
+
+def slow_query_ms():
+    return _slow_query_ms
+
+
+# ---------- STATS ----------
+def record(category, name, seconds, count=1):
+    with _stats_lock:
+        entry = _stats.get((category, name))
+        if entry is None:
+            _stats[(category, name)] = [count, seconds, seconds]
+        else:
+            entry[0] += count
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+
+def snapshot():
+    # [(category, name, count, total ms, max ms)], slowest total first
+    with _stats_lock:
+        rows = [(category, name, count, total * 1000, longest * 1000)
+                for (category, name), (count, total, longest) in _stats.items()]
+    return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+def slow_queries():
+    with _stats_lock:
+        return list(_slow_queries)
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+        _slow_queries.clear()
+
+
+@contextmanager
+def _timer(category, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(category, name, time.perf_counter() - started)
+
+
+def timed(category, name):
+    # Context manager that records the block's duration when enabled
+    return _timer(category, name) if _installed else nullcontext()
+
+
+# ---------- SQL ----------
+def _sql_key(sql):
+    return " ".join(sql.split())[:SQL_KEY_LENGTH]
+
+
+def _trace(statement):
+    # Called by SQLite for every statement it starts, trigger bodies included
+    record("sqlite", "statements run (incl. triggers)", 0.0)
+
+
+def _explain(conn, sql, params):
+    # Uses the base class so the EXPLAIN itself is not timed
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except sqlite3.Error as e:
+        return f"(no plan: {e})"
+
+    parents = {node: parent for node, parent, _, _ in rows}
+    lines = []
+    for node, parent, _, detail in rows:
+        level = 0
+        while parent:
+            level += 1
+            parent = parents.get(parent, 0)
+        lines.append(f"{'  ' * (level + 1)}{detail}")
+    return "\n".join(lines)
+
+
+class TimedCursor(sqlite3.Cursor):
+    # Time spent in execute and in fetching the rows is charged to the
+    # statement; a statement that crosses the slow threshold is logged once.
+    def _begin(self, sql, params):
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._logged = False
+
+    def _charge(self, seconds, executed=False):
+        sql = getattr(self, "_sql", None)
+        if sql is None:
+            return
+        record("sql", _sql_key(sql), seconds, count=1 if executed else 0)
+        _thread_sql.seconds = getattr(_thread_sql, "seconds", 0.0) + seconds
+        self._elapsed += seconds
+        if not self._logged and self._elapsed * 1000 >= _slow_query_ms:
+            self._logged = True
+            self._log_slow()
+
+    def _log_slow(self):
+        ms = self._elapsed * 1000
+        plan = _explain(self.connection, self._sql, self._params)
+        with _stats_lock:
+            _slow_queries.append((time.strftime("%H:%M:%S"), ms, _sql_key(self._sql), plan))
+        log.warning("slow query (%.1f ms): %s\n  params: %r\n  plan:\n%s",
+                    ms, " ".join(self._sql.split()), self._params, plan)
+
+    def execute(self, sql, params=()):
+        self._begin(sql, params)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self._charge(time.perf_counter() - started, executed=True)
+
+    def executemany(self, sql, seq_of_params):
+        # A slow batch is explained with its first row's parameters when
+        # those are at hand (not for generators)
+        first = seq_of_params[0] if isinstance(seq_of_params, (list, tuple)) and seq_of_params else ()
+        self._begin(sql, first)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self._charge(time.perf_counter() - started, executed=True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._charge(time.perf_counter() - started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._charge(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._charge(time.perf_counter() - started)
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            self._charge(time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    # Used as db.CONNECTION_FACTORY while instrumentation is installed
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_trace)
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection's shortcuts create a plain cursor internally
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+# ---------- VIEWS ----------
+def timed_view(label, factory):
+    # Wraps a view factory to record its build time, the SQL run on this
+    # thread during the build, and the time until Tk is next idle (layout
+    # and first paint). Returns the factory unchanged when disabled.
+    if not _installed:
+        return factory
+
+    def build(parent, *args, **kwargs):
+        started = time.perf_counter()
+        sql_before = getattr(_thread_sql, "seconds", 0.0)
+        widget = factory(parent, *args, **kwargs)
+        built = time.perf_counter() - started
+        sql = getattr(_thread_sql, "seconds", 0.0) - sql_before
+
+        record("view", f"{label}: build", built)
+        record("view", f"{label}: SQL during build", sql)
+        record("view", f"{label}: Python + Tk during build", built - sql)
+        parent.after_idle(lambda: record("view", f"{label}: until idle", time.perf_counter() - started))
+        return widget
+
+    return build
+
+
+# ---------- SETUP ----------
+def _log_summary():
+    rows = snapshot()
+    if not rows:
+        return
+    lines = [f"{category:<8} {count:>7} {total:>10.1f} ms {longest:>9.1f} ms max  {name}"
+             for category, name, count, total, longest in rows]
+    log.info("summary:\n%s", "\n".join(lines))
+
+
+def install(log_file=LOG_FILE, slow_ms=None):
+    # Routes db connections through the timed classes and starts the log.
+    # Safe to call more than once.
+    global _installed, _slow_query_ms
+    import db
+
+    if slow_ms is None:
+        try:
+            slow_ms = float(os.environ.get(SLOW_QUERY_ENV, DEFAULT_SLOW_QUERY_MS))
+        except ValueError:
+            slow_ms = DEFAULT_SLOW_QUERY_MS
+    _slow_query_ms = slow_ms
+    if _installed:
+        return
+
+    handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                  encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+    # Connections opened before this point are not instrumented
+    db.close_all()
+    db.CONNECTION_FACTORY = TimedConnection
+    _installed = True
+    atexit.register(_log_summary)
+    log.info("instrumentation enabled (slow query threshold %.1f ms)", _slow_query_ms)
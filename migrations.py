@@ -0,0 +1,751 @@
+# migrations.py
+# Versioned schema migrations. The database stores the number of applied
+# steps in PRAGMA user_version, so an up-to-date file skips all DDL.
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+
+def _columns(cursor, table):
+    return {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(cursor, table, column, decl):
+    if column not in _columns(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# ---------- core tables ----------
+def _tracker_base_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            date TEXT,
+            instrument TEXT,
+            duration INTEGER,
+            notes TEXT
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            goal_title TEXT,
+            description TEXT,
+            target_minutes INTEGER,
+            due_date TEXT,
+            completed INTEGER DEFAULT 0
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL
+        )
+    ''')
+    _add_column(cursor, "users", "instrument", "TEXT")
+    _add_column(cursor, "users", "exam_year", "TEXT")
+
+
+def _tracker_indexes(cursor):
+    # Covers the per-user date-range aggregates (SUM(duration), instruments)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_date
+        ON practice_sessions (username, date, instrument, duration)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_goals_user_status
+        ON goals (username, completed, due_date)
+    ''')
+
+
+# ---------- legacy stores ----------
+# Before v3 notes lived in music_practice.db and timer sessions in
+# practice_tracker.db. Both are folded into music_tracker.db once.
+LEGACY_NOTES_DB = "music_practice.db"
+LEGACY_TIMER_DB = "practice_tracker.db"
+LEGACY_INSTRUMENT = "Unspecified"
+# Legacy timer rows never recorded a day. They keep an empty date, which
+# sorts before every real date and, not being a valid date, is left out of
+# the calendar, streaks, weekday and trend charts and goal windows, while
+# their minutes still count toward totals.
+UNKNOWN_DATE = ""
+
+
+def _main_db_dir(cursor):
+    for _, name, filename in cursor.execute("PRAGMA database_list").fetchall():
+        if name == "main":
+            return os.path.dirname(filename) if filename else None
+    return None
+
+
+def _open_legacy(cursor, filename):
+    folder = _main_db_dir(cursor)
+    if folder is None:
+        return None, None
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path):
+        return None, None
+    legacy = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    tables = {row[0] for row in legacy.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if "practice_notes" not in tables and "practice_sessions" not in tables:
+        legacy.close()
+        return None, None
+    return legacy, path
+
+
+def _legacy_timer_rows(rows):
+    # Timer rows only stored HH:MM:SS, so the date stays unknown and the
+    # times are kept as they were; an end time before the start rolls over
+    # to the next day for the duration.
+    for username, start, end, focus, notes in rows:
+        try:
+            start_dt = datetime.strptime(start, "%H:%M:%S")
+            end_dt = datetime.strptime(end, "%H:%M:%S")
+        except (TypeError, ValueError):
+            continue
+        if end_dt < start_dt:
+            end_dt += timedelta(days=1)
+        duration = int((end_dt - start_dt).total_seconds() // 60)
+        yield (username, UNKNOWN_DATE, LEGACY_INSTRUMENT, duration, notes or "",
+               start_dt.strftime("%H:%M:%S"), end_dt.strftime("%H:%M:%S"), focus)
+
+
+def _tracker_consolidate_stores(cursor):
+    _add_column(cursor, "practice_sessions", "start_time", "TEXT")
+    _add_column(cursor, "practice_sessions", "end_time", "TEXT")
+    _add_column(cursor, "practice_sessions", "focus", "TEXT")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS practice_notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            note TEXT,
+            category TEXT,
+            date TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_notes_user_date
+        ON practice_notes (username, date)
+    ''')
+
+    legacy, _ = _open_legacy(cursor, LEGACY_NOTES_DB)
+    if legacy is not None:
+        try:
+            rows = legacy.execute("SELECT id, username, note, category, date FROM practice_notes ORDER BY id")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO practice_notes (id, username, note, category, date) VALUES (?, ?, ?, ?, ?)",
+                rows)
+        finally:
+            legacy.close()
+
+    legacy, _ = _open_legacy(cursor, LEGACY_TIMER_DB)
+    if legacy is not None:
+        try:
+            rows = legacy.execute(
+                "SELECT username, start_time, end_time, focus, notes FROM practice_sessions ORDER BY id")
+            cursor.executemany('''
+                INSERT INTO practice_sessions
+                    (username, date, instrument, duration, notes, start_time, end_time, focus)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', _legacy_timer_rows(rows))
+        finally:
+            legacy.close()
+
+
+# ---------- daily rollup ----------
+# daily_rollup holds per-user, per-day, per-instrument totals. Triggers keep
+# it exact on every insert, update and delete of practice_sessions.
+_ROLLUP_KEY_OLD = "COALESCE(OLD.username, ''), COALESCE(OLD.date, ''), COALESCE(OLD.instrument, '')"
+_ROLLUP_KEY_NEW = "COALESCE(NEW.username, ''), COALESCE(NEW.date, ''), COALESCE(NEW.instrument, '')"
+
+
+def _rollup_add(row):
+    key = _ROLLUP_KEY_NEW if row == "NEW" else _ROLLUP_KEY_OLD
+    return f'''
+        INSERT INTO daily_rollup (username, day, instrument, minutes, sessions)
+        VALUES ({key}, COALESCE({row}.duration, 0), 1)
+        ON CONFLICT (username, day, instrument) DO UPDATE
+        SET minutes = minutes + excluded.minutes, sessions = sessions + 1;
+    '''
+
+
+def _rollup_remove(row):
+    return f'''
+        UPDATE daily_rollup
+        SET minutes = minutes - COALESCE({row}.duration, 0), sessions = sessions - 1
+        WHERE username = COALESCE({row}.username, '') AND day = COALESCE({row}.date, '')
+          AND instrument = COALESCE({row}.instrument, '');
+        DELETE FROM daily_rollup
+        WHERE username = COALESCE({row}.username, '') AND day = COALESCE({row}.date, '')
+          AND instrument = COALESCE({row}.instrument, '') AND sessions <= 0;
+    '''
+
+
+def _tracker_daily_rollup(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            username TEXT NOT NULL,
+            day TEXT NOT NULL,
+            instrument TEXT NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, day, instrument)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute("DELETE FROM daily_rollup")
+    cursor.execute('''
+        INSERT INTO daily_rollup (username, day, instrument, minutes, sessions)
+        SELECT COALESCE(username, ''), COALESCE(date, ''), COALESCE(instrument, ''),
+               SUM(COALESCE(duration, 0)), COUNT(*)
+        FROM practice_sessions
+        GROUP BY 1, 2, 3
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_insert
+        AFTER INSERT ON practice_sessions
+        BEGIN {_rollup_add("NEW")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_delete
+        AFTER DELETE ON practice_sessions
+        BEGIN {_rollup_remove("OLD")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_session_update
+        AFTER UPDATE OF username, date, instrument, duration ON practice_sessions
+        BEGIN {_rollup_remove("OLD")} {_rollup_add("NEW")} END
+    ''')
+
+
+# ---------- achievement state ----------
+# Per-user counters behind the Achievements view, updated in O(1) per
+# session. Inserts that extend or break the running streak are applied
+# directly; anything that could split an older streak (a backdated day,
+# removing a day's last session) sets dirty so the reader rebuilds it.
+_NEW_DAY_OK = "julianday(NEW.date) IS NOT NULL"
+_DAY_GAP = "julianday(NEW.date) - julianday(last_day)"
+
+
+def _tracker_achievement_state(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS achievement_state (
+            username TEXT PRIMARY KEY,
+            total_minutes INTEGER NOT NULL DEFAULT 0,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            max_streak INTEGER NOT NULL DEFAULT 0,
+            last_day TEXT,
+            goals_completed INTEGER NOT NULL DEFAULT 0,
+            dirty INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS achievement_instrument_totals (
+            username TEXT NOT NULL,
+            instrument TEXT NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, instrument)
+        ) WITHOUT ROWID
+    ''')
+
+    # Backfill totals; streaks are left dirty and rebuilt on first read.
+    cursor.execute("DELETE FROM achievement_state")
+    cursor.execute("DELETE FROM achievement_instrument_totals")
+    cursor.execute('''
+        INSERT INTO achievement_instrument_totals (username, instrument, minutes)
+        SELECT username, instrument, SUM(minutes) FROM daily_rollup GROUP BY username, instrument
+    ''')
+    cursor.execute('''
+        INSERT INTO achievement_state (username, total_minutes, goals_completed, dirty)
+        SELECT username, SUM(minutes), SUM(goals), 1 FROM (
+            SELECT username, minutes, 0 AS goals FROM daily_rollup
+            UNION ALL
+            SELECT COALESCE(username, ''), 0, COALESCE(completed = 1, 0) FROM goals
+        )
+        GROUP BY username
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_session_insert
+        AFTER INSERT ON practice_sessions
+        BEGIN
+            INSERT OR IGNORE INTO achievement_state (username) VALUES (COALESCE(NEW.username, ''));
+            INSERT INTO achievement_instrument_totals (username, instrument, minutes)
+            VALUES (COALESCE(NEW.username, ''), COALESCE(NEW.instrument, ''), COALESCE(NEW.duration, 0))
+            ON CONFLICT (username, instrument) DO UPDATE SET minutes = minutes + excluded.minutes;
+            UPDATE achievement_state SET
+                total_minutes = total_minutes + COALESCE(NEW.duration, 0),
+                current_streak = CASE
+                    WHEN NOT {_NEW_DAY_OK} THEN current_streak
+                    WHEN last_day IS NULL OR {_DAY_GAP} > 1 THEN 1
+                    WHEN {_DAY_GAP} = 1 THEN current_streak + 1
+                    ELSE current_streak END,
+                max_streak = CASE
+                    WHEN NOT {_NEW_DAY_OK} THEN max_streak
+                    WHEN last_day IS NULL OR {_DAY_GAP} > 1 THEN MAX(max_streak, 1)
+                    WHEN {_DAY_GAP} = 1 THEN MAX(max_streak, current_streak + 1)
+                    ELSE max_streak END,
+                dirty = CASE
+                    WHEN NOT {_NEW_DAY_OK} OR last_day IS NULL OR {_DAY_GAP} >= 0 THEN dirty
+                    WHEN EXISTS (SELECT 1 FROM practice_sessions
+                                 WHERE username = NEW.username AND date = NEW.date AND id <> NEW.id) THEN dirty
+                    ELSE 1 END,
+                last_day = CASE
+                    WHEN {_NEW_DAY_OK} AND (last_day IS NULL OR {_DAY_GAP} > 0) THEN NEW.date
+                    ELSE last_day END
+            WHERE username = COALESCE(NEW.username, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_session_delete
+        AFTER DELETE ON practice_sessions
+        BEGIN
+            UPDATE achievement_instrument_totals SET minutes = minutes - COALESCE(OLD.duration, 0)
+            WHERE username = COALESCE(OLD.username, '') AND instrument = COALESCE(OLD.instrument, '');
+            UPDATE achievement_state SET
+                total_minutes = total_minutes - COALESCE(OLD.duration, 0),
+                dirty = CASE
+                    WHEN EXISTS (SELECT 1 FROM practice_sessions
+                                 WHERE username = OLD.username AND date = OLD.date) THEN dirty
+                    ELSE 1 END
+            WHERE username = COALESCE(OLD.username, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_session_update
+        AFTER UPDATE OF username, date, instrument, duration ON practice_sessions
+        BEGIN
+            UPDATE achievement_instrument_totals SET minutes = minutes - COALESCE(OLD.duration, 0)
+            WHERE username = COALESCE(OLD.username, '') AND instrument = COALESCE(OLD.instrument, '');
+            INSERT INTO achievement_instrument_totals (username, instrument, minutes)
+            VALUES (COALESCE(NEW.username, ''), COALESCE(NEW.instrument, ''), COALESCE(NEW.duration, 0))
+            ON CONFLICT (username, instrument) DO UPDATE SET minutes = minutes + excluded.minutes;
+            UPDATE achievement_state SET
+                total_minutes = total_minutes - COALESCE(OLD.duration, 0),
+                dirty = CASE WHEN OLD.date IS NOT NEW.date OR OLD.username IS NOT NEW.username
+                             THEN 1 ELSE dirty END
+            WHERE username = COALESCE(OLD.username, '');
+            INSERT OR IGNORE INTO achievement_state (username) VALUES (COALESCE(NEW.username, ''));
+            UPDATE achievement_state SET
+                total_minutes = total_minutes + COALESCE(NEW.duration, 0),
+                dirty = CASE WHEN OLD.date IS NOT NEW.date OR OLD.username IS NOT NEW.username
+                             THEN 1 ELSE dirty END
+            WHERE username = COALESCE(NEW.username, '');
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_goal_insert
+        AFTER INSERT ON goals
+        BEGIN
+            INSERT OR IGNORE INTO achievement_state (username) VALUES (COALESCE(NEW.username, ''));
+            UPDATE achievement_state SET goals_completed = goals_completed + COALESCE(NEW.completed = 1, 0)
+            WHERE username = COALESCE(NEW.username, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_goal_delete
+        AFTER DELETE ON goals
+        BEGIN
+            UPDATE achievement_state SET goals_completed = goals_completed - COALESCE(OLD.completed = 1, 0)
+            WHERE username = COALESCE(OLD.username, '');
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_achievements_goal_update
+        AFTER UPDATE OF username, completed ON goals
+        BEGIN
+            UPDATE achievement_state SET goals_completed = goals_completed - COALESCE(OLD.completed = 1, 0)
+            WHERE username = COALESCE(OLD.username, '');
+            INSERT OR IGNORE INTO achievement_state (username) VALUES (COALESCE(NEW.username, ''));
+            UPDATE achievement_state SET goals_completed = goals_completed + COALESCE(NEW.completed = 1, 0)
+            WHERE username = COALESCE(NEW.username, '');
+        END
+    ''')
+
+
+# ---------- history paging ----------
+def _tracker_history_index(cursor):
+    # (username, date) plus the implicit trailing rowid matches the
+    # history view's keyset order (date, id) exactly.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_date_id
+        ON practice_sessions (username, date)
+    ''')
+
+
+# ---------- full-text search ----------
+# External-content FTS5 indexes over note text; the rows themselves stay in
+# practice_notes / practice_sessions and triggers keep the index in step.
+# Builds without FTS5 skip this step and search falls back to LIKE.
+_FTS_INDEXES = [
+    # (fts table, content table, text column)
+    ("practice_notes_fts", "practice_notes", "note"),
+    ("session_notes_fts", "practice_sessions", "notes"),
+]
+
+
+def _fts_available(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    cursor.execute("DROP TABLE temp.fts5_probe")
+    return True
+
+
+def _tracker_notes_search(cursor):
+    if not _fts_available(cursor):
+        return
+
+    for fts, table, column in _FTS_INDEXES:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({column}, content='{table}', content_rowid='id', tokenize='porter unicode61')
+        ''')
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+        insert = f"INSERT INTO {fts} (rowid, {column}) VALUES (NEW.id, NEW.{column});"
+        delete = f"INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert
+            AFTER INSERT ON {table}
+            BEGIN {insert} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete
+            AFTER DELETE ON {table}
+            BEGIN {delete} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update
+            AFTER UPDATE OF {column} ON {table}
+            BEGIN {delete} {insert} END
+        ''')
+
+
+# ---------- chart cache stamps ----------
+# A per-user counter bumped on every change to that user's daily_rollup
+# rows. Rendered charts are cached on disk under this stamp, so it has to
+# persist across runs (PRAGMA data_version does not).
+def _bump_data_version(row):
+    return f'''
+        INSERT INTO data_versions (username, version) VALUES ({row}.username, 1)
+        ON CONFLICT (username) DO UPDATE SET version = version + 1;
+    '''
+
+
+def _tracker_data_versions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            username TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_data_version_rollup_insert
+        AFTER INSERT ON daily_rollup
+        BEGIN {_bump_data_version("NEW")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_data_version_rollup_update
+        AFTER UPDATE ON daily_rollup
+        BEGIN {_bump_data_version("NEW")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_data_version_rollup_delete
+        AFTER DELETE ON daily_rollup
+        BEGIN {_bump_data_version("OLD")} END
+    ''')
+
+
+# ---------- multi-resolution rollup ----------
+# period_rollup folds daily_rollup (summed over instruments) into ISO weeks
+# (keyed by their Monday), months (YYYY-MM-01) and years (YYYY-01-01).
+# Triggers on daily_rollup apply each change as a delta to all three levels.
+PERIOD_STARTS = {
+    "week": "date({day}, '-' || ((CAST(strftime('%w', {day}) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "strftime('%Y-%m-01', {day})",
+    "year": "strftime('%Y-01-01', {day})",
+}
+
+
+def _period_delta(row, sign):
+    statements = []
+    for resolution, start in PERIOD_STARTS.items():
+        period = start.format(day=f"{row}.day")
+        statements.append(f'''
+            INSERT INTO period_rollup (username, resolution, period, minutes, sessions)
+            VALUES ({row}.username, '{resolution}', {period}, {sign}{row}.minutes, {sign}{row}.sessions)
+            ON CONFLICT (username, resolution, period) DO UPDATE
+            SET minutes = minutes + excluded.minutes, sessions = sessions + excluded.sessions;
+        ''')
+    statements.append(f'''
+        DELETE FROM period_rollup
+        WHERE username = {row}.username AND sessions <= 0
+          AND period IN ({", ".join(start.format(day=f"{row}.day") for start in PERIOD_STARTS.values())});
+    ''')
+    return "".join(statements)
+
+
+def _tracker_period_rollup(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS period_rollup (
+            username TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            period TEXT NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, resolution, period)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute("DELETE FROM period_rollup")
+    for resolution, start in PERIOD_STARTS.items():
+        cursor.execute(f'''
+            INSERT INTO period_rollup (username, resolution, period, minutes, sessions)
+            SELECT username, '{resolution}', {start.format(day="day")}, SUM(minutes), SUM(sessions)
+            FROM daily_rollup
+            WHERE julianday(day) IS NOT NULL
+            GROUP BY username, 3
+        ''')
+
+    valid_new = "julianday(NEW.day) IS NOT NULL"
+    valid_old = "julianday(OLD.day) IS NOT NULL"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_period_rollup_insert
+        AFTER INSERT ON daily_rollup WHEN {valid_new}
+        BEGIN {_period_delta("NEW", "")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_period_rollup_delete
+        AFTER DELETE ON daily_rollup WHEN {valid_old}
+        BEGIN {_period_delta("OLD", "-")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_period_rollup_update
+        AFTER UPDATE ON daily_rollup WHEN {valid_new}
+        BEGIN {_period_delta("OLD", "-")} {_period_delta("NEW", "")} END
+    ''')
+
+
+# ---------- running timer ----------
+# One row per user with a practice timer in progress, checkpointed while it
+# runs so a session survives navigation, restarts and crashes.
+def _tracker_active_sessions(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS active_sessions (
+            username TEXT PRIMARY KEY,
+            started_at TEXT NOT NULL,
+            ended_at TEXT,
+            elapsed_seconds REAL NOT NULL DEFAULT 0,
+            checkpoint_at TEXT NOT NULL
+        )
+    ''')
+
+
+# ---------- bulk loading ----------
+# While bulk_load holds a row, the per-row triggers behind the rollups,
+# period rollups, data stamps and achievement state stand down; the bulk
+# loader inserts its batch and applies the aggregates set-based in the
+# same transaction.
+_NOT_BULK_LOADING = "NOT EXISTS (SELECT 1 FROM bulk_load)"
+
+
+def _guard_trigger(cursor, name, event):
+    # Recreates the trigger with the bulk-load guard ANDed into its WHEN
+    sql = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)).fetchone()[0]
+    head, _, rest = sql.partition(event)
+    condition = rest.lstrip()
+    if condition.upper().startswith("WHEN "):
+        rest = f" WHEN {_NOT_BULK_LOADING} AND {condition[5:]}"
+    else:
+        rest = f" WHEN {_NOT_BULK_LOADING}{rest}"
+    cursor.execute(f"DROP TRIGGER {name}")
+    cursor.execute(head + event + rest)
+
+
+def _tracker_bulk_load(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bulk_load (
+            id INTEGER PRIMARY KEY CHECK (id = 1)
+        )
+    ''')
+    _guard_trigger(cursor, "trg_rollup_session_insert", "AFTER INSERT ON practice_sessions")
+    _guard_trigger(cursor, "trg_achievements_session_insert", "AFTER INSERT ON practice_sessions")
+    _guard_trigger(cursor, "trg_period_rollup_insert", "AFTER INSERT ON daily_rollup")
+    _guard_trigger(cursor, "trg_period_rollup_update", "AFTER UPDATE ON daily_rollup")
+    _guard_trigger(cursor, "trg_data_version_rollup_insert", "AFTER INSERT ON daily_rollup")
+    _guard_trigger(cursor, "trg_data_version_rollup_update", "AFTER UPDATE ON daily_rollup")
+
+
+# ---------- goal progress ----------
+# A goal counts the practice minutes inside its window, start_date through
+# due_date (either end open when NULL; an open start still leaves out
+# sessions of unknown date). progress_minutes is kept by triggers on
+# daily_rollup, so saving a session touches only the goals whose window
+# holds its day. A goal whose progress reaches its target is marked
+# completed, and stays completed.
+GOAL_WINDOW = "{day} BETWEEN COALESCE({goal}.start_date, '0000-01-01') AND COALESCE({goal}.due_date, '9999-12-31')"
+_GOAL_REACHED = "target_minutes > 0 AND progress_minutes >= target_minutes"
+
+# Every goal's progress in one pass over the rollup
+GOAL_PROGRESS_QUERY = f"""
+    SELECT g.id, COALESCE(SUM(r.minutes), 0) AS minutes
+    FROM goals g LEFT JOIN daily_rollup r
+      ON r.username = g.username AND {GOAL_WINDOW.format(day="r.day", goal="g")}
+    GROUP BY g.id
+"""
+
+
+def _goal_progress_delta(row, sign):
+    return f'''
+        UPDATE goals SET
+            progress_minutes = progress_minutes {sign} {row}.minutes,
+            completed = CASE WHEN target_minutes > 0 AND progress_minutes {sign} {row}.minutes >= target_minutes
+                             THEN 1 ELSE completed END
+        WHERE username = {row}.username AND {GOAL_WINDOW.format(day=f"{row}.day", goal="goals")};
+    '''
+
+
+def _pad_date(text):
+    # Goal dates were stored as typed (2025-7-6), which sorts and compares
+    # wrongly against the padded session dates
+    try:
+        return datetime.strptime(text.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except (AttributeError, ValueError):
+        return text
+
+
+def _tracker_goal_progress(cursor):
+    _add_column(cursor, "goals", "start_date", "TEXT")
+    _add_column(cursor, "goals", "progress_minutes", "INTEGER NOT NULL DEFAULT 0")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_goals_user_due
+        ON goals (username, due_date)
+    ''')
+
+    rows = cursor.execute("SELECT id, due_date FROM goals WHERE due_date IS NOT NULL").fetchall()
+    cursor.executemany("UPDATE goals SET due_date = ? WHERE id = ?",
+                       [(_pad_date(due), goal_id) for goal_id, due in rows if _pad_date(due) != due])
+    # Existing goals have no record of when they were set. One still open
+    # counts from today rather than being completed by everything practiced
+    # before; one already past due keeps an open start (NULL), so its window
+    # is still possible and it counts everything practiced by the due date.
+    cursor.execute("""
+        UPDATE goals SET start_date = date('now', 'localtime')
+        WHERE start_date IS NULL AND COALESCE(due_date, '9999-12-31') >= date('now', 'localtime')
+    """)
+
+    cursor.execute(f'''
+        UPDATE goals SET progress_minutes = progress.minutes
+        FROM ({GOAL_PROGRESS_QUERY}) AS progress
+        WHERE goals.id = progress.id
+    ''')
+    cursor.execute(f"UPDATE goals SET completed = 1 WHERE completed = 0 AND {_GOAL_REACHED}")
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_goal_progress_rollup_insert
+        AFTER INSERT ON daily_rollup
+        BEGIN {_goal_progress_delta("NEW", "+")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_goal_progress_rollup_delete
+        AFTER DELETE ON daily_rollup
+        BEGIN {_goal_progress_delta("OLD", "-")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_goal_progress_rollup_update
+        AFTER UPDATE ON daily_rollup
+        BEGIN {_goal_progress_delta("OLD", "-")} {_goal_progress_delta("NEW", "+")} END
+    ''')
+
+    # Completion can now be set from inside the rollup upsert, and SQLite
+    # lets an upsert's conflict handling override the OR IGNORE of nested
+    # trigger statements, so the goal counter's state row is created with
+    # NOT EXISTS instead.
+    cursor.execute("DROP TRIGGER IF EXISTS trg_achievements_goal_update")
+    cursor.execute('''
+        CREATE TRIGGER trg_achievements_goal_update
+        AFTER UPDATE OF username, completed ON goals
+        BEGIN
+            UPDATE achievement_state SET goals_completed = goals_completed - COALESCE(OLD.completed = 1, 0)
+            WHERE username = COALESCE(OLD.username, '');
+            INSERT INTO achievement_state (username)
+            SELECT COALESCE(NEW.username, '')
+            WHERE NOT EXISTS (SELECT 1 FROM achievement_state WHERE username = COALESCE(NEW.username, ''));
+            UPDATE achievement_state SET goals_completed = goals_completed + COALESCE(NEW.completed = 1, 0)
+            WHERE username = COALESCE(NEW.username, '');
+        END
+    ''')
+
+    # A new goal, or one whose window or target changed, is counted from the
+    # rollup once; the range scan covers only that user's days in the window
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_goal_progress_goal_insert
+        AFTER INSERT ON goals
+        BEGIN
+            UPDATE goals SET progress_minutes = (
+                SELECT COALESCE(SUM(minutes), 0) FROM daily_rollup r
+                WHERE r.username = NEW.username AND {GOAL_WINDOW.format(day="r.day", goal="NEW")}
+            ) WHERE id = NEW.id;
+            UPDATE goals SET completed = 1 WHERE id = NEW.id AND completed = 0 AND {_GOAL_REACHED};
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_goal_progress_goal_update
+        AFTER UPDATE OF username, start_date, due_date, target_minutes ON goals
+        BEGIN
+            UPDATE goals SET progress_minutes = (
+                SELECT COALESCE(SUM(minutes), 0) FROM daily_rollup r
+                WHERE r.username = NEW.username AND {GOAL_WINDOW.format(day="r.day", goal="NEW")}
+            ) WHERE id = NEW.id;
+            UPDATE goals SET completed = 1 WHERE id = NEW.id AND completed = 0 AND {_GOAL_REACHED};
+        END
+    ''')
+
+
+# Steps are applied in order; never edit or reorder a released step,
+# append a new one instead.
+MIGRATIONS = [
+    _tracker_base_tables,
+    _tracker_indexes,
+    _tracker_consolidate_stores,
+    _tracker_daily_rollup,
+    _tracker_achievement_state,
+    _tracker_history_index,
+    _tracker_notes_search,
+    _tracker_data_versions,
+    _tracker_period_rollup,
+    _tracker_active_sessions,
+    _tracker_bulk_load,
+    _tracker_goal_progress,
+]
+
+
+def migrate(conn):
+    steps = MIGRATIONS
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= len(steps):
+        return version
+
+    for number, step in enumerate(steps[version:], start=version + 1):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    return len(steps)
@@ -1,38 +1,13 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
 import sqlite3
-import os
-
-# ---------- DATABASE SETUP ----------
-conn = sqlite3.connect('music_tracker.db')
-cursor = conn.cursor()
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        password TEXT NOT NULL
-    )
-''')
-
-
-
-
-# Ensure columns exist
-try:
-    cursor.execute("ALTER TABLE users ADD COLUMN instrument TEXT")
-except sqlite3.OperationalError:
-    pass
-try:
-    cursor.execute("ALTER TABLE users ADD COLUMN exam_year TEXT")
-except sqlite3.OperationalError:
-    pass
-conn.commit()
+import accounts
 
 # ---------- MAIN APP ----------
 class MusicLoginApp:
-    def __init__(self, root):
+    def __init__(self, root, on_login=None):
         self.root = root
+        self.on_login = on_login
         self.root.title("Music Practice Tracker - Login")
 
         # ✅ Fixed window settings to show title bar with buttons
@@ -44,17 +19,23 @@ class MusicLoginApp:
 
         self.root.configure(bg="#F0EBE3")
 
+        # Everything lives in one frame so the app can swap screens in-process
+        self.frame = tk.Frame(self.root, bg="#F0EBE3")
+        self.frame.pack(fill="both", expand=True)
+
         # ---------- TOP TITLE ----------
-        top_title = tk.Label(self.root, text="🎵 Music Practice Tracker", font=("Helvetica", 32, "bold"),
+        top_title = tk.Label(self.frame, text="🎵 Music Practice Tracker", font=("Helvetica", 32, "bold"),
                              bg="#F0EBE3", fg="#1E1E1E")
         top_title.pack(pady=30)
 
         # ---------- CENTER FRAME ----------
-        main_frame = tk.Frame(self.root, bg="#FFFFFF", bd=2, relief="groove")
+        main_frame = tk.Frame(self.frame, bg="#FFFFFF", bd=2, relief="groove")
         main_frame.place(relx=0.5, rely=0.5, anchor="center", width=520)
 
         # ---------- Logo Image ----------
         try:
+            from PIL import Image, ImageTk  # optional; falls back to the emoji logo
+
             logo_img = Image.open("logo.png").resize((100, 100))
             logo_photo = ImageTk.PhotoImage(logo_img)
             logo_label = tk.Label(main_frame, image=logo_photo, bg="#FFFFFF")
@@ -90,7 +71,7 @@ class MusicLoginApp:
         self.add_button(main_frame, "Register", self.register, "#27ae60")
 
         # ---------- Exit Button ----------
-        tk.Button(self.root, text="Exit", command=self.root.quit,
+        tk.Button(self.frame, text="Exit", command=self.root.quit,
                   font=("Arial", 11, "bold"), bg="#C0392B", fg="white",
                   relief="flat", padx=10, pady=4).place(relx=0.98, rely=0.02, anchor="ne")
 
@@ -125,20 +106,17 @@ class MusicLoginApp:
             messagebox.showwarning("Input Error", "Please enter username and password.")
             return
 
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-        user = cursor.fetchone()
+        match = accounts.check_password(username, password)
 
-        if user:
-            if user[2] == password:
+        if match is not None:
+            if match:
                 messagebox.showinfo("Login Successful", f"Welcome, {username}!")
                 self.open_main_app(username)
             else:
                 messagebox.showerror("Login Failed", "Invalid password.")
         else:
             try:
-                cursor.execute("INSERT INTO users (username, password, instrument, exam_year) VALUES (?, ?, ?, ?)",
-                               (username, password, instrument, exam_year))
-                conn.commit()
+                accounts.register_user(username, password, instrument, exam_year)
                 messagebox.showinfo("Registration Successful", f"Account created for {username}. Logging in...")
                 self.open_main_app(username)
             except sqlite3.IntegrityError:
@@ -156,26 +134,23 @@ class MusicLoginApp:
             return
 
         try:
-            cursor.execute("INSERT INTO users (username, password, instrument, exam_year) VALUES (?, ?, ?, ?)",
-                           (username, password, instrument, exam_year))
-            conn.commit()
+            accounts.register_user(username, password, instrument, exam_year)
             messagebox.showinfo("Registration Successful", "Now you can log in.")
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Username already exists.")
 
     # ---------- OPEN MAIN APP ----------
     def open_main_app(self, username):
-        self.root.destroy()
-        if os.path.exists("main.py"):
-            os.system("python main.py")
+        if self.on_login:
+            self.on_login(username)
         else:
-            messagebox.showinfo("Next Page", f"(main.py not found) Logged in as {username}")
+            messagebox.showinfo("Next Page", f"Logged in as {username}")
 
 # ---------- RUN ----------
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = MusicLoginApp(root)
-    root.mainloop()
+    from app import run
+
+    run()
 
 
 
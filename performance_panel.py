@@ -0,0 +1,114 @@
+# performance_panel.py
+# The "Performance" view, offered in the sidebar only when instrumentation
+# is enabled (MUSIC_TRACKER_PROFILE=1). Shows the timings collected by
+# instrumentation.py and the most recent slow queries with their plans.
+import tkinter as tk
+from tkinter import ttk
+import instrumentation
+
+REFRESH_MS = 1000
+CATEGORIES = ("All", "view", "sql", "draw", "sqlite")
+STAT_COLUMNS = ("Category", "Name", "Count", "Total (ms)", "Mean (ms)", "Max (ms)")
+
+
+def create_performance_frame(parent, username):
+    for widget in parent.winfo_children():
+        widget.destroy()
+
+    frame = tk.Frame(parent, bg="#F2F6FC")
+    frame.pack(fill="both", expand=True, padx=30, pady=30)
+
+    tk.Label(frame, text="⏱️ Performance", font=("Helvetica", 20, "bold"),
+             bg="#FFFFFF", fg="#2B2B2B").pack(pady=10)
+    tk.Label(frame, text=f"Logging to {instrumentation.LOG_FILE}; queries slower than "
+                         f"{instrumentation.slow_query_ms():g} ms are logged with their query plan.",
+             font=("Helvetica", 10), bg="#F2F6FC", fg="#555555").pack(anchor="w")
+
+    # ---------- Controls ----------
+    controls = tk.Frame(frame, bg="#F2F6FC")
+    controls.pack(fill="x", pady=8)
+
+    tk.Label(controls, text="Show:", bg="#F2F6FC", font=("Helvetica", 10)).pack(side="left")
+    category_var = tk.StringVar(value=CATEGORIES[0])
+    category_menu = ttk.Combobox(controls, textvariable=category_var, values=CATEGORIES,
+                                 state="readonly", width=10)
+    category_menu.pack(side="left", padx=5)
+
+    button_style = dict(bg="#F8C8DC", fg="#2B2B2B", font=("Helvetica", 10, "bold"),
+                        activebackground="#A084E8", activeforeground="#FFFFFF", cursor="hand2")
+
+    # ---------- Timings ----------
+    stats_tree = ttk.Treeview(frame, columns=STAT_COLUMNS, show="headings", height=14)
+    for col in STAT_COLUMNS:
+        stats_tree.heading(col, text=col)
+        stats_tree.column(col, width=90, anchor="e")
+    stats_tree.column("Category", width=70, anchor="center")
+    stats_tree.column("Name", width=520, anchor="w")
+    stats_tree.pack(fill="both", expand=True)
+
+    # ---------- Slow queries ----------
+    tk.Label(frame, text="Slow queries", font=("Helvetica", 12, "bold"),
+             bg="#F2F6FC", fg="#2B2B2B").pack(anchor="w", pady=(10, 0))
+    slow_text = tk.Text(frame, height=10, wrap="none", font=("Courier", 9), bg="#FFFFFF")
+    slow_text.pack(fill="both", expand=True)
+
+    refresh_job = {"id": None}
+    shown = {"stats": None, "slow": None}
+
+    def show_stats():
+        category = category_var.get()
+        rows = [row for row in instrumentation.snapshot()
+                if category == "All" or row[0] == category]
+        if rows == shown["stats"]:
+            return
+        shown["stats"] = rows
+
+        stats_tree.delete(*stats_tree.get_children())
+        for category, name, count, total, longest in rows:
+            mean = f"{total / count:.2f}" if count else ""
+            stats_tree.insert("", "end", values=(category, name, count, f"{total:.1f}", mean, f"{longest:.2f}"))
+
+    def show_slow_queries():
+        queries = instrumentation.slow_queries()
+        if queries == shown["slow"]:
+            return
+        shown["slow"] = queries
+
+        slow_text.config(state="normal")
+        slow_text.delete("1.0", "end")
+        for when, ms, sql, plan in reversed(queries):
+            slow_text.insert("end", f"{when}  {ms:.1f} ms  {sql}\n{plan}\n\n")
+        if not queries:
+            slow_text.insert("end", "No slow queries yet.")
+        slow_text.config(state="disabled")
+
+    def refresh():
+        show_stats()
+        show_slow_queries()
+
+    def tick():
+        refresh()
+        refresh_job["id"] = frame.after(REFRESH_MS, tick)
+
+    def reset():
+        instrumentation.reset()
+        refresh()
+
+    def on_show():
+        if refresh_job["id"] is None:
+            tick()
+
+    def on_hide():
+        if refresh_job["id"] is not None:
+            frame.after_cancel(refresh_job["id"])
+            refresh_job["id"] = None
+
+    category_menu.bind("<<ComboboxSelected>>", lambda e: show_stats())
+    tk.Button(controls, text="🔄 Refresh", command=refresh, **button_style).pack(side="left", padx=8)
+    tk.Button(controls, text="🧹 Reset", command=reset, **button_style).pack(side="left", padx=8)
+
+    frame.refresh = refresh
+    frame.on_show = on_show
+    frame.on_hide = on_hide
+
+    return frame
@@ -1,7 +1,130 @@
 # practice_history.py
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
+from tkinter import ttk, messagebox, filedialog
+from collections import deque
+from datetime import datetime
+import db
+import import_export
+from tasks import TaskRunner
+
+PAGE_SIZE = 100
+ALL_INSTRUMENTS = "All"
+UNDO_LIMIT = 20
+
+SESSION_COLUMNS = ("id", "username", "date", "instrument", "duration", "notes", "start_time", "end_time", "focus")
+# Columns shown in the Treeview, in display order
+EDITABLE_COLUMNS = ("date", "instrument", "duration", "notes")
+
+# Treeview column -> SQL sort expression. NULLs are folded so the keyset
+# comparison never skips rows; date is never NULL and stays index-friendly.
+SORT_COLUMNS = {
+    "Date": "date",
+    "Instrument": "COALESCE(instrument, '')",
+    "Duration (min)": "COALESCE(duration, 0)",
+    "Practice": "COALESCE(notes, '')",
+}
+
+# ---------- DATABASE FUNCTIONS ----------
+@db.remote()
+def fetch_history_page(username, sort_column="Date", descending=True, after=None,
+                       instrument=None, start_date=None, end_date=None, limit=PAGE_SIZE):
+    # Keyset pagination on (sort key, id): `after` is the (sort key, id) of
+    # the last row already shown. Returns rows of
+    # (id, date, instrument, duration, notes, sort key).
+    sort_expr = SORT_COLUMNS[sort_column]
+    order = "DESC" if descending else "ASC"
+
+    clauses = ["username = ?"]
+    params = [username]
+    if instrument:
+        clauses.append("instrument = ?")
+        params.append(instrument)
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if after is not None:
+        clauses.append(f"({sort_expr}, id) {'<' if descending else '>'} (?, ?)")
+        params.extend(after)
+    params.append(limit)
+
+    return db.query(f"""
+        SELECT id, date, instrument, duration, notes, {sort_expr}
+        FROM practice_sessions
+        WHERE {" AND ".join(clauses)}
+        ORDER BY {sort_expr} {order}, id {order}
+        LIMIT ?
+    """, params)
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def _placeholders(chunk):
+    return ", ".join("?" * len(chunk))
+
+@db.remote(writes=True)
+def delete_sessions(username, session_ids):
+    # Deletes by primary key in one transaction; returns the full rows so
+    # the delete can be undone.
+    deleted = []
+    with db.transaction() as cursor:
+        for chunk in _chunks(session_ids):
+            marks = _placeholders(chunk)
+            deleted += cursor.execute(f"""
+                SELECT {", ".join(SESSION_COLUMNS)} FROM practice_sessions
+                WHERE username = ? AND id IN ({marks})
+            """, [username, *chunk]).fetchall()
+            cursor.execute(f"DELETE FROM practice_sessions WHERE username = ? AND id IN ({marks})",
+                           [username, *chunk])
+    return deleted
+
+@db.remote(writes=True)
+def restore_sessions(username, rows):
+    # Re-inserts rows returned by delete_sessions, always for this user
+    with db.transaction() as cursor:
+        cursor.executemany(f"""
+            INSERT INTO practice_sessions ({", ".join(SESSION_COLUMNS)})
+            VALUES ({_placeholders(SESSION_COLUMNS)})
+        """, [(row[0], username, *row[2:]) for row in rows])
+
+@db.remote(writes=True)
+def update_sessions(username, session_ids, changes):
+    # Applies the same column changes to every id in one transaction and
+    # returns (id, old values...) for just the changed columns.
+    columns = [col for col in EDITABLE_COLUMNS if col in changes]
+    if not columns:
+        return columns, []
+    assignments = ", ".join(f"{col} = ?" for col in columns)
+    previous = []
+    with db.transaction() as cursor:
+        for chunk in _chunks(session_ids):
+            marks = _placeholders(chunk)
+            previous += cursor.execute(f"""
+                SELECT id, {", ".join(columns)} FROM practice_sessions
+                WHERE username = ? AND id IN ({marks})
+            """, [username, *chunk]).fetchall()
+            cursor.execute(f"UPDATE practice_sessions SET {assignments} WHERE username = ? AND id IN ({marks})",
+                           [*(changes[col] for col in columns), username, *chunk])
+    return columns, previous
+
+@db.remote(writes=True)
+def revert_updates(username, columns, previous):
+    # Undoes update_sessions given the (columns, previous) it returned
+    if not set(columns) <= set(EDITABLE_COLUMNS):
+        raise ValueError(f"only {', '.join(EDITABLE_COLUMNS)} can be reverted")
+    assignments = ", ".join(f"{col} = ?" for col in columns)
+    with db.transaction() as cursor:
+        cursor.executemany(f"UPDATE practice_sessions SET {assignments} WHERE id = ? AND username = ?",
+                           [(*row[1:], row[0], username) for row in previous])
+
+@db.remote()
+def fetch_instruments(username):
+    return [row[0] for row in db.query(
+        "SELECT DISTINCT instrument FROM daily_rollup WHERE username = ? ORDER BY instrument", (username,))]
 
 def create_practice_history_frame(parent, username):
     # Main Frame
@@ -18,6 +141,23 @@ def create_practice_history_frame(parent, username):
     )
     title.pack(pady=10)
 
+    # ---------- Filters (applied in SQL) ----------
+    filter_frame = tk.Frame(frame, bg="#FFFFFF")
+    filter_frame.pack(pady=(0, 10))
+
+    tk.Label(filter_frame, text="Instrument:", font=("Helvetica", 10), bg="#FFFFFF").grid(row=0, column=0, padx=5)
+    instrument_var = tk.StringVar(value=ALL_INSTRUMENTS)
+    instrument_menu = ttk.Combobox(filter_frame, textvariable=instrument_var, state="readonly", width=14)
+    instrument_menu.grid(row=0, column=1)
+
+    tk.Label(filter_frame, text="From (YYYY-MM-DD):", font=("Helvetica", 10), bg="#FFFFFF").grid(row=0, column=2, padx=5)
+    start_entry = tk.Entry(filter_frame, font=("Helvetica", 10), width=12)
+    start_entry.grid(row=0, column=3)
+
+    tk.Label(filter_frame, text="To (YYYY-MM-DD):", font=("Helvetica", 10), bg="#FFFFFF").grid(row=0, column=4, padx=5)
+    end_entry = tk.Entry(filter_frame, font=("Helvetica", 10), width=12)
+    end_entry.grid(row=0, column=5)
+
     # Treeview Frame with Scrollbar
     tree_frame = tk.Frame(frame, bg="#F2F6FC")
     tree_frame.pack(fill="both", expand=True, padx=20, pady=(0, 10))
@@ -31,34 +171,52 @@ def create_practice_history_frame(parent, username):
         tree_frame,
         columns=columns,
         show="headings",
-        yscrollcommand=tree_scroll.set,
+        yscrollcommand=lambda first, last: on_tree_scroll(first, last),
+        selectmode="extended",
         height=15
     )
     tree_scroll.config(command=tree.yview)
 
     # Style
-    style = ttk.Style()
-    style.theme_use("clam")
-    style.configure(
-        "Treeview",
-        background="#FFFFFF",        # Table background
-        foreground="#2B2B2B",        # Text color
-        rowheight=30,
-        fieldbackground="#FFFFFF",
-        bordercolor="#FFFFFF",
-        font=("Helvetica", 10)
-    )
-    style.configure(
-        "Treeview.Heading",
-        background="#A084E8",        # Accent color for heading
-        foreground="#FFFFFF",
-        font=("Helvetica", 10, "bold")
-    )
-    style.map("Treeview", background=[("selected", "#F8C8DC")])  # Selection color
+    def apply_style():
+        style = ttk.Style()
+        style.theme_use("clam")
+        style.configure(
+            "Treeview",
+            background="#FFFFFF",        # Table background
+            foreground="#2B2B2B",        # Text color
+            rowheight=30,
+            fieldbackground="#FFFFFF",
+            bordercolor="#FFFFFF",
+            font=("Helvetica", 10)
+        )
+        style.configure(
+            "Treeview.Heading",
+            background="#A084E8",        # Accent color for heading
+            foreground="#FFFFFF",
+            font=("Helvetica", 10, "bold")
+        )
+        style.map("Treeview", background=[("selected", "#F8C8DC")])  # Selection color
+
+    apply_style()
+
+    # Paging state: rows are fetched a page at a time as the user scrolls
+    state = {
+        "sort_column": "Date",
+        "descending": True,
+        "filters": {},
+        "last_key": None,
+        "exhausted": False,
+        "loading": False,
+        "load_pending": False,
+    }
+    loaded = {}  # iid -> (id, date, instrument, duration, notes) for rows in the tree
+    moved_out = {}  # iid -> row for rows an edit moved past the keyset cursor
+    undo_journal = deque(maxlen=UNDO_LIMIT)
 
     # Configure headings & columns
     for col in columns:
-        tree.heading(col, text=col)
+        tree.heading(col, text=col, command=lambda c=col: sort_by(c))
         if col == "Notes":
             tree.column(col, anchor="w", width=350)
         else:
@@ -66,48 +224,273 @@ def create_practice_history_frame(parent, username):
 
     tree.pack(fill="both", expand=True)
 
+    def update_headings():
+        for col in columns:
+            arrow = ""
+            if col == state["sort_column"]:
+                arrow = " ▼" if state["descending"] else " ▲"
+            tree.heading(col, text=col + arrow)
+
+    def load_next_page():
+        if state["exhausted"] or state["loading"]:
+            return
+        state["loading"] = True
+        try:
+            rows = fetch_history_page(username, state["sort_column"], state["descending"],
+                                      after=state["last_key"], **state["filters"])
+            for session_id, date, instrument, duration, notes, sort_key in rows:
+                state["last_key"] = (sort_key, session_id)
+                # A row edited past the cursor comes round again
+                if str(session_id) in loaded:
+                    continue
+                tree.insert("", "end", iid=str(session_id), values=(date, instrument, duration, notes))
+                loaded[str(session_id)] = (session_id, date, instrument, duration, notes)
+                moved_out.pop(str(session_id), None)
+            state["exhausted"] = len(rows) < PAGE_SIZE
+        finally:
+            state["loading"] = False
+
+    def near_end(last):
+        return float(last) > 0.9 and not state["exhausted"]
+
+    def load_more():
+        # The scroll position is checked again when the load runs, since a
+        # page loaded meanwhile may have moved the end out of reach
+        state["load_pending"] = False
+        if near_end(tree.yview()[1]):
+            load_next_page()
+
+    def on_tree_scroll(first, last):
+        tree_scroll.set(first, last)
+        # Fetch the next page once the user nears the end of what is loaded;
+        # a burst of scroll events schedules a single load
+        if near_end(last) and not state["load_pending"]:
+            state["load_pending"] = True
+            tree.after_idle(load_more)
+
     # Load Data from DB
     def load_data():
-        conn = sqlite3.connect("music_tracker.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT date, instrument, duration, notes
-            FROM practice_sessions
-            WHERE username = ?
-            ORDER BY date DESC
-        """, (username,))
-        rows = cursor.fetchall()
         tree.delete(*tree.get_children())
-        for row in rows:
-            tree.insert("", "end", values=row)
-        conn.close()
+        loaded.clear()
+        moved_out.clear()
+        state["last_key"] = None
+        state["exhausted"] = False
+        update_headings()
+        load_next_page()
+        instrument_menu["values"] = [ALL_INSTRUMENTS] + fetch_instruments(username)
+
+    def sort_by(col):
+        if col == state["sort_column"]:
+            state["descending"] = not state["descending"]
+        else:
+            state["sort_column"] = col
+            state["descending"] = col != "Instrument" and col != "Practice"
+        load_data()
+
+    def apply_filters():
+        start = start_entry.get().strip()
+        end = end_entry.get().strip()
+        try:
+            if start: datetime.strptime(start, "%Y-%m-%d")
+            if end: datetime.strptime(end, "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Invalid Date", "Please enter valid dates in YYYY-MM-DD format.")
+            return
+        instrument = instrument_var.get()
+        state["filters"] = {
+            "instrument": instrument if instrument != ALL_INSTRUMENTS else None,
+            "start_date": start or None,
+            "end_date": end or None,
+        }
+        load_data()
+
+    tk.Button(filter_frame, text="Filter", font=("Helvetica", 10, "bold"),
+              command=apply_filters, bg="#A084E8", fg="white").grid(row=0, column=6, padx=10)
 
     load_data()
 
-    # Delete Record
+    # ---------- In-place Treeview updates ----------
+    def sort_key(row):
+        session_id, date, instrument, duration, notes = row
+        key = {
+            "Date": date,
+            "Instrument": instrument or "",
+            "Duration (min)": duration or 0,
+            "Practice": notes or "",
+        }[state["sort_column"]]
+        return (key, session_id)
+
+    def matches_filters(row):
+        _, date, instrument, _, _ = row
+        filters = state["filters"]
+        if filters.get("instrument") and instrument != filters["instrument"]:
+            return False
+        if filters.get("start_date") and date < filters["start_date"]:
+            return False
+        if filters.get("end_date") and date > filters["end_date"]:
+            return False
+        return True
+
+    def beyond_cursor(row):
+        # True if a later page will fetch the row
+        if state["exhausted"]:
+            return False
+        if state["last_key"] is None:
+            return True
+        key = sort_key(row)
+        return key < state["last_key"] if state["descending"] else key > state["last_key"]
+
+    def insert_in_order(row):
+        # Puts a restored row back at its sorted position among the loaded
+        # rows; rows beyond the loaded range arrive with a later page.
+        if not matches_filters(row) or beyond_cursor(row):
+            return
+        key = sort_key(row)
+        for index, iid in enumerate(tree.get_children()):
+            other = sort_key(loaded[iid])
+            if (key > other) if state["descending"] else (key < other):
+                break
+        else:
+            index = "end"
+        iid = str(row[0])
+        tree.insert("", index, iid=iid, values=row[1:])
+        loaded[iid] = row
+
+    def set_row(iid, row):
+        # An edit that moves a row past the keyset cursor drops it from the
+        # tree; the page that reaches its new position shows it again
+        if beyond_cursor(row):
+            tree.delete(iid)
+            loaded.pop(iid, None)
+            moved_out[iid] = row
+            return
+        loaded[iid] = row
+        tree.item(iid, values=row[1:])
+
+    def update_undo_button():
+        undo_btn.config(state="normal" if undo_journal else "disabled")
+
+    # ---------- Bulk Delete ----------
     def delete_entry():
-        selected = tree.focus()
+        selected = tree.selection()
         if not selected:
-            messagebox.showwarning("Select Entry", "Please select a record to delete.")
+            messagebox.showwarning("Select Entry", "Please select one or more records to delete.")
             return
-        values = tree.item(selected, "values")
-        confirm = messagebox.askyesno("Confirm Delete", f"Delete session from {values[0]}?")
-        if confirm:
-            conn = sqlite3.connect("music_tracker.db")
-            cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM practice_sessions
-                WHERE username = ? AND date = ? AND instrument = ? AND duration = ? AND notes = ?
-            """, (username, values[0], values[1], values[2], values[3]))
-            conn.commit()
-            conn.close()
-            load_data()
+        count = len(selected)
+        prompt = (f"Delete session from {loaded[selected[0]][1]}?" if count == 1
+                  else f"Delete {count} selected sessions?")
+        if not messagebox.askyesno("Confirm Delete", prompt):
+            return
+        try:
+            deleted = delete_sessions(username, [loaded[iid][0] for iid in selected])
+        except Exception as e:
+            messagebox.showerror("Database Error", str(e))
+            return
+        undo_journal.append(("delete", deleted))
+        tree.delete(*selected)
+        for iid in selected:
+            loaded.pop(iid, None)
+        update_undo_button()
 
-    # Delete Button
-    delete_btn = tk.Button(
-        frame,
-        text="🗑️ Delete Selected",
-        command=delete_entry,
+    # ---------- Bulk Edit ----------
+    def edit_entry():
+        selected = tree.selection()
+        if not selected:
+            messagebox.showwarning("Select Entry", "Please select one or more records to edit.")
+            return
+        single = len(selected) == 1
+
+        edit_win = tk.Toplevel(frame)
+        edit_win.title("Edit Session" if single else f"Edit {len(selected)} Sessions")
+        edit_win.configure(bg="#FFFFFF")
+
+        if not single:
+            tk.Label(edit_win, text="Leave a field blank to keep each session's value.",
+                     bg="#FFFFFF", fg="#7B8FA1", font=("Helvetica", 9)).grid(row=0, column=0, columnspan=2, pady=(10, 0))
+
+        entries = {}
+        for row_index, (column, label) in enumerate(zip(EDITABLE_COLUMNS, columns), start=1):
+            tk.Label(edit_win, text=f"{label}:", bg="#FFFFFF", fg="#2B2B2B",
+                     font=("Helvetica", 10)).grid(row=row_index, column=0, sticky="e", padx=10, pady=5)
+            entry = tk.Entry(edit_win, font=("Helvetica", 10), width=40)
+            entry.grid(row=row_index, column=1, padx=10, pady=5)
+            if single:
+                value = loaded[selected[0]][row_index]
+                entry.insert(0, "" if value is None else str(value))
+            entries[column] = entry
+
+        def save_edit():
+            values = {column: entry.get().strip() for column, entry in entries.items()}
+            changes = {column: value for column, value in values.items() if single or value}
+            # A blank date keeps a legacy session's date unknown
+            if changes.get("date"):
+                try:
+                    datetime.strptime(changes["date"], "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Invalid Date", "Please enter the date in YYYY-MM-DD format.", parent=edit_win)
+                    return
+            if "duration" in changes:
+                if not changes["duration"].isdigit():
+                    messagebox.showerror("Invalid Input", "Duration must be a whole number of minutes.", parent=edit_win)
+                    return
+                changes["duration"] = int(changes["duration"])
+            if single and not changes.get("instrument"):
+                messagebox.showerror("Invalid Input", "Please enter an instrument.", parent=edit_win)
+                return
+
+            try:
+                changed_columns, previous = update_sessions(username, [loaded[iid][0] for iid in selected], changes)
+            except Exception as e:
+                messagebox.showerror("Database Error", str(e), parent=edit_win)
+                return
+            if previous:
+                undo_journal.append(("edit", changed_columns, previous))
+                for iid in selected:
+                    row = list(loaded[iid])
+                    for column in changed_columns:
+                        row[1 + EDITABLE_COLUMNS.index(column)] = changes[column]
+                    set_row(iid, tuple(row))
+                update_undo_button()
+            edit_win.destroy()
+
+        tk.Button(edit_win, text="💾 Save", command=save_edit, bg="#A084E8", fg="#FFFFFF",
+                  font=("Helvetica", 10, "bold"), cursor="hand2").grid(row=len(entries) + 1, column=1, sticky="e", padx=10, pady=10)
+
+    # ---------- Undo ----------
+    def undo_last():
+        if not undo_journal:
+            return
+        entry = undo_journal.pop()
+        try:
+            if entry[0] == "delete":
+                _, rows = entry
+                restore_sessions(username, rows)
+                for row in rows:
+                    insert_in_order((row[0], *row[2:6]))
+            else:
+                _, changed_columns, previous = entry
+                revert_updates(username, changed_columns, previous)
+                for session_id, *old_values in previous:
+                    iid = str(session_id)
+                    if iid not in loaded and iid not in moved_out:
+                        continue
+                    row = list(loaded.get(iid) or moved_out.pop(iid))
+                    for column, value in zip(changed_columns, old_values):
+                        row[1 + EDITABLE_COLUMNS.index(column)] = value
+                    if iid in loaded:
+                        set_row(iid, tuple(row))
+                    else:
+                        # Back before the cursor, where no page will fetch it
+                        insert_in_order(tuple(row))
+        except Exception as e:
+            messagebox.showerror("Database Error", f"Could not undo: {e}")
+        update_undo_button()
+
+    # Action Buttons
+    button_frame = tk.Frame(frame, bg="#F2F6FC")
+    button_frame.pack(pady=10)
+
+    button_style = dict(
         bg="#F8C8DC",         # Button color
         fg="#2B2B2B",         # Text color
         font=("Helvetica", 10, "bold"),
@@ -115,7 +498,59 @@ def create_practice_history_frame(parent, username):
         activeforeground="#FFFFFF",
         cursor="hand2"
     )
-    delete_btn.pack(pady=10)
+    tk.Button(button_frame, text="✏️ Edit Selected", command=edit_entry, **button_style).pack(side="left", padx=8)
+    tk.Button(button_frame, text="🗑️ Delete Selected", command=delete_entry, **button_style).pack(side="left", padx=8)
+    undo_btn = tk.Button(button_frame, text="↩️ Undo", command=undo_last, state="disabled", **button_style)
+    undo_btn.pack(side="left", padx=8)
+
+    # ---------- Import / Export ----------
+    # Large files are streamed on a worker thread; the view reloads when done
+    tasks = TaskRunner(frame)
+    file_types = [("CSV files", "*.csv"), ("JSON lines", "*.jsonl *.ndjson"), ("All files", "*.*")]
+
+    def set_transfer_busy(busy):
+        state_value = "disabled" if busy else "normal"
+        import_btn.config(state=state_value)
+        export_btn.config(state=state_value)
+
+    def transfer_failed(error):
+        set_transfer_busy(False)
+        messagebox.showerror("Import / Export Error", str(error))
+
+    def import_file():
+        path = filedialog.askopenfilename(parent=frame, title="Import Practice Sessions", filetypes=file_types)
+        if not path:
+            return
+
+        def done(report):
+            set_transfer_busy(False)
+            load_data()
+            details = "\n".join(f"Line {line}: {message}" for line, message in report.errors[:10])
+            messagebox.showinfo("Import Complete", report.summary() + (f"\n\n{details}" if details else ""))
+
+        set_transfer_busy(True)
+        tasks.submit(lambda: import_export.import_sessions(username, path), done, on_error=transfer_failed)
+
+    def export_file():
+        path = filedialog.asksaveasfilename(parent=frame, title="Export Practice Sessions",
+                                            defaultextension=".csv", filetypes=file_types)
+        if not path:
+            return
+
+        def done(count):
+            set_transfer_busy(False)
+            messagebox.showinfo("Export Complete", f"{count} sessions exported to {path}")
+
+        set_transfer_busy(True)
+        tasks.submit(lambda: import_export.export_sessions(username, path), done, on_error=transfer_failed)
+
+    import_btn = tk.Button(button_frame, text="📥 Import…", command=import_file, **button_style)
+    import_btn.pack(side="left", padx=8)
+    export_btn = tk.Button(button_frame, text="📤 Export…", command=export_file, **button_style)
+    export_btn.pack(side="left", padx=8)
+
+    frame.refresh = load_data
+    frame.on_show = apply_style  # ttk themes are global; other views switch them
 
     return frame
 
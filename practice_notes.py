@@ -1,48 +1,115 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
+import db
 from datetime import datetime
 
-def create_practice_notes_table():
-    conn = sqlite3.connect("music_practice.db")
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS practice_notes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            note TEXT,
-            category TEXT,
-            date TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+CATEGORIES = ["General", "Tone", "Speed", "Rhythm", "Memory", "Expression"]
+ALL_CATEGORIES = "All"
+SEARCH_LIMIT = 100
+SEARCH_DELAY_MS = 250
+# Treeview cells can't style part of a string, so matches are bracketed
+HIGHLIGHT = ("«", "»")
+
+# ---------- SEARCH ----------
+# Ranked by bm25 across both note sources; session notes have no category
+# and are only included when searching all categories.
+FTS_SEARCH_QUERY = """
+    SELECT note, category, date FROM (
+        SELECT snippet(practice_notes_fts, 0, :open, :close, '…', 16) AS note,
+               n.category AS category, n.date AS date, bm25(practice_notes_fts) AS score
+        FROM practice_notes_fts JOIN practice_notes n ON n.id = practice_notes_fts.rowid
+        WHERE practice_notes_fts MATCH :match AND n.username = :username
+          AND (:category IS NULL OR n.category = :category)
+        UNION ALL
+        SELECT snippet(session_notes_fts, 0, :open, :close, '…', 16),
+               'Session · ' || COALESCE(s.instrument, ''), s.date, bm25(session_notes_fts)
+        FROM session_notes_fts JOIN practice_sessions s ON s.id = session_notes_fts.rowid
+        WHERE session_notes_fts MATCH :match AND s.username = :username
+          AND :category IS NULL
+    )
+    ORDER BY score
+    LIMIT :limit
+"""
+
+_fts_enabled = None
+
+
+def fts_enabled():
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = db.query_value(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('practice_notes_fts', 'session_notes_fts')") == 2
+    return _fts_enabled
+
+
+def fts_match_expression(text):
+    # Quotes every word so punctuation in the search box can't break the
+    # FTS5 syntax; the last word is a prefix match so results follow typing.
+    words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+@db.remote()
+def search_notes(username, text, category=None, limit=SEARCH_LIMIT):
+    category = None if category in (None, ALL_CATEGORIES) else category
+    if fts_enabled():
+        return db.query(FTS_SEARCH_QUERY, {
+            "match": fts_match_expression(text), "username": username, "category": category,
+            "open": HIGHLIGHT[0], "close": HIGHLIGHT[1], "limit": limit,
+        })
+
+    # No FTS5 in this SQLite build: unranked substring match on every word
+    words = text.split()
+    note_terms = " AND ".join("note LIKE ?" for _ in words) or "1"
+    session_terms = " AND ".join("notes LIKE ?" for _ in words) or "1"
+    patterns = [f"%{word}%" for word in words]
+    return db.query(f"""
+        SELECT note, category, date FROM practice_notes
+        WHERE username = ? AND (? IS NULL OR category = ?) AND {note_terms}
+        UNION ALL
+        SELECT notes, 'Session · ' || COALESCE(instrument, ''), date FROM practice_sessions
+        WHERE username = ? AND ? IS NULL AND notes != '' AND {session_terms}
+        ORDER BY date DESC
+        LIMIT ?
+    """, [username, category, category, *patterns, username, category, *patterns, limit])
+
+@db.remote(writes=True)
+def add_note(username, note, category):
+    # Returns the new note's id
+    note = str(note).strip()
+    if not note:
+        raise ValueError("missing note")
+    if category not in CATEGORIES:
+        raise ValueError(f"category must be one of {', '.join(CATEGORIES)}")
+    return db.execute("INSERT INTO practice_notes (username, note, category, date) VALUES (?, ?, ?, ?)",
+                      (username, note, category, datetime.now().strftime("%Y-%m-%d %H:%M")))
+
+@db.remote()
+def fetch_notes(username, category=None, limit=-1):
+    # Newest first; a negative limit returns every note
+    category = None if category in (None, ALL_CATEGORIES) else category
+    return db.query("""
+        SELECT note, category, date FROM practice_notes
+        WHERE username = ? AND (? IS NULL OR category = ?)
+        ORDER BY date DESC LIMIT ?
+    """, (username, category, category, limit))
 
 def save_practice_note(username, note, category):
     if not note.strip():
         messagebox.showwarning("Empty Note", "Please enter some practice notes.")
         return
-    conn = sqlite3.connect("music_practice.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO practice_notes (username, note, category, date) VALUES (?, ?, ?, ?)",
-              (username, note.strip(), category, datetime.now().strftime("%Y-%m-%d %H:%M")))
-    conn.commit()
-    conn.close()
+    add_note(username, note, category)
     messagebox.showinfo("Saved", "Practice note saved successfully.")
 
-def load_notes(username, tree):
+def load_notes(username, tree, category=None):
     for item in tree.get_children():
         tree.delete(item)
-    conn = sqlite3.connect("music_practice.db")
-    c = conn.cursor()
-    c.execute("SELECT note, category, date FROM practice_notes WHERE username=? ORDER BY date DESC", (username,))
-    for row in c.fetchall():
+    for row in fetch_notes(username, category):
         tree.insert("", "end", values=row)
-    conn.close()
 
 def create_practice_notes_frame(parent, username):
-    create_practice_notes_table()
-
     frame = tk.Frame(parent, bg= "#F2F6FC")
     frame.pack(fill="both", expand=True)
 
@@ -56,8 +123,7 @@ def create_practice_notes_frame(parent, username):
     tk.Label(form_frame, text="Category:", bg="#FFFFFF", fg="#2B2B2B",
              font=("Helvetica", 12)).grid(row=0, column=0, sticky="e", padx=5, pady=5)
     category_var = tk.StringVar(value="General")
-    categories = ["General", "Tone", "Speed", "Rhythm", "Memory", "Expression"]
-    category_menu = ttk.Combobox(form_frame, textvariable=category_var, values=categories, state="readonly", width=20)
+    category_menu = ttk.Combobox(form_frame, textvariable=category_var, values=CATEGORIES, state="readonly", width=20)
     category_menu.grid(row=0, column=1, sticky="w", pady=5)
 
     # Notes field
@@ -72,7 +138,7 @@ def create_practice_notes_frame(parent, username):
         category = category_var.get()
         save_practice_note(username, note, category)
         notes_text.delete("1.0", tk.END)
-        load_notes(username, notes_tree)
+        show_notes()
 
     tk.Button(form_frame, text="💾 Save Note", font=("Helvetica", 11), bg="#A084E8", fg="#FFFFFF",
               activebackground="#7A5CE3", relief="flat", padx=10, pady=5, command=handle_save).grid(row=2, column=1, sticky="e", pady=10)
@@ -84,6 +150,27 @@ def create_practice_notes_frame(parent, username):
     tk.Label(frame, text="📂 Saved Notes", font=("Helvetica", 14, "bold"),
              bg="#FFFFFF", fg="#2B2B2B").pack()
 
+    # Search bar
+    search_frame = tk.Frame(frame, bg="#F2F6FC")
+    search_frame.pack(pady=(10, 0))
+
+    tk.Label(search_frame, text="🔍 Search:", bg="#F2F6FC", fg="#2B2B2B",
+             font=("Helvetica", 11)).pack(side="left", padx=5)
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(search_frame, textvariable=search_var, width=40, font=("Helvetica", 11),
+                            relief="solid", bd=1)
+    search_entry.pack(side="left", padx=5)
+
+    tk.Label(search_frame, text="Category:", bg="#F2F6FC", fg="#2B2B2B",
+             font=("Helvetica", 11)).pack(side="left", padx=5)
+    filter_var = tk.StringVar(value=ALL_CATEGORIES)
+    filter_menu = ttk.Combobox(search_frame, textvariable=filter_var, values=[ALL_CATEGORIES] + CATEGORIES,
+                               state="readonly", width=14)
+    filter_menu.pack(side="left", padx=5)
+
+    result_label = tk.Label(search_frame, text="", bg="#F2F6FC", fg="#7B8FA1", font=("Helvetica", 10))
+    result_label.pack(side="left", padx=10)
+
     columns = ("Note", "Category", "Date")
     notes_tree = ttk.Treeview(frame, columns=columns, show="headings", height=8)
     for col in columns:
@@ -91,4 +178,35 @@ def create_practice_notes_frame(parent, username):
         notes_tree.column(col, width=150, anchor="center")
     notes_tree.pack(pady=10, padx=20, fill="both", expand=True)
 
-    load_notes(username, notes_tree)
+    pending = {"job": None}
+
+    def show_notes():
+        pending["job"] = None
+        text = search_var.get().strip()
+        if not text:
+            load_notes(username, notes_tree, filter_var.get())
+            result_label.config(text="")
+            return
+
+        rows = search_notes(username, text, filter_var.get())
+        notes_tree.delete(*notes_tree.get_children())
+        for row in rows:
+            notes_tree.insert("", "end", values=row)
+        result_label.config(text=f"{len(rows)} match{'es' if len(rows) != 1 else ''}"
+                                 + (f" (top {SEARCH_LIMIT})" if len(rows) == SEARCH_LIMIT else ""))
+
+    def schedule_search(*_):
+        # Search as the user types, once they pause
+        if pending["job"] is not None:
+            frame.after_cancel(pending["job"])
+        pending["job"] = frame.after(SEARCH_DELAY_MS, show_notes)
+
+    search_var.trace_add("write", schedule_search)
+    search_entry.bind("<Return>", lambda e: show_notes())
+    filter_menu.bind("<<ComboboxSelected>>", lambda e: show_notes())
+
+    show_notes()
+
+    frame.refresh = show_notes
+
+    return frame
@@ -0,0 +1,225 @@
+# practice_timer.py
+# Application-level practice timer. Elapsed time is measured on the
+# monotonic clock, so wall-clock changes (NTP, DST, midnight) can't skew a
+# session; wall time is only read once, at start, to stamp the session.
+# A running timer is checkpointed to active_sessions, which lets it resume
+# after its view is rebuilt, after logout, or after the app is restarted.
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+
+import db
+
+CHECKPOINT_SECONDS = 30
+
+_timers = {}
+_timers_lock = threading.Lock()
+
+
+# ---------- CHECKPOINT STORE ----------
+# Checkpoints are written quietly, so a running timer doesn't mark every
+# view stale.
+@db.remote()
+def load_checkpoint(username):
+    # (started_at, ended_at, elapsed_seconds) or None
+    return db.query_one("""
+        SELECT started_at, ended_at, elapsed_seconds FROM active_sessions WHERE username = ?
+    """, (username,))
+
+
+@db.remote(writes=True, quiet=True)
+def save_checkpoint(username, started_at, ended_at, elapsed, checkpoint_at):
+    db.execute_quiet("""
+        INSERT INTO active_sessions (username, started_at, ended_at, elapsed_seconds, checkpoint_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (username) DO UPDATE SET
+            started_at = excluded.started_at, ended_at = excluded.ended_at,
+            elapsed_seconds = excluded.elapsed_seconds, checkpoint_at = excluded.checkpoint_at
+    """, (username, started_at, ended_at, elapsed, checkpoint_at))
+
+
+@db.remote(writes=True, quiet=True)
+def clear_checkpoint(username):
+    db.execute_quiet("DELETE FROM active_sessions WHERE username = ?", (username,))
+
+
+@db.remote(writes=True)
+def save_timed_session(username, row):
+    # Stores a stopped session (date, instrument, duration, notes,
+    # start_time, end_time, focus) and clears the checkpoint together
+    with db.transaction() as cursor:
+        cursor.execute("""
+            INSERT INTO practice_sessions
+                (username, date, instrument, duration, notes, start_time, end_time, focus)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (username, *row))
+        cursor.execute("DELETE FROM active_sessions WHERE username = ?", (username,))
+
+
+def get_timer(username):
+    # One timer per user for the whole process, restored from the last
+    # checkpoint the first time it is asked for.
+    with _timers_lock:
+        timer = _timers.get(username)
+        if timer is None:
+            timer = _timers[username] = PracticeTimer(username)
+            timer.restore()
+        return timer
+
+
+class PracticeTimer:
+    def __init__(self, username):
+        self.username = username
+        self.started_at = None    # wall-clock start (datetime)
+        self.started_mono = None  # monotonic clock at started_at
+        self.ended_elapsed = None  # seconds, once stopped
+        self.checkpoint_elapsed = 0.0
+        self.restored = False     # resumed from a checkpoint rather than started here
+        self.lock = threading.RLock()
+        self.checkpoint_job = None
+
+    # ---------- state ----------
+    @property
+    def active(self):
+        return self.started_at is not None
+
+    @property
+    def running(self):
+        return self.active and self.ended_elapsed is None
+
+    def elapsed(self):
+        with self.lock:
+            if not self.active:
+                return 0.0
+            if self.ended_elapsed is not None:
+                return self.ended_elapsed
+            return time.monotonic() - self.started_mono
+
+    @property
+    def ended_at(self):
+        if self.ended_elapsed is None:
+            return None
+        return self.started_at + timedelta(seconds=self.ended_elapsed)
+
+    # ---------- control ----------
+    def start(self):
+        with self.lock:
+            # A restart must not leave the previous checkpoint chain running
+            self._cancel_checkpoint()
+            self.started_mono = time.monotonic()
+            self.started_at = datetime.now()
+            self.ended_elapsed = None
+            self.restored = False
+            self.checkpoint()
+            self._schedule_checkpoint()
+
+    def stop(self):
+        with self.lock:
+            if not self.running:
+                return
+            self.ended_elapsed = time.monotonic() - self.started_mono
+            self._cancel_checkpoint()
+            self.checkpoint()
+
+    def discard(self):
+        with self.lock:
+            self._cancel_checkpoint()
+            self._reset()
+            clear_checkpoint(self.username)
+
+    def save(self, instrument, focus, notes):
+        # Stores the stopped session and clears the checkpoint in one
+        # transaction; duration is whole minutes of monotonic elapsed time.
+        with self.lock:
+            if not self.active or self.running:
+                raise RuntimeError("Stop the timer before saving the session.")
+            started_at, ended_at = self.started_at, self.ended_at
+            save_timed_session(self.username, (
+                started_at.strftime('%Y-%m-%d'), instrument, int(self.ended_elapsed // 60), notes,
+                started_at.isoformat(timespec="milliseconds"), ended_at.isoformat(timespec="milliseconds"),
+                focus))
+            self._reset()
+
+    def _reset(self):
+        self.started_at = None
+        self.started_mono = None
+        self.ended_elapsed = None
+        self.checkpoint_elapsed = 0.0
+        self.restored = False
+
+    # ---------- checkpoints ----------
+    def checkpoint(self):
+        with self.lock:
+            if not self.active:
+                return
+            elapsed = self.elapsed()
+            save_checkpoint(self.username, self.started_at.isoformat(timespec="microseconds"),
+                            self.ended_at.isoformat(timespec="microseconds") if self.ended_at else None,
+                            elapsed, datetime.now().isoformat(timespec="microseconds"))
+            self.checkpoint_elapsed = elapsed
+
+    def _schedule_checkpoint(self):
+        self._cancel_checkpoint()
+        self.checkpoint_job = threading.Timer(CHECKPOINT_SECONDS, self._checkpoint_tick)
+        self.checkpoint_job.daemon = True
+        self.checkpoint_job.start()
+
+    def _cancel_checkpoint(self):
+        if self.checkpoint_job is not None:
+            self.checkpoint_job.cancel()
+            self.checkpoint_job = None
+
+    def _checkpoint_tick(self):
+        with self.lock:
+            # A tick that fired just as it was cancelled ends its chain here
+            if threading.current_thread() is not self.checkpoint_job:
+                return
+            if self.running:
+                self.checkpoint()
+                self._schedule_checkpoint()
+
+    def restore(self):
+        # A session that was still running when the app went away resumes
+        # from its wall-clock start; resume_gap() tells the caller how long
+        # nothing was recording so it can offer to end at the checkpoint.
+        row = load_checkpoint(self.username)
+        if row is None:
+            return
+        started_at, ended_at, elapsed = row
+        with self.lock:
+            self.started_at = datetime.fromisoformat(started_at)
+            self.checkpoint_elapsed = elapsed
+            self.restored = True
+            if ended_at is not None:
+                self.started_mono = time.monotonic() - elapsed
+                self.ended_elapsed = elapsed
+            else:
+                since_start = (datetime.now() - self.started_at).total_seconds()
+                self.started_mono = time.monotonic() - max(since_start, elapsed)
+                self._schedule_checkpoint()
+
+    def resume_gap(self):
+        # Seconds between the last checkpoint and now for a restored timer
+        if not (self.restored and self.running):
+            return 0.0
+        return max(0.0, self.elapsed() - self.checkpoint_elapsed)
+
+    def end_at_checkpoint(self):
+        # Stops a restored timer at its last checkpoint, dropping the time
+        # the app was not running
+        with self.lock:
+            if not self.running:
+                return
+            self.ended_elapsed = self.checkpoint_elapsed
+            self._cancel_checkpoint()
+            self.checkpoint()
+
+
+def checkpoint_all():
+    for timer in list(_timers.values()):
+        if timer.running:
+            timer.checkpoint()
+
+
+atexit.register(checkpoint_all)
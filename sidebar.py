@@ -1,4 +1,5 @@
 import tkinter as tk
+import instrumentation
 
 def create_sidebar(parent, on_nav_click=None):
     # Color palette
@@ -29,6 +30,8 @@ def create_sidebar(parent, on_nav_click=None):
         ("Practice Calendar", "📆"),
         ("Logout", "🚪")
     ]
+    if instrumentation.enabled():
+        menu_items.insert(-1, ("Performance", "⏱️"))
 
     content_wrapper = tk.Frame(sidebar, bg="#CAA8C7")
     content_wrapper.pack(fill="both", expand=True)
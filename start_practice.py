@@ -1,8 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-from datetime import datetime
-import time
+import import_export
+import practice_timer
+from datetime import datetime, timedelta
 
 def create_start_practice_frame(parent, username):
     frame = tk.Frame(parent, bg="#F2F6FC")
@@ -18,30 +18,54 @@ def create_start_practice_frame(parent, username):
     font_timer = ("Courier", 28, "bold")
 
     # ---------- TIMER STATE ----------
-    start_time = [None]
-    timer_id = [None]
+    # The running session lives in practice_timer, not in this frame, so it
+    # survives navigation, logout and restarts.
+    timer = practice_timer.get_timer(username)
+    tick_job = [None]
+    timer_text = {"start": None, "end": None}  # what the timer last wrote into the time fields
 
     def update_timer():
-        if start_time[0]:
-            elapsed = int(time.time() - start_time[0])
-            hrs = elapsed // 3600
-            mins = (elapsed % 3600) // 60
-            secs = elapsed % 60
-            timer_label.config(text=f"⏱ {hrs:02}:{mins:02}:{secs:02}")
-            timer_id[0] = timer_label.after(1000, update_timer)
+        tick_job[0] = None
+        elapsed = int(timer.elapsed())
+        hrs = elapsed // 3600
+        mins = (elapsed % 3600) // 60
+        secs = elapsed % 60
+        timer_label.config(text=f"⏱ {hrs:02}:{mins:02}:{secs:02}")
+        if timer.running:
+            # Wake just after the next whole second rather than every 1000 ms
+            # from whenever this run happened to fire
+            delay = 1000 - int(timer.elapsed() * 1000) % 1000
+            tick_job[0] = timer_label.after(delay + 5, update_timer)
+
+    def stop_ticking():
+        if tick_job[0]:
+            timer_label.after_cancel(tick_job[0])
+            tick_job[0] = None
+
+    def set_time_field(entry, name, moment):
+        entry.delete(0, 'end')
+        timer_text[name] = moment.strftime("%H:%M:%S") if moment else None
+        if moment:
+            entry.insert(0, timer_text[name])
+
+    def sync_time_fields():
+        set_time_field(start_entry, "start", timer.started_at)
+        set_time_field(end_entry, "end", timer.ended_at)
 
     def start_practice_timer():
-        start_time[0] = time.time()
-        start_entry.delete(0, 'end')
-        start_entry.insert(0, datetime.now().strftime("%H:%M:%S"))
+        if timer.active and not messagebox.askyesno(
+                "Restart Timer", "A session is already in progress. Discard it and start a new one?"):
+            return
+        timer.start()
+        sync_time_fields()
+        stop_ticking()
         update_timer()
 
     def end_practice_timer():
-        end_entry.delete(0, 'end')
-        end_entry.insert(0, datetime.now().strftime("%H:%M:%S"))
-        if timer_id[0]:
-            timer_label.after_cancel(timer_id[0])
-            timer_id[0] = None
+        timer.stop()
+        stop_ticking()
+        sync_time_fields()
+        update_timer()
 
     # ---------- TITLE ----------
     tk.Label(frame, text="🎵 Start Practice", font=font_title, bg="#FFFFFF", fg=text_color).pack(pady=(30, 10))
@@ -62,15 +86,18 @@ def create_start_practice_frame(parent, username):
         label.grid(row=row, column=0, sticky="e", pady=8, padx=(0, 20))
 
     # ---------- Row 0: Instrument ----------
-    style = ttk.Style()
-    style.theme_use("default")
-    style.configure("Custom.TCombobox",
-                    font=font_main,
-                    fieldbackground="#FFFFFF",
-                    background="#F2F6FC",
-                    bordercolor="#040000",
-                    borderwidth=1,
-                    relief="solid")
+    def apply_style():
+        style = ttk.Style()
+        style.theme_use("default")
+        style.configure("Custom.TCombobox",
+                        font=font_main,
+                        fieldbackground="#FFFFFF",
+                        background="#F2F6FC",
+                        bordercolor="#040000",
+                        borderwidth=1,
+                        relief="solid")
+
+    apply_style()
 
     create_label("Select Instrument:", 0)
     instrument_var = tk.StringVar()
@@ -104,6 +131,15 @@ def create_start_practice_frame(parent, username):
     notes_text.grid(row=4, column=1, sticky="ew", pady=8)
 
     # ---------- SAVE SESSION ----------
+    def reset_form():
+        focus_entry.delete(0, 'end')
+        notes_text.delete("1.0", 'end')
+        start_entry.delete(0, 'end')
+        end_entry.delete(0, 'end')
+        instrument_dropdown.set("")
+        stop_ticking()
+        timer_label.config(text="⏱ 00:00:00")
+
     def save_practice():
         instrument = instrument_var.get()
         focus = focus_entry.get()
@@ -115,53 +151,42 @@ def create_start_practice_frame(parent, username):
             messagebox.showwarning("Missing Info", "Please fill all required fields.")
             return
 
+        # Times the timer measured are saved from the engine, exactly; times
+        # typed (or edited) by hand go through the HH:MM:SS fields below.
+        if timer.active and (start_time_val, end_time_val) == (timer_text["start"], timer_text["end"]):
+            try:
+                timer.save(instrument, focus, notes)
+            except Exception as e:
+                messagebox.showerror("Database Error", str(e))
+                return
+            messagebox.showinfo("Saved", "Practice session saved successfully!")
+            reset_form()
+            return
+
         try:
-            start_dt = datetime.strptime(start_time_val, "%H:%M:%S")
-            end_dt = datetime.strptime(end_time_val, "%H:%M:%S")
+            day = timer.started_at.date() if timer.active else datetime.now().date()
+            start_dt = datetime.combine(day, datetime.strptime(start_time_val, "%H:%M:%S").time())
+            end_dt = datetime.combine(day, datetime.strptime(end_time_val, "%H:%M:%S").time())
+            if end_dt < start_dt:  # session ran past midnight
+                end_dt += timedelta(days=1)
             duration = int((end_dt - start_dt).total_seconds() / 60)
         except ValueError:
             messagebox.showerror("Time Error", "Start or End Time format should be HH:MM:SS.")
             return
 
         try:
-            conn = sqlite3.connect("practice_tracker.db")  # Change DB name if needed
-            cursor = conn.cursor()
-
-            # Ensure table exists with the correct schema
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS practice_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT,
-                    start_time TEXT,
-                    end_time TEXT,
-                    duration TEXT,
-                    focus TEXT,
-                    notes TEXT
-                )
-            """)
-
             # Insert practice session
-            cursor.execute("""
-                INSERT INTO practice_sessions (username, start_time, end_time, duration, focus, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (username, start_time_val, end_time_val, str(duration), focus, notes))
-
-            conn.commit()
-            conn.close()
+            import_export.insert_session(username, {
+                "date": start_dt.strftime('%Y-%m-%d'), "instrument": instrument, "duration": duration,
+                "notes": notes, "start_time": start_dt.isoformat(timespec="seconds"),
+                "end_time": end_dt.isoformat(timespec="seconds"), "focus": focus,
+            })
 
             messagebox.showinfo("Saved", "Practice session saved successfully!")
 
-            # Reset fields
-            focus_entry.delete(0, 'end')
-            notes_text.delete("1.0", 'end')
-            start_entry.delete(0, 'end')
-            end_entry.delete(0, 'end')
-            instrument_dropdown.set("")
-            timer_label.config(text="⏱ 00:00:00")
-            start_time[0] = None
-            if timer_id[0]:
-                timer_label.after_cancel(timer_id[0])
-                timer_id[0] = None
+            if timer.active:
+                timer.discard()  # superseded by the times entered by hand
+            reset_form()
 
         except Exception as e:
             print("Database Error:", e)
@@ -185,6 +210,39 @@ def create_start_practice_frame(parent, username):
     tk.Button(frame, text="💾 Save Session", command=save_practice,
               bg=button_color, fg=text_color, font=font_button, width=25).pack(pady=30)
 
+    # ---------- RESUME ----------
+    def offer_resume():
+        # A session restored from a checkpoint after the app was closed may
+        # have stopped long ago; let the user drop the unrecorded gap.
+        gap = timer.resume_gap()
+        timer.restored = False
+        if gap > 2 * practice_timer.CHECKPOINT_SECONDS:
+            keep = messagebox.askyesno(
+                "Resume Practice",
+                f"A practice session started at {timer.started_at:%H:%M} on {timer.started_at:%Y-%m-%d} "
+                f"was still running when the app closed, {int(gap // 60)} min ago.\n\n"
+                "Keep timing from the original start?\n"
+                "(No ends the session at the last saved checkpoint.)")
+            if not keep:
+                timer.end_at_checkpoint()
+                sync_time_fields()
+                stop_ticking()
+                update_timer()
+
+    def on_show():
+        apply_style()  # ttk themes are global; other views switch them
+        stop_ticking()
+        update_timer()
+        if timer.restored:
+            frame.after_idle(offer_resume)
+
+    sync_time_fields()
+
+    # Nothing to reload: the form and a running timer must survive navigation
+    frame.refresh = lambda: None
+    frame.on_show = on_show
+    frame.on_hide = stop_ticking
+
     return frame
 
 
@@ -0,0 +1,116 @@
+# tasks.py
+# Background work for the views. Database reads and chart rasterization run
+# on a small thread pool; results are handed back to the Tk thread through a
+# queue that the owning widget polls with after(), because Tk may only be
+# touched from the main thread.
+import base64
+import io
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+log = logging.getLogger(__name__)
+
+WORKER_THREADS = 2
+POLL_MS = 20
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKER_THREADS,
+                                               thread_name_prefix="music-tracker-task")
+    return _executor
+
+
+# One per view. submit() runs work() on a worker and calls on_done(result)
+# on the Tk thread. A newer submit with the same key supersedes the older
+# one, and cancel() (called when the user navigates away) drops everything
+# still pending, so callbacks never see stale data or destroyed widgets.
+class TaskRunner:
+    def __init__(self, widget):
+        self.widget = widget
+        self.results = queue.Queue()
+        self.generation = 0
+        self.pending = set()
+        self.latest = {}  # key -> most recent future for that key
+        self.poll_job = None
+
+    def submit(self, work, on_done, key=None, on_error=None):
+        if key is not None and key in self.latest:
+            self.latest[key].cancel()
+
+        generation = self.generation
+        future = get_executor().submit(work)
+        self.pending.add(future)
+        if key is not None:
+            self.latest[key] = future
+        future.add_done_callback(
+            lambda f: self.results.put((generation, key, f, on_done, on_error)))
+
+        if self.poll_job is None:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
+        return future
+
+    def cancel(self):
+        # Returns True if any work was dropped, so the view knows to reload
+        # when it is shown again.
+        self.generation += 1
+        for future in self.pending:
+            future.cancel()
+        self.latest.clear()
+        return bool(self.pending)
+
+    def _poll(self):
+        self.poll_job = None
+        if not self.widget.winfo_exists():
+            self.cancel()
+            return
+
+        while True:
+            try:
+                generation, key, future, on_done, on_error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(future)
+            if future.cancelled() or generation != self.generation:
+                continue
+            if key is not None:
+                if self.latest.get(key) is not future:
+                    continue
+                del self.latest[key]
+
+            error = future.exception()
+            if error is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                log.error("background task failed", exc_info=error)
+
+        if self.pending:
+            self.poll_job = self.widget.after(POLL_MS, self._poll)
+
+
+# ---------- chart rendering ----------
+def render_png(figure, name="figure"):
+    # Rasterizes a Figure with Agg and returns the PNG as base64 text, ready
+    # for tk.PhotoImage(data=...). Safe on a worker thread provided no other
+    # thread is drawing the same figure at the same time. name labels the
+    # draw time in the performance panel.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    if not isinstance(figure.canvas, FigureCanvasAgg):
+        FigureCanvasAgg(figure)
+    buffer = io.BytesIO()
+    with instrumentation.timed("draw", name):
+        figure.savefig(buffer, format="png")
+    return base64.b64encode(buffer.getvalue())
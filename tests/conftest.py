@@ -0,0 +1,111 @@
+# tests/conftest.py
+# Every test gets its own migrated database file in tmp_path; the modules
+# under test reach it through db.DB_PATH like the app does.
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+from migrations import PERIOD_STARTS
+
+
+@pytest.fixture
+def tracker_db(tmp_path, monkeypatch):
+    db.close_all()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "music_tracker.db"))
+    yield db.get_connection()
+    db.close_all()
+
+
+# ---------- RECOMPUTATION ----------
+# What each trigger-maintained table should hold, rebuilt from
+# practice_sessions and goals alone.
+def expected_daily_rollup(conn):
+    return sorted(conn.execute("""
+        SELECT COALESCE(username, ''), COALESCE(date, ''), COALESCE(instrument, ''),
+               SUM(COALESCE(duration, 0)), COUNT(*)
+        FROM practice_sessions GROUP BY 1, 2, 3
+    """).fetchall())
+
+
+def expected_period_rollup(conn):
+    rows = []
+    for resolution, start in PERIOD_STARTS.items():
+        rows += conn.execute(f"""
+            SELECT COALESCE(username, ''), '{resolution}', {start.format(day="date")},
+                   SUM(COALESCE(duration, 0)), COUNT(*)
+            FROM practice_sessions WHERE julianday(date) IS NOT NULL
+            GROUP BY 1, 3
+        """).fetchall()
+    return sorted(rows)
+
+
+def expected_goal_progress(conn):
+    return sorted(conn.execute("""
+        SELECT g.id, COALESCE(SUM(s.duration), 0)
+        FROM goals g LEFT JOIN practice_sessions s
+          ON s.username = g.username
+         AND s.date BETWEEN COALESCE(g.start_date, '0000-01-01') AND COALESCE(g.due_date, '9999-12-31')
+        GROUP BY g.id
+    """).fetchall())
+
+
+def expected_instrument_totals(conn):
+    return sorted(conn.execute("""
+        SELECT COALESCE(username, ''), COALESCE(instrument, ''), SUM(COALESCE(duration, 0))
+        FROM practice_sessions GROUP BY 1, 2 HAVING SUM(COALESCE(duration, 0)) != 0
+    """).fetchall())
+
+
+def expected_streaks(conn, username):
+    # (current, max) over the user's valid practice days
+    days = [date.fromisoformat(day) for (day,) in conn.execute("""
+        SELECT DISTINCT date FROM practice_sessions
+        WHERE username = ? AND julianday(date) IS NOT NULL ORDER BY date
+    """, (username,))]
+    current = longest = 0
+    for previous, day in zip([None] + days, days):
+        current = current + 1 if previous and (day - previous).days == 1 else 1
+        longest = max(longest, current)
+    return current, longest
+
+
+def assert_derived_state(conn):
+    assert sorted(conn.execute("SELECT * FROM daily_rollup").fetchall()) == expected_daily_rollup(conn)
+    assert sorted(conn.execute("SELECT * FROM period_rollup").fetchall()) == expected_period_rollup(conn)
+    assert sorted(conn.execute("SELECT id, progress_minutes FROM goals").fetchall()) == expected_goal_progress(conn)
+    assert conn.execute("""
+        SELECT COUNT(*) FROM goals
+        WHERE target_minutes > 0 AND progress_minutes >= target_minutes AND completed != 1
+    """).fetchone()[0] == 0
+    assert sorted(conn.execute("""
+        SELECT username, instrument, minutes FROM achievement_instrument_totals WHERE minutes != 0
+    """).fetchall()) == expected_instrument_totals(conn)
+
+    totals = dict(conn.execute("""
+        SELECT COALESCE(username, ''), SUM(COALESCE(duration, 0)) FROM practice_sessions GROUP BY 1
+    """).fetchall())
+    completed = dict(conn.execute("""
+        SELECT COALESCE(username, ''), COUNT(*) FROM goals WHERE completed = 1 GROUP BY 1
+    """).fetchall())
+    for username, total_minutes, goals_completed in conn.execute(
+            "SELECT username, total_minutes, goals_completed FROM achievement_state").fetchall():
+        assert total_minutes == totals.get(username, 0)
+        assert goals_completed == completed.get(username, 0)
+    assert set(totals) <= {row[0] for row in conn.execute("SELECT username FROM achievement_state")}
+
+    assert conn.execute("SELECT COUNT(*) FROM bulk_load").fetchone()[0] == 0
+
+
+@pytest.fixture
+def check_derived():
+    return assert_derived_state
+
+
+@pytest.fixture
+def streaks():
+    return expected_streaks
@@ -0,0 +1,139 @@
+# tests/test_api_server.py
+# Clients reach the data only through per-user operations: no route takes
+# SQL, and every user route needs that user's session.
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+import api_client
+import api_server
+import goals
+import practice_history
+
+
+async def stop(instance):
+    # Also ends the handlers still waiting on keep-alive connections
+    await instance.close()
+    handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in handlers:
+        task.cancel()
+    await asyncio.gather(*handlers, return_exceptions=True)
+
+
+@pytest.fixture
+def server(tracker_db):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    instance = api_server.ApiServer()
+    host, port = asyncio.run_coroutine_threadsafe(instance.start("127.0.0.1", 0), loop).result(10)
+    yield f"http://{host}:{port}"
+    asyncio.run_coroutine_threadsafe(stop(instance), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    loop.close()
+
+
+@pytest.fixture
+def client(server):
+    # Logged in as ana; ben exists too
+    client = api_client.ApiClient(server)
+    client.register_user("ana", "secret")
+    api_client.ApiClient(server).register_user("ben", "hunter2")
+    return client
+
+
+def send(url, method, path, body=None, headers=None):
+    # (status, payload) without ApiClient's error mapping
+    client = api_client.ApiClient(url)
+    conn = http.client.HTTPConnection(client.host, client.port, timeout=10)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("path", ["/db/query", "/db/execute", "/db/executemany", "/db/transactions"])
+def test_raw_sql_endpoints_are_gone(client, path):
+    for sql in ("DELETE FROM practice_sessions", "UPDATE users SET password = 'x'",
+                "ATTACH DATABASE 'other.db' AS other", "PRAGMA writable_schema = ON"):
+        status, _ = send(client.url, "POST", path, {"sql": sql, "params": []},
+                         {api_client.SESSION_HEADER: client.sessions["ana"]})
+        assert status == 404
+
+
+def test_user_routes_need_that_users_session(client):
+    call = "/api/users/ben/calls/import_export.insert_session"
+    body = {"args": [{"date": "2025-03-01", "instrument": "Piano", "duration": 30}]}
+    assert send(client.url, "POST", call, body)[0] == 401
+    assert send(client.url, "POST", call, body, {api_client.SESSION_HEADER: client.sessions["ana"]})[0] == 401
+    assert send(client.url, "GET", "/api/users/ben/sessions", None,
+                {api_client.SESSION_HEADER: "made-up"})[0] == 401
+
+    with pytest.raises(api_client.ApiClientError) as error:
+        client.call("import_export.insert_session", "ben", [body["args"][0]])
+    assert error.value.status == 401
+
+
+def test_wrong_password_opens_no_session(server, client):
+    other = api_client.ApiClient(server)
+    assert other.check_password("ana", "wrong") is False
+    assert other.check_password("nobody", "secret") is None
+    assert other.sessions == {}
+    assert other.check_password("ana", "secret") is True
+    assert "ana" in other.sessions
+
+
+def test_unknown_calls_are_not_routed(client):
+    for name in ("db.execute", "db.query", "goals.recalculate_progress", "os.system"):
+        with pytest.raises(api_client.ApiClientError) as error:
+            client.call(name, "ana")
+        assert error.value.status == 404
+
+
+def test_writes_stay_within_the_users_rows(tracker_db, client, check_derived):
+    record = {"date": "2025-03-01", "instrument": "Piano", "duration": 30}
+    ana_id = client.call("import_export.insert_session", "ana", [record])
+    ben_id = tracker_db.execute("""
+        INSERT INTO practice_sessions (username, date, instrument, duration) VALUES ('ben', '2025-03-01', 'Cello', 40)
+    """).lastrowid
+    tracker_db.commit()
+
+    # ana's calls can't touch ben's session or goals, whatever ids they send
+    assert client.call("practice_history.delete_sessions", "ana", [[ben_id]]) == []
+    client.call("practice_history.update_sessions", "ana", [[ben_id], {"duration": 1}])
+    client.call("practice_history.revert_updates", "ana", [["duration"], [[ben_id, 999]]])
+    goal_id = goals.add_goal("ben", "Mine", "", 100, "2025-12-31", "2025-01-01")
+    client.call("goals.complete_goal", "ana", [goal_id])
+    client.call("goals.delete_goal", "ana", [goal_id])
+    client.call("practice_history.restore_sessions", "ana", [[[ben_id + 100, "ben", "2025-03-02", "Cello", 5,
+                                                              "", None, None, None]]])
+
+    assert tracker_db.execute("SELECT duration FROM practice_sessions WHERE id = ?", (ben_id,)).fetchone() == (40,)
+    assert tracker_db.execute("SELECT completed FROM goals WHERE id = ?", (goal_id,)).fetchone() == (0,)
+    assert tracker_db.execute("SELECT username FROM practice_sessions WHERE id = ?", (ben_id + 100,)).fetchone() == ("ana",)
+    assert tracker_db.execute("SELECT username FROM practice_sessions WHERE id = ?", (ana_id,)).fetchone() == ("ana",)
+    check_derived(tracker_db)
+
+
+def test_revert_updates_rejects_other_columns(client):
+    ana_id = client.call("import_export.insert_session", "ana",
+                         [{"date": "2025-03-01", "instrument": "Piano", "duration": 30}])
+    for columns in (["username"], ["id"], ["duration", "username"], ["duration = 0, username"]):
+        with pytest.raises(ValueError):
+            client.call("practice_history.revert_updates", "ana", [columns, [[ana_id, "ben"]]])
+    with pytest.raises(ValueError):
+        practice_history.revert_updates("ana", ["username"], [(ana_id, "ben")])
+
+
+def test_validation_errors_keep_their_type(client):
+    with pytest.raises(ValueError):
+        client.call("import_export.insert_session", "ana", [{"date": "2025-03-01", "instrument": "Piano",
+                                                            "duration": 10 ** 12}])
+    with pytest.raises(ValueError):
+        client.call("goals.add_goal", "ana", ["", "", 10, "2025-12-31"])
@@ -0,0 +1,106 @@
+# tests/test_migrations.py
+import sqlite3
+
+import pytest
+
+import db
+import migrations
+
+
+def user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_fresh_database_runs_every_step(tracker_db, check_derived):
+    assert user_version(tracker_db) == len(migrations.MIGRATIONS)
+    tables = {row[0] for row in tracker_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"practice_sessions", "goals", "users", "practice_notes", "daily_rollup", "period_rollup",
+            "achievement_state", "achievement_instrument_totals", "data_versions", "active_sessions",
+            "bulk_load"} <= tables
+    check_derived(tracker_db)
+
+
+def test_up_to_date_database_skips_all_steps(tracker_db):
+    schema = tracker_db.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall()
+    assert migrations.migrate(tracker_db) == len(migrations.MIGRATIONS)
+    assert tracker_db.execute("SELECT sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_failed_step_rolls_back(tmp_path, monkeypatch):
+    def broken(cursor):
+        cursor.execute("CREATE TABLE half_done (x)")
+        raise sqlite3.OperationalError("broken step")
+
+    conn = sqlite3.connect(tmp_path / "broken.db")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:2] + [broken])
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate(conn)
+    assert user_version(conn) == 2
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'half_done'").fetchone()[0] == 0
+    conn.close()
+
+
+def test_upgrade_backfills_derived_tables(tmp_path, monkeypatch, check_derived):
+    # A database from before the rollups: sessions and goals written by hand,
+    # goal dates unpadded as the old goals view stored them
+    path = tmp_path / "music_tracker.db"
+    conn = sqlite3.connect(path)
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:3])
+        migrations.migrate(conn)
+    conn.executemany("INSERT INTO practice_sessions (username, date, instrument, duration) VALUES (?, ?, ?, ?)", [
+        ("ana", "2025-03-01", "Piano", 30),
+        ("ana", "2025-03-02", "Piano", 45),
+        ("ana", "2025-03-02", "Violin", 20),
+        ("ana", "2024-12-30", "Piano", 10),
+        ("ben", "2025-03-02", "Cello", 40),
+    ])
+    conn.executemany("INSERT INTO goals (username, goal_title, target_minutes, due_date, completed) VALUES (?, ?, ?, ?, ?)", [
+        ("ana", "Winter", 100, "2025-3-2", 0),
+        ("ana", "Done", 10, "2025-1-1", 1),
+        ("ben", "Year", 1000, "2025-12-31", 0),
+    ])
+    conn.commit()
+
+    assert migrations.migrate(conn) == len(migrations.MIGRATIONS)
+    check_derived(conn)
+    assert conn.execute("SELECT due_date FROM goals ORDER BY id").fetchall() == [
+        ("2025-03-02",), ("2025-01-01",), ("2025-12-31",)]
+    # Past-due goals count everything up to their due date
+    assert conn.execute("SELECT progress_minutes, completed FROM goals WHERE goal_title = 'Winter'").fetchone() == (105, 1)
+    assert conn.execute("SELECT goals_completed FROM achievement_state WHERE username = 'ana'").fetchone()[0] == 2
+    conn.close()
+
+
+def test_legacy_stores_are_consolidated(tmp_path, monkeypatch, check_derived):
+    notes = sqlite3.connect(tmp_path / migrations.LEGACY_NOTES_DB)
+    notes.execute("CREATE TABLE practice_notes (id INTEGER PRIMARY KEY, username TEXT, note TEXT, category TEXT, date TEXT)")
+    notes.execute("INSERT INTO practice_notes VALUES (7, 'ana', 'Slow practice works', 'Technique', '2025-03-01')")
+    notes.commit()
+    notes.close()
+
+    timer = sqlite3.connect(tmp_path / migrations.LEGACY_TIMER_DB)
+    timer.execute("""
+        CREATE TABLE practice_sessions (id INTEGER PRIMARY KEY, username TEXT, start_time TEXT,
+                                        end_time TEXT, focus TEXT, notes TEXT)
+    """)
+    timer.executemany("INSERT INTO practice_sessions (username, start_time, end_time, focus, notes) VALUES (?, ?, ?, ?, ?)", [
+        ("ana", "09:00:00", "09:45:00", "Scales", None),
+        ("ana", "23:50:00", "00:20:00", "Pieces", "late"),
+        ("ana", "bad", "09:00:00", None, None),
+    ])
+    timer.commit()
+    timer.close()
+
+    db.close_all()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "music_tracker.db"))
+    try:
+        conn = db.get_connection()
+        assert conn.execute("SELECT id, note FROM practice_notes").fetchall() == [(7, "Slow practice works")]
+        assert conn.execute("SELECT date, instrument, duration, notes, start_time FROM practice_sessions ORDER BY id").fetchall() == [
+            (migrations.UNKNOWN_DATE, migrations.LEGACY_INSTRUMENT, 45, "", "09:00:00"),
+            (migrations.UNKNOWN_DATE, migrations.LEGACY_INSTRUMENT, 30, "late", "23:50:00"),
+        ]
+        check_derived(conn)
+    finally:
+        db.close_all()
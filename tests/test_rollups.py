@@ -0,0 +1,203 @@
+# tests/test_rollups.py
+# daily_rollup, period_rollup, goal progress and achievement state are kept
+# by triggers (and by insert_batch while they stand down); after every kind
+# of write each one must match a recomputation from practice_sessions.
+import pytest
+
+import achievements
+import goals
+import import_export
+import practice_history
+
+SESSIONS = [
+    {"date": "2025-03-01", "instrument": "Piano", "duration": 30},
+    {"date": "2025-03-02", "instrument": "Piano", "duration": 45, "notes": "scales"},
+    {"date": "2025-03-02", "instrument": "Violin", "duration": 20},
+    {"date": "2025-03-03", "instrument": "Piano", "duration": 15},
+    {"date": "2025-03-31", "instrument": "Violin", "duration": 60},
+    {"date": "2025-04-01", "instrument": "Violin", "duration": 25},
+    {"date": "2024-12-30", "instrument": "Piano", "duration": 10},
+]
+
+
+def data_version(conn, username):
+    row = conn.execute("SELECT version FROM data_versions WHERE username = ?", (username,)).fetchone()
+    return row[0] if row else 0
+
+
+def session_ids(conn, username):
+    return [row[0] for row in conn.execute(
+        "SELECT id FROM practice_sessions WHERE username = ? ORDER BY id", (username,))]
+
+
+def add_sessions(username, records):
+    return [import_export.insert_session(username, record) for record in records]
+
+
+def test_insert_keeps_derived_tables_exact(tracker_db, check_derived):
+    goals.add_goal("ana", "March", "", 100, "2025-03-31", "2025-03-01")
+    goals.add_goal("ana", "Spring", "", 1000, "2025-05-31", "2025-03-15")
+    versions = []
+    for record in SESSIONS:
+        import_export.insert_session("ana", record)
+        versions.append(data_version(tracker_db, "ana"))
+        check_derived(tracker_db)
+    import_export.insert_session("ben", {"date": "2025-03-02", "instrument": "Cello", "duration": 40})
+    check_derived(tracker_db)
+
+    assert versions == sorted(set(versions))
+    assert dict(tracker_db.execute("SELECT goal_title, completed FROM goals")) == {"March": 1, "Spring": 0}
+
+
+def test_undated_sessions_count_only_toward_totals(tracker_db, check_derived):
+    import_export.insert_session("ana", {"start_time": "09:00:00", "end_time": "09:40:00",
+                                          "instrument": "Piano", "duration": 40})
+    goals.add_goal("ana", "Always", "", 500, "2099-12-31", "2000-01-01")
+    check_derived(tracker_db)
+
+    assert tracker_db.execute("SELECT day, minutes FROM daily_rollup").fetchall() == [("", 40)]
+    assert tracker_db.execute("SELECT COUNT(*) FROM period_rollup").fetchone()[0] == 0
+    assert tracker_db.execute("SELECT progress_minutes FROM goals").fetchone()[0] == 0
+    assert achievements.load_achievement_state("ana")["total_minutes"] == 40
+
+
+def test_update_keeps_derived_tables_exact(tracker_db, check_derived):
+    goals.add_goal("ana", "March", "", 150, "2025-03-31", "2025-03-01")
+    add_sessions("ana", SESSIONS)
+    ids = session_ids(tracker_db, "ana")
+
+    version = data_version(tracker_db, "ana")
+    columns, previous = practice_history.update_sessions("ana", ids[:2], {"duration": 90})
+    check_derived(tracker_db)
+    assert data_version(tracker_db, "ana") > version
+
+    # Moves sessions across days, months, years and instruments
+    practice_history.update_sessions("ana", ids[2:4], {"date": "2025-04-02", "instrument": "Flute"})
+    check_derived(tracker_db)
+    practice_history.update_sessions("ana", ids[-1:], {"date": "2025-03-15"})
+    check_derived(tracker_db)
+
+    practice_history.revert_updates("ana", columns, previous)
+    check_derived(tracker_db)
+
+    # Completion is never taken back
+    assert tracker_db.execute("SELECT completed FROM goals").fetchone()[0] == 1
+
+
+def test_delete_and_restore_keep_derived_tables_exact(tracker_db, check_derived):
+    goals.add_goal("ana", "March", "", 100, "2025-03-31", "2025-03-01")
+    add_sessions("ana", SESSIONS)
+    add_sessions("ben", SESSIONS[:3])
+    before = tracker_db.execute("SELECT * FROM daily_rollup ORDER BY 1, 2, 3").fetchall()
+    ids = session_ids(tracker_db, "ana")
+
+    deleted = practice_history.delete_sessions("ana", ids[1:5])
+    check_derived(tracker_db)
+    assert len(deleted) == 4
+    # Emptied days leave no rows behind
+    assert tracker_db.execute("SELECT COUNT(*) FROM daily_rollup WHERE sessions <= 0").fetchone()[0] == 0
+    assert tracker_db.execute("SELECT COUNT(*) FROM period_rollup WHERE sessions <= 0").fetchone()[0] == 0
+
+    practice_history.restore_sessions("ana", deleted)
+    check_derived(tracker_db)
+    assert tracker_db.execute("SELECT * FROM daily_rollup ORDER BY 1, 2, 3").fetchall() == before
+
+    # Another user's ids are left alone
+    assert practice_history.delete_sessions("ben", ids) == []
+    check_derived(tracker_db)
+
+
+def test_goal_changes_keep_progress_exact(tracker_db, check_derived):
+    add_sessions("ana", SESSIONS)
+    goal_id = goals.add_goal("ana", "March", "", 500, "2025-03-31", "2025-03-01")
+    check_derived(tracker_db)
+
+    tracker_db.execute("UPDATE goals SET start_date = '2025-01-01', target_minutes = 100 WHERE id = ?", (goal_id,))
+    check_derived(tracker_db)
+    assert goals.fetch_goals("ana")[0].completed
+
+    goals.delete_goal("ana", goal_id)
+    check_derived(tracker_db)
+    assert achievements.load_achievement_state("ana")["goals_completed"] == 0
+
+
+def test_recalculate_progress_finds_nothing_to_repair(tracker_db):
+    add_sessions("ana", SESSIONS)
+    goals.add_goal("ana", "March", "", 100, "2025-03-31", "2025-03-01")
+    assert goals.recalculate_progress() == 0
+
+
+def test_achievement_streaks_match_practice_days(tracker_db, streaks):
+    # Appended, backdated and removed days all end in the same streaks
+    add_sessions("ana", SESSIONS[:4])
+    state = achievements.load_achievement_state("ana")
+    assert (state["current_streak"], state["max_streak"]) == streaks(tracker_db, "ana") == (3, 3)
+
+    add_sessions("ana", [SESSIONS[6], {"date": "2025-02-28", "instrument": "Piano", "duration": 5}])
+    state = achievements.load_achievement_state("ana")
+    assert (state["current_streak"], state["max_streak"]) == streaks(tracker_db, "ana") == (4, 4)
+
+    practice_history.delete_sessions("ana", session_ids(tracker_db, "ana")[:1])
+    state = achievements.load_achievement_state("ana")
+    assert (state["current_streak"], state["max_streak"]) == streaks(tracker_db, "ana") == (2, 2)
+
+
+# ---------- BULK IMPORT ----------
+def write_csv(path, records):
+    lines = [",".join(import_export.FIELDS)]
+    for record in records:
+        lines.append(",".join(str(record.get(name, "")) for name in import_export.FIELDS))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_bulk_import_keeps_derived_tables_exact(tracker_db, tmp_path, check_derived, streaks):
+    goals.add_goal("ana", "March", "", 120, "2025-03-31", "2025-03-01")
+    add_sessions("ana", SESSIONS[:2])
+    add_sessions("ben", SESSIONS[:2])
+    version = data_version(tracker_db, "ana")
+
+    records = SESSIONS + [
+        {"date": "2025-3-4", "instrument": "Piano", "duration": 35},
+        # Same day and instrument as a stored session, so the rollup upserts
+        {"date": "2025-03-02", "instrument": "Piano", "duration": 15},
+        {"start_time": "08:00:00", "end_time": "08:30:00", "instrument": "Piano", "duration": 30},
+        {"date": "2025-03-05", "instrument": "Piano", "duration": 12.5},
+    ]
+    report = import_export.import_sessions("ana", write_csv(tmp_path / "sessions.csv", records), batch_size=3)
+    check_derived(tracker_db)
+
+    assert (report.imported, report.duplicates, report.invalid) == (8, 2, 1)
+    assert data_version(tracker_db, "ana") > version
+    state = achievements.load_achievement_state("ana")
+    assert (state["current_streak"], state["max_streak"]) == streaks(tracker_db, "ana")
+
+    # Importing the same file again adds nothing
+    report = import_export.import_sessions("ana", tmp_path / "sessions.csv")
+    assert (report.imported, report.duplicates) == (0, 10)
+    check_derived(tracker_db)
+
+
+def test_insert_batch_suspends_per_row_triggers(tracker_db):
+    # With bulk_load set, the guarded triggers leave the rollup alone
+    tracker_db.execute("INSERT INTO bulk_load (id) VALUES (1)")
+    tracker_db.execute(import_export.INSERT_SESSION, ("ana", *import_export.normalize(SESSIONS[0])))
+    assert tracker_db.execute("SELECT COUNT(*) FROM daily_rollup").fetchone()[0] == 0
+    assert tracker_db.execute("SELECT COUNT(*) FROM achievement_instrument_totals").fetchone()[0] == 0
+    tracker_db.rollback()
+
+
+def test_insert_batch_counts_each_row_once(tracker_db, check_derived):
+    rows = [import_export.normalize(record) for record in SESSIONS]
+    import_export.insert_batch("ana", rows)
+    check_derived(tracker_db)
+    assert tracker_db.execute("SELECT SUM(sessions) FROM daily_rollup").fetchone()[0] == len(rows)
+
+
+def test_insert_batch_rejects_invalid_rows_before_writing(tracker_db, check_derived):
+    rows = [import_export.normalize(record) for record in SESSIONS[:2]]
+    rows.append(("2025-03-05", "Piano", 10 ** 12, "", None, None, None))
+    with pytest.raises(ValueError):
+        import_export.insert_batch("ana", rows)
+    assert tracker_db.execute("SELECT COUNT(*) FROM practice_sessions").fetchone()[0] == 0
+    check_derived(tracker_db)
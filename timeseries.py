@@ -0,0 +1,105 @@
+# timeseries.py
+# Practice minutes over time at day, ISO-week, month or year resolution.
+# Days come from daily_rollup and coarser levels from period_rollup, so a
+# series costs one index range scan over at most as many rows as it has
+# points. Periods at either end of a range are reported whole.
+from datetime import date, timedelta
+
+import numpy as np
+
+import db
+
+RESOLUTIONS = ("day", "week", "month", "year")
+
+DAY_SERIES_QUERY = """
+    SELECT day, SUM(minutes) FROM daily_rollup
+    WHERE username = ? AND day BETWEEN ? AND ? AND julianday(day) IS NOT NULL
+    GROUP BY day
+"""
+
+PERIOD_SERIES_QUERY = """
+    SELECT period, minutes FROM period_rollup
+    WHERE username = ? AND resolution = ? AND period BETWEEN ? AND ?
+"""
+
+
+def period_start(day, resolution):
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    if resolution == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def count_periods(start, end, resolution):
+    if end < start:
+        return 0
+    if resolution == "day":
+        return (end - start).days + 1
+    if resolution == "week":
+        return (period_start(end, "week") - period_start(start, "week")).days // 7 + 1
+    if resolution == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return end.year - start.year + 1
+
+
+def periods(start, end, resolution):
+    # Start date of every period overlapping [start, end], as datetime64[D]
+    if resolution == "week":
+        return np.arange(np.datetime64(period_start(start, "week")), np.datetime64(end) + 1, 7)
+    unit = {"day": "D", "month": "M", "year": "Y"}[resolution]
+    return np.arange(np.datetime64(start, unit), np.datetime64(end, unit) + 1).astype("datetime64[D]")
+
+
+def pick_resolution(start, end, max_points):
+    # The finest resolution whose point count fits the available pixels
+    for resolution in RESOLUTIONS:
+        if count_periods(start, end, resolution) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+@db.remote()
+def fetch_day_bounds(username):
+    # (first, last) practice day as ISO text, both None when there is none
+    return db.query_one(
+        "SELECT MIN(day), MAX(day) FROM daily_rollup WHERE username = ? AND julianday(day) IS NOT NULL",
+        (username,))
+
+
+@db.remote()
+def fetch_series_rows(username, resolution, start, end):
+    # (day or period start, minutes) rows between ISO dates start and end
+    if resolution == "day":
+        return db.query(DAY_SERIES_QUERY, (username, start, end))
+    return db.query(PERIOD_SERIES_QUERY, (username, resolution, start, end))
+
+
+def date_bounds(username):
+    # First and last practice day on record, or None when there is none
+    first, last = fetch_day_bounds(username)
+    if first is None:
+        return None
+    return date.fromisoformat(first), date.fromisoformat(last)
+
+
+def fetch_series(username, start, end, resolution=None, max_points=None):
+    # Returns (resolution, period starts as datetime64[D], minutes) with
+    # empty periods filled with zero. Without an explicit resolution the
+    # finest one with at most max_points points is used.
+    if resolution is None:
+        resolution = pick_resolution(start, end, max_points or count_periods(start, end, "day"))
+
+    x = periods(start, end, resolution)
+    if resolution == "day":
+        rows = fetch_series_rows(username, resolution, start.isoformat(), end.isoformat())
+    else:
+        rows = fetch_series_rows(username, resolution, str(x[0]) if len(x) else "", end.isoformat())
+
+    minutes = np.zeros(len(x), dtype=np.int64)
+    if rows:
+        keys, values = zip(*rows)
+        minutes[np.searchsorted(x, np.array(keys, dtype="datetime64[D]"))] = values
+    return resolution, x, minutes
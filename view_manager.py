@@ -0,0 +1,83 @@
+# view_manager.py
+import tkinter as tk
+import db
+
+
+# Builds each screen once and raises it again on later navigation.
+# A factory is called as factory(container, username). If the widget it
+# returns has a `refresh` callable, that reloads its data when the database
+# changed since the view was last shown; otherwise the view is rebuilt
+# inside its container. Optional `on_show` / `on_hide` callables run each
+# time the view is shown or navigated away from.
+class ViewManager:
+    def __init__(self, parent, username, factories, bg):
+        self.parent = parent
+        self.username = username
+        self.factories = factories
+        self.bg = bg
+        self.views = {}  # name -> {"container", "widget", "version"}
+        self.current = None
+
+    def show(self, name):
+        view = self.views.get(name)
+        if view is None:
+            view = self._build(name)
+        elif view["version"] != db.data_version():
+            self._refresh(name, view)
+
+        if self.current is not None and self.current is not view:
+            self._hide(self.current)
+        view["container"].pack(fill="both", expand=True)
+        view["container"].tkraise()
+        self.current = view
+
+        on_show = getattr(view["widget"], "on_show", None)
+        if callable(on_show):
+            on_show()
+
+    def invalidate(self, name=None):
+        # Forces a refresh the next time the view (or every view) is shown
+        for view_name, view in self.views.items():
+            if name is None or view_name == name:
+                view["version"] = None
+
+    def destroy(self):
+        if self.current is not None:
+            self._hide(self.current)
+        for view in self.views.values():
+            view["container"].destroy()
+        self.views.clear()
+        self.current = None
+
+    def _hide(self, view):
+        on_hide = getattr(view["widget"], "on_hide", None)
+        if callable(on_hide):
+            on_hide()
+        view["container"].pack_forget()
+
+    def _build(self, name):
+        container = tk.Frame(self.parent, bg=self.bg)
+        view = {"container": container, "widget": None, "version": None}
+        self.views[name] = view
+        self._create(name, view)
+        return view
+
+    def _create(self, name, view):
+        factory = self.factories.get(name)
+        if factory is None:
+            tk.Label(view["container"], text=f"{name} Coming Soon...",
+                     font=("Helvetica", 16, "bold"), bg=self.bg, fg="#333").pack(pady=50)
+        else:
+            view["widget"] = factory(view["container"], self.username)
+        view["version"] = db.data_version()
+
+    def _refresh(self, name, view):
+        refresh = getattr(view["widget"], "refresh", None)
+        if callable(refresh):
+            refresh()
+            view["version"] = db.data_version()
+            return
+
+        for widget in view["container"].winfo_children():
+            widget.destroy()
+        self._create(name, view)
@@ -0,0 +1,69 @@
+# views.py
+import importlib
+import logging
+import time
+
+import instrumentation
+
+log = logging.getLogger(__name__)
+
+# Sidebar label -> (module, factory). Modules are imported on first
+# navigation so heavy dependencies (Matplotlib, PIL) load only when needed.
+VIEW_REGISTRY = {
+    "Dashboard": ("dashboard", "create_dashboard"),
+    "Start Practice": ("start_practice", "create_start_practice_frame"),
+    "Practice History": ("practice_history", "create_practice_history_frame"),
+    "Goals": ("goals", "create_goals_frame"),
+    "Practice Notes": ("practice_notes", "create_practice_notes_frame"),
+    "Analysis by Graph": ("analysis", "create_analysis_frame"),
+    "Achievements": ("achievements", "create_achievements_frame"),
+    "Practice Calendar": ("calendar_view", "create_calendar_frame"),
+    # Only offered in the sidebar when instrumentation is enabled
+    "Performance": ("performance_panel", "create_performance_frame"),
+}
+
+# module name -> seconds spent importing it (first import only)
+import_timings = {}
+
+
+def timed_import(module_name):
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if module_name not in import_timings:
+        import_timings[module_name] = time.perf_counter() - start
+        log.info("import %s: %.1f ms", module_name, import_timings[module_name] * 1000)
+    return module
+
+
+class LazyViewRegistry:
+    # Dict-like: get(label) imports the view's module on first use and
+    # returns its factory, or None if the module is not available.
+    def __init__(self, registry=None):
+        self.registry = registry or VIEW_REGISTRY
+        self.factories = {}
+
+    def get(self, label, default=None):
+        if label in self.factories:
+            return self.factories[label]
+        if label not in self.registry:
+            return default
+
+        module_name, factory_name = self.registry[label]
+        try:
+            module = timed_import(module_name)
+        except ModuleNotFoundError as e:
+            if e.name != module_name:
+                raise
+            log.warning("view %r unavailable: module %s not found", label, module_name)
+            self.factories[label] = default
+            return default
+
+        self.factories[label] = instrumentation.timed_view(label, getattr(module, factory_name))
+        return self.factories[label]
+
+
+def log_startup(started):
+    elapsed = time.perf_counter() - started
+    imports = sum(import_timings.values())
+    log.info("startup: %.1f ms to first view (%.1f ms in view imports)", elapsed * 1000, imports * 1000)
+    return elapsed